@@ -1,13 +1,19 @@
 import streamlit as st
 from streamlit_option_menu import option_menu
 import pandas as pd  # Added missing import
-from utils.data_manager import init_data, save_data
-from utils.ui_components import display_header, login_form, add_link_section, browse_section, download_section
-from utils.link_operations import save_link, delete_selected_links, fetch_metadata
+from utils.ui_components import display_header, login_form, add_link_section, browse_section, download_section, sync_status, diagnostics_panel
+from utils.write_behind import flush, get_status
+from utils.local_mirror import generation as mirror_generation
+from utils import sqlite_store
+from utils.metrics import clip
 import logging
 
-# Set up logging
-logging.basicConfig(level=logging.DEBUG)
+# Set up logging; set LOG_LEVEL = "DEBUG" in secrets for per-operation timings
+try:
+    LOG_LEVEL = st.secrets.get("LOG_LEVEL", "INFO")
+except FileNotFoundError:
+    LOG_LEVEL = "INFO"
+logging.basicConfig(level=getattr(logging, str(LOG_LEVEL).upper(), logging.INFO))
 
 # Verify Streamlit version
 if st.__version__ != "1.31.0":
@@ -131,8 +137,15 @@ def main():
         </p>
         """, unsafe_allow_html=True)
         
+        if mode in ["owner", "guest"] and st.session_state.get('excel_file'):
+            sync_status(st.session_state['excel_file'])
+        
         if st.button("🚪 Exit and Clear Cache", key="exit_button", help="Clear all session data and reset the app"):
-            logging.debug(f"Exit button clicked. Session state before clear: {st.session_state}")
+            logging.debug(f"Exit button clicked. Clearing session keys: {clip(list(st.session_state.keys()))}")
+            if st.session_state.get('excel_file'):
+                with st.spinner("Saving pending changes to Google Drive..."):
+                    if not flush(st.session_state['excel_file']):
+                        st.warning("Some changes are still being saved in the background")
             for key in list(st.session_state.keys()):
                 del st.session_state[key]
             st.session_state['password_input_counter'] = 0
@@ -162,11 +175,29 @@ def main():
     
     # Initialize data based on mode
     if mode in ["owner", "guest"]:
-        if 'df' not in st.session_state or st.session_state.get('username') != username:
+        reload = 'df' not in st.session_state or st.session_state.get('username') != username
+        if not reload and sqlite_store.enabled():
+            # Another session wrote to the library database since this one loaded it
+            current = sqlite_store.current_generation(
+                st.session_state['excel_file'], st.session_state['df'], st.session_state.get('library_generation')
+            )
+            reload = current is None
+            st.session_state['library_generation'] = current
+        elif not reload and mirror_generation(st.session_state['excel_file']) != st.session_state.get('mirror_generation'):
+            # The local mirror picked up changes made elsewhere; adopt them once this session's saves are out
+            reload = get_status(st.session_state['excel_file'])['state'] == 'synced'
+            if reload:
+                st.toast("🔄 Picked up changes from Google Drive")
+        if reload:
+            # Imported here so Public mode never loads the Google API client
+            from utils.data_manager import init_data
             df, excel_file = init_data(mode, username)
             st.session_state['df'] = df
             st.session_state['excel_file'] = excel_file
+            st.session_state['mirror_generation'] = mirror_generation(excel_file)
+            st.session_state['library_generation'] = sqlite_store.generation(excel_file) if sqlite_store.enabled() else None
             st.session_state['username'] = username
+            st.session_state.pop('search_index', None)
         else:
             df = st.session_state['df']
             excel_file = st.session_state['excel_file']
@@ -193,7 +224,7 @@ def main():
                 <li>🔍 <strong>Powerful search</strong> - Full-text search with tag filtering</li>
                 <li>🗑️ <strong>Delete functionality</strong> - Remove unwanted links</li>
                 <li>📊 <strong>Data Table View</strong> - View links in a table</li>
-                <li>📥 <strong>Export capability</strong> - Download as Excel</li>
+                <li>📥 <strong>Export capability</strong> - Download as Excel, CSV or JSON</li>
                 <li>💾 <strong>Storage</strong> - Owner/guest data persists in Google Drive; public data is temporary</li>
             </ul>
         </div>
@@ -210,6 +241,9 @@ def main():
         browse_section(df, excel_file, mode)
     elif selected == "Export Data":
         download_section(df, excel_file, mode)
+    
+    if mode == "owner":
+        diagnostics_panel()
 
 if __name__ == "__main__":
     main()
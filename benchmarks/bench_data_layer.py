@@ -0,0 +1,272 @@
+"""
+Benchmark the Drive-backed data layer offline, against an in-memory fake Drive.
+
+For each library size this times init_data (cold and cached), save_data,
+reading the local mirror, record_changes (what a background save does),
+save_link, delete_selected_links and the browse search, tag filter and page
+views. It reports latency percentiles, peak Python heap (tracemalloc, one extra
+run per operation) and Drive requests and bytes per call.
+
+Results are written as JSON to benchmarks/results/ under the current commit, so
+a later run can be checked for regressions with --compare.
+
+With --engine sqlite the library lives in the local SQLite database: init_data
+(cold) seeds it from the fake Drive, record_changes writes to it and the browse
+views run as database queries.
+
+Usage: python benchmarks/bench_data_layer.py [--sizes 100 1000 10000 100000] [--repeat 5]
+           [--format parquet] [--storage snapshot] [--engine dataframe] [--latency-ms 0]
+           [--output FILE] [--compare FILE]
+"""
+import argparse
+import json
+import math
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(ROOT, 'benchmarks', 'results')
+FOLDER_ID = 'bench-folder'
+EXCEL_FILE = 'web_links.xlsx'
+DELETE_BATCH = 10
+SEARCH_QUERY = 'python cache'
+
+sys.path.insert(0, ROOT)
+
+
+def use_secrets(fmt, storage, engine):
+    """Point st.secrets at a throwaway secrets.toml and the local caches at a throwaway directory.
+
+    Must run before Streamlit and the app modules are imported.
+    """
+    workdir = tempfile.mkdtemp(prefix='bench-data-layer-')
+    os.environ['WCM_CACHE_DIR'] = os.path.join(workdir, 'cache')
+    os.makedirs(os.path.join(workdir, '.streamlit'))
+    with open(os.path.join(workdir, '.streamlit', 'secrets.toml'), 'w') as f:
+        f.write(f'GOOGLE_DRIVE_FOLDER_ID = "{FOLDER_ID}"\n')
+        f.write(f'SNAPSHOT_FORMAT = "{fmt}"\n')
+        f.write(f'STORAGE_MODE = "{storage}"\n')
+        f.write(f'STORAGE_ENGINE = "{engine}"\n')
+        # The mirror's background reconciliation would add Drive requests to whichever
+        # operation is being timed; the mirror read is measured on its own instead
+        f.write('LOCAL_MIRROR = false\n')
+    os.chdir(workdir)
+
+
+def percentile(samples, pct):
+    """Nearest-rank percentile of a list of numbers."""
+    ordered = sorted(samples)
+    return ordered[max(0, math.ceil(pct / 100 * len(ordered)) - 1)]
+
+
+def measure(drive, repeat, op, setup=None):
+    """
+    Time op() repeat times, then run it once more under tracemalloc for its peak.
+
+    setup(), if given, runs untimed before every call and returns op's arguments.
+    """
+    samples = []
+    before = drive.snapshot()
+    for _ in range(repeat):
+        args = setup() if setup else ()
+        start = time.perf_counter()
+        op(*args)
+        samples.append(time.perf_counter() - start)
+    moved = drive.snapshot()
+    moved.subtract(before)
+
+    args = setup() if setup else ()
+    tracemalloc.start()
+    op(*args)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    return {
+        'p50_ms': percentile(samples, 50) * 1000,
+        'p95_ms': percentile(samples, 95) * 1000,
+        'max_ms': max(samples) * 1000,
+        'peak_mib': peak / 2**20,
+        'requests': moved['requests'] / repeat,
+        'kib_up': moved['bytes_up'] / repeat / 1024,
+        'kib_down': moved['bytes_down'] / repeat / 1024,
+    }
+
+
+def run_size(n, repeat, latency):
+    """Benchmark every operation on a fresh fake Drive holding a library of n links."""
+    from benchmarks.fake_drive import FakeDrive
+    from benchmarks.synthetic import make_library
+    from utils import data_manager, local_mirror, sqlite_store, ui_components
+    from utils.data_manager import init_data, save_data, record_changes, make_change
+    from utils.library_version import bump_version, library_version
+    from utils.link_operations import save_link, delete_selected_links
+    from utils.search_index import LibraryIndex
+    from utils.tag_codes import ensure_encoded
+
+    drive = FakeDrive(latency=latency)
+    data_manager._drive_service = drive
+    data_manager._library_cache.clear()
+    data_manager._file_id_cache.clear()
+    sqlite_store.discard(EXCEL_FILE)
+    database = sqlite_store.enabled()
+
+    library = bump_version(ensure_encoded(make_library(n)))
+    if not save_data(library, EXCEL_FILE):
+        raise RuntimeError("Seeding the fake Drive failed")
+
+    state = {'df': library, 'next': n + 1}
+    results = {}
+
+    def new_url():
+        state['next'] += 1
+        return f"https://bench.example.com/new/{state['next']}"
+
+    def cold_caches():
+        # Drop parsed libraries and resolved file IDs so init_data lists, downloads and parses again
+        sqlite_store.discard(EXCEL_FILE)
+        data_manager._library_cache.clear()
+        data_manager._file_id_cache.clear()
+        return ()
+
+    results['init_data (cold)'] = measure(drive, repeat, lambda: init_data('owner'), cold_caches)
+    results['init_data (cached)'] = measure(drive, repeat, lambda: init_data('owner'))
+    results['save_data'] = measure(drive, repeat, lambda: save_data(library, EXCEL_FILE))
+    local_mirror.save(EXCEL_FILE, library, {})
+    results['mirror read'] = measure(drive, repeat, lambda: local_mirror.load(EXCEL_FILE))
+
+    def one_change():
+        url = new_url()
+        row = {
+            'id': state['next'], 'url': url, 'title': "Benchmark link", 'description': "",
+            'tags': ['bench'], 'created_at': '2024-01-01 00:00:00', 'updated_at': '2024-01-01 00:00:00',
+        }
+        return ([make_change('add', url, row)],)
+    results['record_changes'] = measure(drive, repeat, lambda changes: record_changes(library, EXCEL_FILE, changes), one_change)
+
+    results['index build'] = measure(drive, repeat, lambda: LibraryIndex.from_frame(library))
+    index = LibraryIndex.from_frame(library)
+
+    def add_link(url):
+        state['df'], _ = save_link(state['df'], url, "Benchmark link", "Added by the benchmark", ['bench'], index)
+    results['save_link'] = measure(drive, repeat, add_link, lambda: (new_url(),))
+
+    def pick_urls():
+        return (state['df']['url'].iloc[:DELETE_BATCH].tolist(),)
+
+    def delete(urls):
+        state['df'], _ = delete_selected_links(state['df'], None, urls, 'public', index)
+    results['delete_selected_links'] = measure(drive, repeat, delete, pick_urls)
+
+    vocabulary = index.tags.vocabulary
+    tags = tuple(vocabulary[:2])
+
+    def uncached(*functions):
+        def setup():
+            for function in functions:
+                function.clear()
+            return ()
+        return setup
+
+    # The browse views are st.cache_data functions. Outside `streamlit run` Streamlit
+    # keeps no cache between calls, so these always measure a miss; clearing first
+    # keeps it that way should that change.
+    def view(function, *args):
+        return lambda: function(state['df'], index, library_version(state['df']), *args)
+    if database:
+        results['search'] = measure(drive, repeat, lambda: sqlite_store.count_matches(EXCEL_FILE, SEARCH_QUERY))
+        results['tag filter'] = measure(drive, repeat, lambda: sqlite_store.count_matches(EXCEL_FILE, '', tags, 'all'))
+        results['browse page'] = measure(
+            drive, repeat,
+            lambda: sqlite_store.page(EXCEL_FILE, SEARCH_QUERY, (), 'any', *ui_components.SORT_OPTIONS['Title (A-Z)'], 1, 50)
+        )
+        return results
+    results['search'] = measure(drive, repeat, view(ui_components._filter_mask, SEARCH_QUERY, (), 'any'), uncached(ui_components._filter_mask))
+    results['tag filter'] = measure(drive, repeat, view(ui_components._filter_mask, '', tags, 'all'), uncached(ui_components._filter_mask))
+    results['browse page'] = measure(
+        drive, repeat,
+        view(ui_components._page_frame, SEARCH_QUERY, (), 'any', 'Title (A-Z)', 1, 50),
+        uncached(ui_components._page_frame, ui_components._filter_mask, ui_components._sort_order)
+    )
+    return results
+
+
+def git_commit():
+    """Short hash of HEAD, suffixed with -dirty if tracked files have uncommitted changes."""
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True, text=True, check=True).stdout.strip()
+        dirty = subprocess.run(['git', 'diff', '--quiet', 'HEAD'], cwd=ROOT).returncode != 0
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+    return commit + ('-dirty' if dirty else '')
+
+
+def load_baseline(path):
+    """Read a results file written by this script, keyed by (links, operation)."""
+    with open(path) as f:
+        report = json.load(f)
+    return {(row['links'], row['operation']): row for row in report['results']}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100, 1000, 10000, 100000])
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--format', default='parquet', help="SNAPSHOT_FORMAT: parquet, feather or xlsx")
+    parser.add_argument('--storage', default='snapshot', choices=['snapshot', 'changelog'])
+    parser.add_argument('--engine', default='dataframe', choices=['dataframe', 'sqlite'], help="STORAGE_ENGINE")
+    parser.add_argument('--latency-ms', type=float, default=0.0, help="Simulated round trip per Drive request")
+    parser.add_argument('--output', help="Results file (default: benchmarks/results/data_layer-<commit>.json)")
+    parser.add_argument('--compare', help="Earlier results file to compare p50 latencies against")
+    args = parser.parse_args()
+    output = os.path.abspath(args.output) if args.output else None
+    baseline = load_baseline(args.compare) if args.compare else {}
+
+    use_secrets(args.format, args.storage, args.engine)
+    import pandas as pd
+    import streamlit.logger
+    streamlit.logger.set_log_level('error')  # session state and caching warn outside `streamlit run`
+
+    commit = git_commit()
+    rows = []
+
+    header = f"{'links':>7} {'operation':<22} {'p50 ms':>9} {'p95 ms':>9} {'max ms':>9} {'peak MiB':>9} {'req':>5} {'KiB up':>9} {'KiB down':>9}"
+    print(header + ("  vs base" if baseline else ""))
+    for n in args.sizes:
+        for operation, result in run_size(n, args.repeat, args.latency_ms / 1000).items():
+            row = {'links': n, 'operation': operation, **result}
+            rows.append(row)
+            line = (f"{n:>7} {operation:<22} {row['p50_ms']:>9.2f} {row['p95_ms']:>9.2f} {row['max_ms']:>9.2f} "
+                    f"{row['peak_mib']:>9.1f} {row['requests']:>5.1f} {row['kib_up']:>9.1f} {row['kib_down']:>9.1f}")
+            base = baseline.get((n, operation))
+            if base and base['p50_ms']:
+                line += f"  {(row['p50_ms'] / base['p50_ms'] - 1) * 100:+7.1f}%"
+            print(line, flush=True)
+
+    output = output or os.path.join(RESULTS_DIR, f"data_layer-{commit}.json")
+    os.makedirs(os.path.dirname(output), exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump({
+            'commit': commit,
+            'created': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'pandas': pd.__version__,
+            'config': {
+                'format': args.format,
+                'storage': args.storage,
+                'engine': args.engine,
+                'latency_ms': args.latency_ms,
+                'repeat': args.repeat,
+            },
+            'results': rows,
+        }, f, indent=1)
+    print(f"Results written to {output}")
+
+
+if __name__ == '__main__':
+    main()
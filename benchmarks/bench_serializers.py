@@ -0,0 +1,45 @@
+"""
+Compare snapshot serializers for save (serialize) and load (deserialize).
+
+Usage: python benchmarks/bench_serializers.py [--sizes 1000 10000 100000] [--repeat 3]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.synthetic import make_library  # noqa: E402
+from utils.data_manager import SERIALIZERS, serialize_links, deserialize_links  # noqa: E402
+
+
+def best_of(repeat, fn, *args):
+    """Return (best wall time in seconds, last result) over `repeat` runs."""
+    best, result = float('inf'), None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn(*args)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000])
+    parser.add_argument('--formats', nargs='+', default=list(SERIALIZERS))
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'links':>8} {'format':>8} {'save ms':>10} {'load ms':>10} {'size KiB':>10}")
+    for n in args.sizes:
+        df = make_library(n)
+        for fmt in args.formats:
+            save_s, data = best_of(args.repeat, serialize_links, df, fmt)
+            load_s, loaded = best_of(args.repeat, deserialize_links, data, fmt)
+            assert len(loaded) == n and loaded['tags'].tolist() == df['tags'].tolist()
+            print(f"{n:>8} {fmt:>8} {save_s * 1000:>10.1f} {load_s * 1000:>10.1f} {len(data) / 1024:>10.1f}")
+
+
+if __name__ == '__main__':
+    main()
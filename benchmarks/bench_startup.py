@@ -0,0 +1,81 @@
+"""
+Measure cold start of the Streamlit app: import time and time to first render per mode.
+
+Every run starts a fresh interpreter, imports Streamlit (paid once per server
+process) and then renders the app once with Streamlit's AppTest harness, so
+"first render" includes importing the app and its utils modules.
+
+Owner and Guest modes load their library from Google Drive; without
+.streamlit/secrets.toml in the working directory they measure the render with
+the Drive error path instead.
+
+Usage: python benchmarks/bench_startup.py [--modes login public owner guest] [--repeat 5]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APP = os.path.join(ROOT, 'Web_Content_Gdrive_app.py')
+HEAVY_MODULES = ['googleapiclient', 'requests']
+
+
+def child(mode):
+    """Render the app once in this fresh interpreter and print timings as JSON."""
+    sys.path.insert(0, ROOT)
+    start = time.perf_counter()
+    from streamlit.testing.v1 import AppTest
+    imported = time.perf_counter()
+
+    app = AppTest.from_file(APP, default_timeout=120)
+    if mode != 'login':
+        app.session_state['mode'] = mode
+        app.session_state['username'] = 'bench' if mode == 'guest' else None
+    before = time.perf_counter()
+    app.run()
+    first = time.perf_counter()
+    app.run()
+    rerun = time.perf_counter()
+
+    print(json.dumps({
+        'streamlit_ms': (imported - start) * 1000,
+        'first_render_ms': (first - before) * 1000,
+        'rerun_ms': (rerun - first) * 1000,
+        'loaded': [name for name in HEAVY_MODULES if name in sys.modules],
+    }))
+
+
+def measure(mode):
+    """Run one cold start of mode in a subprocess and return its timings."""
+    output = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), '--child', mode],
+        capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--modes', nargs='+', default=['login', 'public', 'owner', 'guest'])
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--child', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(args.child)
+        return
+
+    print(f"{'mode':>8} {'streamlit ms':>13} {'first render ms':>16} {'rerun ms':>10}  heavy modules loaded")
+    for mode in args.modes:
+        runs = [measure(mode) for _ in range(args.repeat)]
+        median = {key: statistics.median(run[key] for run in runs) for key in ('streamlit_ms', 'first_render_ms', 'rerun_ms')}
+        loaded = ', '.join(runs[-1]['loaded']) or '-'
+        print(f"{mode:>8} {median['streamlit_ms']:>13.0f} {median['first_render_ms']:>16.0f} {median['rerun_ms']:>10.0f}  {loaded}")
+
+
+if __name__ == '__main__':
+    main()
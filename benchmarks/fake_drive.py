@@ -0,0 +1,227 @@
+"""
+In-memory stand-in for the parts of the Drive v3 service used by utils.data_manager.
+
+Files keep their full revision history, and every request is counted along with
+the bytes it moves, so benchmarks can report transfer volume per operation.
+Media goes through the real googleapiclient MediaIoBaseUpload/MediaIoBaseDownload
+chunking, served from memory instead of HTTP.
+"""
+import itertools
+import re
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timezone
+
+import httplib2
+from googleapiclient.errors import HttpError
+from googleapiclient.http import MediaUploadProgress
+
+LIST_QUERY = re.compile(r"name='(?P<name>[^']+)' and '(?P<folder>[^']+)' in parents")
+
+
+class FakeDrive:
+    """
+    Drive service with files() and revisions() backed by dicts.
+
+    Install it with `data_manager._drive_service = FakeDrive()`; get_drive_service()
+    then hands it out without building a real client.
+    """
+
+    def __init__(self, latency=0.0):
+        self.latency = latency  # seconds added to every request, to model round trips
+        self.stats = Counter()  # requests, bytes_up, bytes_down
+        self._files = {}  # id -> {'name', 'folder', 'mimeType', 'createdTime', 'trashed', 'revisions': [(id, bytes, modifiedTime)]}
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def files(self):
+        return _Files(self)
+
+    def revisions(self):
+        return _Revisions(self)
+
+    def snapshot(self):
+        """Return a copy of the request and byte counters."""
+        with self._lock:
+            return Counter(self.stats)
+
+    def _request(self, bytes_up=0, bytes_down=0):
+        with self._lock:
+            self.stats['requests'] += 1
+            self.stats['bytes_up'] += bytes_up
+            self.stats['bytes_down'] += bytes_down
+        if self.latency:
+            time.sleep(self.latency)
+
+    def _file(self, file_id):
+        try:
+            return self._files[file_id]
+        except KeyError:
+            raise HttpError(httplib2.Response({'status': 404}), b'File not found', uri=file_id) from None
+
+    def _commit(self, file_id, data):
+        modified = datetime.now(timezone.utc).isoformat()
+        with self._lock:
+            revision = f"rev{next(self._ids)}"
+            self._files[file_id]['revisions'].append((revision, data, modified))
+        return {'id': file_id, 'headRevisionId': revision, 'modifiedTime': modified}
+
+    def _head(self, file_id):
+        return self._file(file_id)['revisions'][-1]
+
+
+class _Request:
+    """Executable request, like googleapiclient.http.HttpRequest."""
+
+    def __init__(self, run):
+        self._run = run
+
+    def execute(self, http=None, num_retries=0):
+        return self._run()
+
+
+class _UploadRequest:
+    """files().update()/create() request; resumable media is read chunk by chunk."""
+
+    def __init__(self, drive, media_body, commit):
+        self._drive = drive
+        self._media = media_body
+        self._commit = commit
+        self._received = []
+        self._offset = 0
+
+    def execute(self, http=None, num_retries=0):
+        data = self._media.getbytes(0, self._media.size())
+        self._drive._request(bytes_up=len(data))
+        return self._commit(data)
+
+    def next_chunk(self, http=None, num_retries=0):
+        size = self._media.size()
+        chunk = self._media.getbytes(self._offset, self._media.chunksize())
+        self._drive._request(bytes_up=len(chunk))
+        self._received.append(chunk)
+        self._offset += len(chunk)
+        if self._offset < size:
+            return MediaUploadProgress(self._offset, size), None
+        return None, self._commit(b''.join(self._received))
+
+
+class _MediaRequest:
+    """get_media() request for MediaIoBaseDownload, answering Range requests from memory."""
+
+    def __init__(self, drive, file_id, revision_id=None):
+        self.uri = f"fake://drive/{file_id}/{revision_id or 'head'}"
+        self.method = 'GET'
+        self.headers = {}
+        self._http = _MediaHttp(drive, file_id, revision_id)
+
+    @property
+    def http(self):
+        return self._http
+
+    @http.setter
+    def http(self, value):
+        pass  # data_manager lends a pooled transport; keep serving from memory
+
+
+class _MediaHttp:
+    def __init__(self, drive, file_id, revision_id):
+        self._drive = drive
+        self._file_id = file_id
+        self._revision_id = revision_id
+
+    def request(self, uri, method='GET', body=None, headers=None, **kwargs):
+        revisions = self._drive._file(self._file_id)['revisions']
+        if self._revision_id:
+            data = next(data for revision, data, _ in revisions if revision == self._revision_id)
+        else:
+            data = revisions[-1][1]
+        start, end = map(int, re.match(r"bytes=(\d+)-(\d+)", headers['range']).groups())
+        content = data[start:end + 1]
+        self._drive._request(bytes_down=len(content))
+        end = start + len(content) - 1
+        return httplib2.Response({'status': 206, 'content-range': f"bytes {start}-{end}/{len(data)}"}), content
+
+
+class _Files:
+    def __init__(self, drive):
+        self._drive = drive
+
+    def list(self, q, spaces='drive', fields=None, pageToken=None):
+        match = LIST_QUERY.match(q)
+
+        def run():
+            self._drive._request()
+            return {'files': [
+                {'id': file_id, 'createdTime': meta['createdTime']} for file_id, meta in self._drive._files.items()
+                if meta['name'] == match['name'] and meta['folder'] == match['folder'] and not meta['trashed']
+            ]}
+        return _Request(run)
+
+    def get(self, fileId, fields=None):
+        def run():
+            self._drive._request()
+            revision, _, modified = self._drive._head(fileId)
+            return {'id': fileId, 'headRevisionId': revision, 'modifiedTime': modified}
+        return _Request(run)
+
+    def get_media(self, fileId):
+        self._drive._file(fileId)
+        return _MediaRequest(self._drive, fileId)
+
+    def update(self, fileId, media_body=None, fields=None, body=None):
+        meta = self._drive._file(fileId)
+        if media_body is None:
+            def run():
+                self._drive._request()
+                meta['trashed'] = bool((body or {}).get('trashed', meta['trashed']))
+                return {'id': fileId}
+            return _Request(run)
+        return _UploadRequest(self._drive, media_body, lambda data: self._drive._commit(fileId, data))
+
+    def delete(self, fileId):
+        def run():
+            self._drive._request()
+            with self._drive._lock:
+                if self._drive._files.pop(fileId, None) is None:
+                    self._drive._file(fileId)  # raises the 404 Drive answers for a missing file
+            return ''
+        return _Request(run)
+
+    def create(self, body, media_body=None, fields=None):
+        def commit(data):
+            with self._drive._lock:
+                file_id = f"file{next(self._drive._ids)}"
+                self._drive._files[file_id] = {
+                    'name': body['name'],
+                    'folder': body['parents'][0],
+                    'mimeType': body.get('mimeType'),
+                    'createdTime': datetime.now(timezone.utc).isoformat(),
+                    'trashed': False,
+                    'revisions': [],
+                }
+            return self._drive._commit(file_id, data)
+        if media_body is None:
+            return _Request(lambda: (self._drive._request(), commit(b''))[1])
+        return _UploadRequest(self._drive, media_body, commit)
+
+
+class _Revisions:
+    def __init__(self, drive):
+        self._drive = drive
+
+    def list(self, fileId, fields=None, pageSize=1000, pageToken=None):
+        def run():
+            self._drive._request()
+            revisions = self._drive._file(fileId)['revisions']
+            start = int(pageToken or 0)
+            response = {'revisions': [{'id': revision} for revision, _, _ in revisions[start:start + pageSize]]}
+            if start + pageSize < len(revisions):
+                response['nextPageToken'] = str(start + pageSize)
+            return response
+        return _Request(run)
+
+    def get_media(self, fileId, revisionId):
+        self._drive._file(fileId)
+        return _MediaRequest(self._drive, fileId, revisionId)
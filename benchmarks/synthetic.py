@@ -0,0 +1,46 @@
+"""Synthetic link libraries for the benchmarks."""
+import random
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+WORDS = (
+    "python data stream cloud drive search index cache parser network async "
+    "pandas arrow storage latency tutorial research news tool design system "
+    "web browser security testing deploy api http html machine learning"
+).split()
+
+
+def make_tag_vocabulary(size=500, seed=0):
+    """Return `size` distinct tag names."""
+    rng = random.Random(seed)
+    tags = set()
+    while len(tags) < size:
+        tags.add(f"{rng.choice(WORDS)}-{rng.randint(0, size)}")
+    return sorted(tags)
+
+
+def make_library(n, seed=0, vocabulary_size=500):
+    """
+    Build a links DataFrame with n rows in the app's column layout.
+
+    Tag popularity follows a Zipf-like distribution, so a few tags appear on
+    most links and the long tail appears on only a handful, as in real libraries.
+    """
+    rng = random.Random(seed)
+    vocabulary = make_tag_vocabulary(vocabulary_size, seed)
+    weights = [1.0 / (rank + 1) for rank in range(len(vocabulary))]
+    start = datetime(2024, 1, 1)
+    rows = []
+    for i in range(n):
+        created = (start + timedelta(minutes=i)).strftime('%Y-%m-%d %H:%M:%S')
+        rows.append({
+            'id': i + 1,
+            'url': f"https://example{i % 997}.com/{rng.choice(WORDS)}/{i}",
+            'title': ' '.join(rng.choices(WORDS, k=rng.randint(3, 8))).title(),
+            'description': ' '.join(rng.choices(WORDS, k=rng.randint(10, 30))),
+            'tags': sorted(set(rng.choices(vocabulary, weights=weights, k=rng.randint(0, 6)))),
+            'created_at': created,
+            'updated_at': created,
+        })
+    return pd.DataFrame(rows)
@@ -0,0 +1,65 @@
+"""
+Shared fixtures for the test suite.
+
+Tests run offline: Google Drive is the in-memory benchmarks.fake_drive.FakeDrive,
+st.secrets is a plain dict and the local caches live in a throwaway directory.
+"""
+import os
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+# metadata_cache reads this at import time, so it must be set before any app module is imported
+os.environ.setdefault('WCM_CACHE_DIR', tempfile.mkdtemp(prefix='wcm-tests-'))
+
+import pandas as pd
+import pytest
+import streamlit as st
+
+from benchmarks.fake_drive import FakeDrive
+from utils import data_manager
+
+FOLDER_ID = 'test-folder'
+EXCEL_FILE = 'web_links.xlsx'
+
+
+@pytest.fixture
+def secrets(monkeypatch):
+    """Secrets for a Drive-backed library; tests may change values, e.g. STORAGE_MODE."""
+    values = {'GOOGLE_DRIVE_FOLDER_ID': FOLDER_ID, 'LOCAL_MIRROR': 'false'}
+    monkeypatch.setattr(st, 'secrets', values)
+    return values
+
+
+@pytest.fixture
+def drive(secrets, monkeypatch):
+    """An empty FakeDrive installed as the process-wide Drive service."""
+    fake = FakeDrive()
+    monkeypatch.setattr(data_manager, '_drive_service', fake)
+    data_manager._library_cache.clear()
+    data_manager._file_id_cache.clear()
+    yield fake
+    data_manager._library_cache.clear()
+    data_manager._file_id_cache.clear()
+
+
+def reload(drive, excel_file=EXCEL_FILE):
+    """Load a library from Drive as a new server process would, bypassing the in-process caches."""
+    data_manager._library_cache.clear()
+    data_manager._file_id_cache.clear()
+    return data_manager._load_library(drive, excel_file)
+
+
+def make_row(link_id, url, title="Title", tags=('tag',)):
+    """Return a link row as the app stores it."""
+    return {
+        'id': link_id, 'url': url, 'title': title, 'description': '', 'tags': list(tags),
+        'created_at': '2024-01-01 00:00:00', 'updated_at': '2024-01-01 00:00:00',
+    }
+
+
+def frame(*rows):
+    """Return an encoded links DataFrame holding rows."""
+    from utils.tag_codes import ensure_encoded
+    return ensure_encoded(pd.DataFrame(list(rows), columns=data_manager.LINK_COLUMNS))
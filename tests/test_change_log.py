@@ -0,0 +1,65 @@
+"""Change log storage mode: replay on load, compaction and switching back to snapshots."""
+from conftest import EXCEL_FILE, frame, make_row, reload
+from utils import data_manager
+from utils.data_manager import apply_changes, make_change, record_changes
+
+
+def add(df, link_id, url, title="Title"):
+    """Add a link the way the UI does and return the new library."""
+    row = make_row(link_id, url, title)
+    change = make_change('add', url, row)
+    df = apply_changes(df, [change])
+    assert record_changes(df, EXCEL_FILE, [change])
+    return df
+
+
+def log_records(drive):
+    data_manager._file_id_cache.clear()
+    return data_manager._load_change_log(drive, EXCEL_FILE)
+
+
+def test_logged_changes_are_replayed_on_load(drive, secrets):
+    secrets['STORAGE_MODE'] = 'changelog'
+    df = add(frame(), 1, 'https://example.com/a')
+    add(df, 2, 'https://example.com/b')
+
+    assert len(log_records(drive)) == 2
+    assert reload(drive)['url'].tolist() == ['https://example.com/a', 'https://example.com/b']
+
+
+def test_compaction_folds_the_log_into_the_snapshot(drive, secrets, monkeypatch):
+    secrets['STORAGE_MODE'] = 'changelog'
+    monkeypatch.setattr(data_manager, 'COMPACT_THRESHOLD', 3)
+    df = frame()
+    for i in range(3):
+        df = add(df, i + 1, f'https://example.com/{i}')
+
+    assert log_records(drive) == []
+    snapshot = data_manager._download_by_name(
+        drive, data_manager.snapshot_name(EXCEL_FILE),
+        data_manager._codec_loader(data_manager.SERIALIZERS[data_manager._snapshot_format()])
+    )
+    assert len(snapshot) == 3
+    assert len(reload(drive)) == 3
+
+
+def test_snapshot_mode_folds_a_leftover_log(drive, secrets):
+    secrets['STORAGE_MODE'] = 'changelog'
+    df = add(frame(), 1, 'https://example.com/x', title="X")
+
+    secrets['STORAGE_MODE'] = 'snapshot'
+    row = dict(make_row(1, 'https://example.com/x', title="Renamed"))
+    assert record_changes(df, EXCEL_FILE, [make_change('update', row['url'], row)])
+
+    assert log_records(drive) == []
+    assert reload(drive)['title'].tolist() == ["Renamed"]
+
+
+def test_delete_in_snapshot_mode_is_not_undone_by_the_log(drive, secrets):
+    secrets['STORAGE_MODE'] = 'changelog'
+    df = add(frame(), 1, 'https://example.com/x')
+
+    secrets['STORAGE_MODE'] = 'snapshot'
+    assert record_changes(df, EXCEL_FILE, [make_change('delete', 'https://example.com/x')])
+
+    assert reload(drive).empty
@@ -0,0 +1,110 @@
+"""Concurrent saves to one Drive library: merging, the create race and the write lock."""
+import threading
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from conftest import EXCEL_FILE, FOLDER_ID, frame, make_row, reload
+from utils import data_manager
+from utils.data_manager import make_change, record_changes
+
+
+@pytest.fixture(autouse=True)
+def quick_retries(monkeypatch):
+    monkeypatch.setattr(data_manager, 'WRITE_BACKOFF', 0.01)
+    monkeypatch.setattr(data_manager, 'MAX_WRITE_BACKOFF', 0.05)
+
+
+def add(df, link_id, url):
+    """Save one new link from a session holding df, which may be out of date."""
+    return record_changes(df, EXCEL_FILE, [make_change('add', url, make_row(link_id, url))])
+
+
+def snapshot_files(drive, suffix=''):
+    name = data_manager.snapshot_name(EXCEL_FILE) + suffix
+    return [file_id for file_id, meta in drive._files.items() if meta['name'] == name]
+
+
+def dump(df):
+    return data_manager.SERIALIZERS[data_manager._snapshot_format()]['dump'](df)
+
+
+def intercept_uploads(monkeypatch, before_upload):
+    """Run before_upload(file_id) ahead of the first snapshot upload."""
+    upload = data_manager._upload_to_drive
+    calls = []
+
+    def wrapped(service, file_name, output, mimetype, file_id=None):
+        if not calls and file_name == data_manager.snapshot_name(EXCEL_FILE):
+            calls.append(file_id)
+            before_upload(file_id)
+        return upload(service, file_name, output, mimetype, file_id)
+    monkeypatch.setattr(data_manager, '_upload_to_drive', wrapped)
+    return calls
+
+
+def test_concurrent_saves_keep_every_link(drive):
+    drive.latency = 0.002
+    urls = [f"https://example.com/{i}" for i in range(6)]
+    results = []
+    threads = [threading.Thread(target=lambda i=i: results.append(add(frame(), i + 1, urls[i]))) for i in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert results == [True] * 6
+    assert sorted(reload(drive)['url']) == urls
+    assert len(snapshot_files(drive)) == 1
+    assert snapshot_files(drive, '.lock') == []
+    assert not any(meta['trashed'] for meta in drive._files.values())
+
+
+def test_write_over_a_concurrent_revision_is_merged(drive, monkeypatch):
+    assert add(frame(), 1, 'https://example.com/a')
+    theirs = frame(make_row(1, 'https://example.com/a'), make_row(2, 'https://example.com/b'))
+    calls = intercept_uploads(monkeypatch, lambda file_id: drive._commit(file_id, dump(theirs)))
+    conflicts = data_manager.get_write_stats()['conflicts']
+
+    assert add(frame(), 2, 'https://example.com/c')
+    assert calls
+    assert data_manager.get_write_stats()['conflicts'] == conflicts + 1
+    library = reload(drive)
+    assert list(library['url']) == ['https://example.com/a', 'https://example.com/b', 'https://example.com/c']
+    assert sorted(library['id']) == [1, 2, 3]  # the clashing ID 2 was renumbered
+
+
+def test_losing_the_create_race_deletes_the_duplicate(drive, monkeypatch):
+    def create_theirs(file_id):
+        assert file_id is None
+        body = {'name': data_manager.snapshot_name(EXCEL_FILE), 'parents': [FOLDER_ID]}
+        created = drive.files().create(body=body).execute()
+        drive._commit(created['id'], dump(frame(make_row(1, 'https://example.com/a'))))
+    intercept_uploads(monkeypatch, create_theirs)
+
+    assert add(frame(), 1, 'https://example.com/b')
+    assert len(snapshot_files(drive)) == 1
+    assert sorted(reload(drive)['url']) == ['https://example.com/a', 'https://example.com/b']
+
+
+def lock_file(drive, age):
+    body = {'name': data_manager.snapshot_name(EXCEL_FILE) + '.lock', 'parents': [FOLDER_ID]}
+    lock_id = drive.files().create(body=body).execute()['id']
+    created = datetime.now(timezone.utc) - timedelta(seconds=age)
+    drive._files[lock_id]['createdTime'] = created.isoformat()
+    return lock_id
+
+
+def test_stale_lock_is_removed(drive):
+    lock_file(drive, data_manager.LOCK_TTL + 60)
+    assert add(frame(), 1, 'https://example.com/a')
+    assert snapshot_files(drive, '.lock') == []
+    assert reload(drive)['url'].tolist() == ['https://example.com/a']
+
+
+def test_save_gives_up_while_another_writer_holds_the_lock(drive, monkeypatch):
+    monkeypatch.setattr(data_manager, 'LOCK_ATTEMPTS', 2)
+    theirs = lock_file(drive, 1)
+    assert not add(frame(), 1, 'https://example.com/a')
+    assert snapshot_files(drive, '.lock') == [theirs]
+    assert snapshot_files(drive) == []
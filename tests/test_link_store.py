@@ -0,0 +1,33 @@
+"""Tests for LinkStore edits on frames shared between sessions."""
+import pandas as pd
+
+from conftest import frame, make_row
+from utils.link_store import LinkStore
+from utils.tag_codes import decode_tags
+
+
+def test_copy_on_write_is_not_switched_on_globally():
+    assert pd.get_option('mode.copy_on_write') is False
+
+
+def test_updating_a_shared_frame_leaves_the_original_unchanged():
+    cached = frame(make_row(1, 'https://a.example/'), make_row(2, 'https://b.example/'))
+    session = cached.copy(deep=False)  # what data_manager._share() hands a session
+
+    store = LinkStore(session)
+    assert store.upsert('https://a.example/', 'New title', 'note', ['new']) == "updated"
+    edited = store.df
+
+    assert edited.loc[0, 'title'] == 'New title'
+    assert edited.loc[0, 'description'] == 'note'
+    assert cached.loc[0, 'title'] == 'Title'
+    assert cached.loc[0, 'description'] == ''
+    assert decode_tags(cached['tags'])[0] == ['tag']
+
+
+def test_new_links_are_appended_without_touching_the_original():
+    cached = frame(make_row(1, 'https://a.example/'))
+    store = LinkStore(cached.copy(deep=False))
+    assert store.upsert('https://c.example/', 'C', '', []) == "saved"
+    assert len(store.df) == 2
+    assert len(cached) == 1
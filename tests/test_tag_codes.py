@@ -0,0 +1,72 @@
+"""Dictionary-encoded tags column and batched tag updates."""
+import pandas as pd
+
+from conftest import frame, make_row
+from utils.data_manager import apply_changes, make_change
+from utils.link_operations import save_links
+from utils.tag_codes import TAGS_DTYPE, decode_tags, encode_tags, replace_tags, set_tags
+
+
+def library(n=5):
+    return frame(*[make_row(i + 1, f'https://example.com/{i}', tags=[f'tag{i}', 'common']) for i in range(n)])
+
+
+def test_encode_cleans_and_round_trips():
+    series = encode_tags([['a', ' b ', 'a', ''], 'x, y', None, []])
+
+    assert series.dtype == TAGS_DTYPE
+    assert decode_tags(series) == [['a', 'b'], ['x', 'y'], [], []]
+
+
+def test_set_tags_changes_only_that_row():
+    df = library()
+    set_tags(df, 2, ['new', ' new ', 'other'])
+
+    assert df['tags'].dtype == TAGS_DTYPE
+    assert decode_tags(df['tags']) == [
+        ['tag0', 'common'], ['tag1', 'common'], ['new', 'other'], ['tag3', 'common'], ['tag4', 'common']
+    ]
+
+
+def test_replace_tags_updates_many_rows_at_once():
+    df = library()
+    replace_tags(df, {4: ['last'], 0: [], 3: ['common']})
+
+    assert decode_tags(df['tags']) == [[], ['tag1', 'common'], ['tag2', 'common'], ['common'], ['last']]
+
+
+def test_set_tags_uses_the_index_label():
+    df = library().set_axis([10, 11, 12, 13, 14])
+    set_tags(df, 13, ['x'])
+
+    assert decode_tags(df['tags'])[3] == ['x']
+
+
+def test_apply_changes_updates_tags_of_every_row():
+    df = library()
+    rows = df.to_dict('records')
+    changes = [make_change('update', row['url'], dict(row, tags=[f'edited{i}'])) for i, row in enumerate(rows[:3])]
+    changes.append(make_change('add', 'https://example.com/new', make_row(99, 'https://example.com/new', tags=['fresh'])))
+
+    result = apply_changes(df, changes)
+
+    assert decode_tags(result['tags']) == [
+        ['edited0'], ['edited1'], ['edited2'], ['tag3', 'common'], ['tag4', 'common'], ['fresh']
+    ]
+    assert decode_tags(df['tags'])[0] == ['tag0', 'common']  # the caller's frame is not changed
+
+
+def test_save_links_batches_tag_updates_with_new_links():
+    df = library(3)
+    entries = [
+        {'url': 'https://example.com/1', 'title': "One", 'tags': ['updated']},
+        {'url': 'https://example.com/new', 'title': "New", 'tags': ['fresh']},
+        {'url': 'https://example.com/1', 'title': "One again", 'tags': ['twice']},
+    ]
+
+    result, saved = save_links(df, entries)
+
+    assert [action for _, action in saved] == ['updated', 'saved', 'updated']
+    assert result['title'].tolist() == ["Title", "One again", "Title", "New"]
+    assert decode_tags(result['tags']) == [['tag0', 'common'], ['twice'], ['tag2', 'common'], ['fresh']]
+    assert isinstance(result, pd.DataFrame) and result['tags'].dtype == TAGS_DTYPE
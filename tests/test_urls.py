@@ -0,0 +1,37 @@
+"""Tests for URL normalization in the metadata cache and URL keys in the library."""
+from conftest import frame, make_row
+from utils.data_manager import apply_changes, make_change
+from utils.link_store import LinkStore
+from utils.metadata_cache import normalize_url
+from utils.search_index import UrlIndex
+
+
+def test_normalize_url_drops_what_does_not_change_the_page():
+    assert normalize_url(' HTTPS://Example.COM:443/a?b=2&utm_source=x&a=1&fbclid=y#top ') == 'https://example.com/a?a=1&b=2'
+    assert normalize_url('http://example.com') == 'http://example.com/'
+    assert normalize_url('http://example.com:8080/') == 'http://example.com:8080/'
+
+
+def test_library_keeps_fragments_and_query_variants_apart():
+    store = LinkStore(frame(make_row(1, 'https://x.example/doc')))
+    assert store.upsert('https://x.example/doc#section-2', 'Section 2', '', []) == "saved"
+    assert store.upsert('https://x.example/doc?utm_source=mail', 'Tracked', '', []) == "saved"
+    assert store.upsert('https://x.example/doc', 'Doc', '', []) == "updated"
+
+    df = store.df
+    assert list(df['url']) == [
+        'https://x.example/doc', 'https://x.example/doc#section-2', 'https://x.example/doc?utm_source=mail',
+    ]
+    assert list(df['title']) == ['Doc', 'Section 2', 'Tracked']
+    assert list(df['id']) == [1, 2, 3]
+
+
+def test_url_index_and_change_records_agree_on_keys():
+    df = frame(make_row(1, 'https://x.example/doc'), make_row(2, 'https://x.example/doc#part'))
+    urls = UrlIndex.from_frame(df)
+    assert urls.lookup('https://x.example/doc#part') == 1
+    assert urls.lookup('https://X.example/doc') is None
+
+    change = make_change('update', 'https://x.example/doc#part', {'title': 'Part'})
+    merged = apply_changes(df, [change])
+    assert list(merged['title']) == ['Title', 'Part']
@@ -0,0 +1,72 @@
+"""Tests for the background write-behind queue."""
+import pytest
+
+from conftest import EXCEL_FILE, frame, make_row, reload
+from utils import data_manager, write_behind
+from utils.data_manager import make_change
+from utils.link_store import LinkStore
+
+
+@pytest.fixture
+def queue(drive, monkeypatch):
+    """An empty queue whose uploads only start on flush()."""
+    monkeypatch.setattr(write_behind, 'WRITE_BEHIND_DELAY', 3600.0)
+    with write_behind._lock:
+        write_behind._entries.clear()
+    yield write_behind
+    assert write_behind.flush(EXCEL_FILE, timeout=10.0)
+    with write_behind._lock:
+        write_behind._entries.clear()
+
+
+def save(df, queue, url, title="Title"):
+    """Save a link in df the way the UI does and queue the change; return the new frame."""
+    store = LinkStore(df)
+    store.upsert(url, title, '', ['tag'])
+    df = store.df
+    row = df[df['url'] == url].iloc[0].to_dict()
+    queue.queue_changes(df, EXCEL_FILE, [make_change('add', url, row)])
+    return df
+
+
+def test_queued_changes_are_coalesced_into_one_upload(queue):
+    df = frame()
+    for i in range(3):
+        df = save(df, queue, f"https://example.com/{i}")
+    assert queue.get_status(EXCEL_FILE)['state'] == 'pending'
+    assert queue.get_status(EXCEL_FILE)['pending'] == 3
+
+    assert queue.flush(EXCEL_FILE, timeout=10.0)
+    assert queue.get_status(EXCEL_FILE)['state'] == 'synced'
+    drive = data_manager._drive_service
+    snapshot = data_manager.snapshot_name(EXCEL_FILE)
+    assert [len(meta['revisions']) for meta in drive._files.values() if meta['name'] == snapshot] == [1]
+    assert sorted(reload(drive)['url']) == [f"https://example.com/{i}" for i in range(3)]
+
+
+def test_queued_frame_is_not_changed_by_later_edits(queue):
+    df = save(frame(make_row(1, 'https://a.example/')), queue, 'https://b.example/')
+    queued = write_behind._entries[EXCEL_FILE]['df']
+
+    store = LinkStore(df)
+    store.upsert('https://a.example/', 'Edited later', '', [])
+    assert store.df.loc[0, 'title'] == 'Edited later'
+    assert queued.loc[0, 'title'] == 'Title'
+
+
+def test_failed_upload_keeps_the_changes_for_a_retry(queue, monkeypatch):
+    def offline():
+        raise ConnectionError("Drive is unreachable")
+
+    online = data_manager.get_drive_service
+    df = save(frame(), queue, 'https://a.example/')
+    monkeypatch.setattr(data_manager, 'get_drive_service', offline)
+    assert not queue.flush(EXCEL_FILE, timeout=10.0)
+    status = queue.get_status(EXCEL_FILE)
+    assert status['state'] == 'error'
+    assert status['pending'] == 1
+
+    save(df, queue, 'https://b.example/')
+    monkeypatch.setattr(data_manager, 'get_drive_service', online)
+    assert queue.flush(EXCEL_FILE, timeout=10.0)
+    assert sorted(reload(data_manager._drive_service)['url']) == ['https://a.example/', 'https://b.example/']
@@ -1,16 +1,77 @@
 import pandas as pd
 import logging
-from googleapiclient.discovery import build
-from googleapiclient.http import MediaIoBaseUpload
-from googleapiclient.http import MediaIoBaseDownload
-from io import BytesIO
+from io import BytesIO, UnsupportedOperation
+from contextlib import contextmanager
+from collections import OrderedDict
+from datetime import datetime
 import streamlit as st
 import json
+from utils.tag_codes import encode_tags, decode_tags, replace_tags, ensure_encoded
+from utils.library_version import bump_version
+from utils.metrics import span, clip
+from utils import local_mirror, sqlite_store
+import queue
+import random
+import threading
+import time
+import mmap
+import tempfile
+
+DRIVE_SCOPES = ['https://www.googleapis.com/auth/drive']
+DRIVE_POOL_SIZE = 8
+DRIVE_HTTP_TIMEOUT = 30
+FILE_ID_TTL = 600  # seconds a resolved file ID is trusted before re-listing
+XLSX_MIMETYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+CHANGE_LOG_MIMETYPE = 'application/x-ndjson'
+COMPACT_THRESHOLD = 100  # log records kept before folding them into the snapshot
+LINK_COLUMNS = ['id', 'url', 'title', 'description', 'tags', 'created_at', 'updated_at']
+TEXT_COLUMNS = ['url', 'title', 'description', 'created_at', 'updated_at']
+LIBRARY_CACHE_SIZE = 16  # parsed Drive files kept for reuse across sessions
+MAX_WRITE_ATTEMPTS = 5  # merges after concurrent writes before a save gives up
+LOCK_ATTEMPTS = 8  # tries to take a library's write lock before a save gives up
+LOCK_TTL = 120  # seconds after which a write lock left behind by a crashed writer is ignored
+WRITE_BACKOFF = 0.5  # longest random wait in seconds before the first retry, doubled for each further one
+MAX_WRITE_BACKOFF = 8.0
+UPLOAD_FIELDS = 'id,headRevisionId,modifiedTime'
+UPLOAD_CHUNK_MB = 4  # resumable upload chunk; Drive needs a multiple of 256 KiB
+DOWNLOAD_CHUNK_MB = 8
+TRANSFER_RETRIES = 5  # retries per request or chunk, with exponential backoff
+
+# Process-wide Drive client shared by every Streamlit session
+_drive_lock = threading.Lock()
+_drive_credentials = None
+_drive_service = None
+_drive_http_pool = queue.LifoQueue(maxsize=DRIVE_POOL_SIZE)
+_drive_stats = {'client_builds': 0, 'token_refreshes': 0, 'reused_calls': 0}
+
+# (folder_id, file_name) -> (file_id, expires_at)
+_file_id_cache = {}
+_file_id_lock = threading.Lock()
+
+# Drive file ID -> (revision, parsed contents), least recently used first; see _load_cached()
+_library_cache = OrderedDict()
+_library_cache_lock = threading.Lock()
+_library_cache_stats = {'hits': 0, 'misses': 0}
+_write_stats = {'writes': 0, 'conflicts': 0}
+
+# 'upload' / 'download' -> transfer counters, see get_transfer_stats()
+_transfer_stats = {direction: {'transfers': 0, 'bytes': 0, 'seconds': 0.0} for direction in ('upload', 'download')}
+_transfer_lock = threading.Lock()
+
 
 def init_data(mode, username=None):
     """
     Initialize or load Excel file from Google Drive based on mode.
     
+    Libraries are served from the local mirror when one exists, without
+    waiting for Drive; a background thread then reconciles the mirror with
+    Drive (see sync_mirror()). Only the first load on a machine, or with
+    LOCAL_MIRROR = false in secrets, reads Drive directly.
+    
+    With STORAGE_ENGINE = "sqlite" in secrets the library lives in a local
+    SQLite database instead (see utils.sqlite_store), which is seeded from
+    Drive once; Drive then only holds backups of it.
+    
     Args:
         mode (str): 'owner', 'guest', or 'public'
         username (str, optional): Username for guest mode
@@ -27,37 +88,134 @@ def init_data(mode, username=None):
     else:
         return pd.DataFrame(), None  # Public mode uses session state
     
+    if sqlite_store.enabled():
+        try:
+            df = sqlite_store.load(excel_file)
+        except Exception as e:
+            logging.warning(f"Ignoring unreadable database of {excel_file}: {str(e)}")
+            df = None
+        if df is not None:
+            logging.info(f"Loaded {excel_file} from the local database")
+            return bump_version(df), excel_file
+    
+    mirrored = _mirror_enabled()
+    if mirrored:
+        df = local_mirror.load(excel_file)
+        if df is not None:
+            local_mirror.watch(excel_file)
+            logging.info(f"Loaded {excel_file} from the local mirror")
+            return bump_version(df), excel_file
+    
     try:
-        # Check if file exists in Google Drive
         service = get_drive_service()
-        file_id = find_file_in_drive(service, excel_file)
-        
-        if file_id:
-            # Download and load file
-            df = download_file_from_drive(service, file_id)
-            if 'tags' in df.columns:
-                df['tags'] = df['tags'].apply(lambda x: x.split(',') if isinstance(x, str) else [] if pd.isna(x) else x)
-            for col in ['title', 'url', 'description']:
-                if col in df.columns:
-                    df[col] = df[col].astype(str).replace('nan', '')
-            logging.info(f"Loaded {excel_file} from Google Drive")
-        else:
-            # Create new DataFrame
-            df = pd.DataFrame(columns=[
-                'id', 'url', 'title', 'description', 'tags', 
-                'created_at', 'updated_at'
-            ])
-            logging.info(f"Created new {excel_file}")
-        return df, excel_file
+        with span('load.library', file=excel_file):
+            drive_stamp = _drive_stamp(service, excel_file) if mirrored else None
+            df = _load_library(service, excel_file)
+        if mirrored and local_mirror.save(excel_file, df, drive_stamp):
+            local_mirror.watch(excel_file, synced=True)
+        if sqlite_store.enabled():
+            sqlite_store.replace(excel_file, df)
+            df = sqlite_store.load(excel_file)
+        return bump_version(df), excel_file
     except Exception as e:
         st.error(f"Failed to initialize {excel_file}: {str(e)}")
         logging.error(f"Data initialization failed: {str(e)}")
         return pd.DataFrame(), excel_file
 
+def sync_mirror(excel_file):
+    """
+    Reconcile the local mirror of a library with Google Drive.
+    
+    The modifiedTime of the snapshot, legacy workbook and change log are
+    compared with those the mirror was written from; only if one differs is
+    the library loaded (from the process library cache when this process
+    wrote it) and the mirror replaced.
+    
+    Args:
+        excel_file (str): Name of the Excel file
+    
+    Returns:
+        bool: True if the mirror was replaced with a newer library
+    """
+    service = get_drive_service()
+    with span('mirror.sync', file=excel_file):
+        drive_stamp = _drive_stamp(service, excel_file)
+        if drive_stamp == local_mirror.stamp(excel_file):
+            return False
+        df = _load_library(service, excel_file)
+        local_mirror.save(excel_file, df, drive_stamp)
+    logging.info(f"Refreshed the local mirror of {excel_file}")
+    return True
+
+def _load_library(service, excel_file):
+    """Load a library from Drive: its snapshot, or legacy workbook, with the change log replayed."""
+    # Check if a snapshot exists in Google Drive, falling back to a legacy workbook
+    fmt = _snapshot_format()
+    df = _download_by_name(
+        service, snapshot_name(excel_file, fmt),
+        lambda service, file_id: download_file_from_drive(service, file_id, fmt)
+    )
+    if df is None and fmt != 'xlsx':
+        df = _download_by_name(service, excel_file, download_file_from_drive)
+    
+    if df is not None:
+        logging.info(f"Loaded {excel_file} from Google Drive")
+    else:
+        # Create new DataFrame
+        df = ensure_encoded(pd.DataFrame(columns=LINK_COLUMNS))
+        logging.info(f"Created new {excel_file}")
+    
+    # Replay changes recorded since the last compaction
+    changes = _load_change_log(service, excel_file)
+    if changes:
+        df = apply_changes(df, changes)
+        logging.info(f"Replayed {len(changes)} change(s) onto {excel_file}")
+    return df
+
+def _drive_stamp(service, excel_file):
+    """Return {file name: modifiedTime} for the Drive files a library is loaded from."""
+    fmt = _snapshot_format()
+    names = [snapshot_name(excel_file, fmt), _change_log_name(excel_file)]
+    if fmt != 'xlsx':
+        names.append(excel_file)
+    stamp = {}
+    for name in names:
+        modified = _modified_time(service, name)
+        if modified:
+            stamp[name] = modified
+    return stamp
+
+def _modified_time(service, file_name):
+    """Return the modifiedTime of file_name in Drive, or None if it does not exist."""
+    for attempt in range(2):
+        file_id = find_file_in_drive(service, file_name)
+        if not file_id:
+            return None
+        try:
+            with span('drive.metadata', file_id=file_id):
+                return service.files().get(fileId=file_id, fields='modifiedTime').execute().get('modifiedTime')
+        except Exception as e:
+            if not _is_not_found(e) or attempt:
+                raise
+            invalidate_file_id(file_name)
+
+def _mirror_enabled():
+    """Return True if libraries are read through the local mirror; the SQLite engine replaces it."""
+    return local_mirror.enabled() and not sqlite_store.enabled()
+
+def _mirror_written(excel_file):
+    """Refresh the local mirror after this process wrote a library to Drive."""
+    if _mirror_enabled():
+        local_mirror.request_sync(excel_file, adopt=False)
+
 def save_data(df, excel_file):
     """
     Save DataFrame to Google Drive.
     
+    The snapshot is written in SNAPSHOT_FORMAT (Parquet by default) under
+    snapshot_name(excel_file); XLSX is only produced for exports. With the
+    SQLite engine the local database is replaced first.
+    
     Args:
         df (DataFrame): DataFrame to save
         excel_file (str): Name of the Excel file
@@ -65,74 +223,920 @@ def save_data(df, excel_file):
     Returns:
         bool: True if save successful, False otherwise
     """
+    if sqlite_store.enabled():
+        try:
+            sqlite_store.replace(excel_file, df)
+        except Exception as e:
+            st.error(f"Error saving data to the local database: {str(e)}")
+            logging.error(f"Database save failed: {str(e)}")
+            return False
+    return _upload_snapshot(df, excel_file)
+
+def backup_library(excel_file):
+    """
+    Upload a snapshot of a library's local SQLite database to Google Drive.
+    
+    Args:
+        excel_file (str): Name of the Excel file
+    
+    Returns:
+        bool: True if the backup was uploaded, False otherwise
+    """
+    try:
+        df = sqlite_store.load(excel_file)
+    except Exception as e:
+        logging.error(f"Reading the local database for a backup failed: {str(e)}")
+        return False
+    return df is None or _upload_snapshot(df, excel_file)
+
+def _upload_snapshot(df, excel_file):
+    """Serialize a library in SNAPSHOT_FORMAT and upload it to Drive; see save_data()."""
     try:
-        logging.debug(f"Saving DataFrame to {excel_file}: {df.to_dict()}")
-        df_to_save = df.copy()
-        if 'tags' in df_to_save.columns:
-            df_to_save['tags'] = df_to_save['tags'].apply(lambda x: ','.join(map(str, x)) if isinstance(x, list) else '')
+        logging.debug(f"Saving {clip(df)} to {excel_file}")
+        with span('save.snapshot', file=excel_file):
+            fmt = _snapshot_format()
+            output = BytesIO(serialize_links(df, fmt))
+            
+            # Upload to Google Drive
+            service = get_drive_service()
+            _upload_by_name(service, snapshot_name(excel_file, fmt), output, SERIALIZERS[fmt]['mimetype'])
+        _mirror_written(excel_file)
         
-        # Save to BytesIO
-        output = BytesIO()
-        df_to_save.to_excel(output, index=False, engine='openpyxl')
-        output.seek(0)
+        return True
+    except Exception as e:
+        st.error(f"Error saving data to Google Drive: {str(e)}")
+        logging.error(f"Data save failed: {str(e)}")
+        return False
+
+def serialize_links(df, fmt):
+    """
+    Serialize a links DataFrame.
+    
+    Args:
+        df (DataFrame): Links to serialize
+        fmt (str): Key of SERIALIZERS, e.g. 'parquet', 'feather' or 'xlsx'
+    
+    Returns:
+        bytes: Serialized file contents
+    """
+    with span(f'serialize.{fmt}', rows=len(df)):
+        return SERIALIZERS[fmt]['dump'](df)
+
+def deserialize_links(data, fmt):
+    """
+    Load a links DataFrame with encoded tags and text columns as str.
+    
+    Args:
+        data (bytes or file-like): Serialized file contents
+        fmt (str): Key of SERIALIZERS
+    
+    Returns:
+        DataFrame: Loaded links
+    """
+    if isinstance(data, bytes):
+        data = BytesIO(data)
+    with span(f'parse.{fmt}'):
+        return SERIALIZERS[fmt]['load'](data)
+
+def snapshot_name(excel_file, fmt=None):
+    """
+    Return the Drive file name of the snapshot for a library.
+    
+    Args:
+        excel_file (str): Library file name, e.g. 'web_links.xlsx'
+        fmt (str, optional): Snapshot format, defaults to SNAPSHOT_FORMAT
+    
+    Returns:
+        str: File name with the format's extension
+    """
+    fmt = fmt or _snapshot_format()
+    return f"{excel_file.rsplit('.', 1)[0]}.{SERIALIZERS[fmt]['extension']}"
+
+def _snapshot_format():
+    """Return the configured snapshot format, 'parquet' unless SNAPSHOT_FORMAT is set in secrets."""
+    try:
+        fmt = st.secrets.get("SNAPSHOT_FORMAT", "parquet")
+    except FileNotFoundError:
+        fmt = "parquet"
+    return fmt if fmt in SERIALIZERS else "parquet"
+
+def _normalize_links(df):
+    """Coerce loaded text columns to str and tags to the encoded tags column."""
+    for col in TEXT_COLUMNS:
+        if col in df.columns:
+            df[col] = df[col].fillna('').astype(str).replace('nan', '')
+    if 'tags' in df.columns:
+        df['tags'] = encode_tags(df['tags'])
+    return df
+
+def _dump_xlsx(df):
+    """Write links as XLSX with tags flattened to comma-separated strings."""
+    df_to_save = df.copy()
+    if 'tags' in df_to_save.columns:
+        df_to_save['tags'] = [','.join(tags) for tags in decode_tags(df_to_save['tags'])]
+    output = BytesIO()
+    df_to_save.to_excel(output, index=False, engine='openpyxl')
+    return output.getvalue()
+
+def _load_xlsx(data):
+    """Read an XLSX workbook and split comma-separated tags back into lists."""
+    df = pd.read_excel(data, engine='openpyxl')
+    return _normalize_links(df)  # encode_tags splits the comma-separated tags
+
+def _to_arrow(df):
+    """Build an Arrow table with tags as a native list<string> column."""
+    import pyarrow as pa
+    df = _normalize_links(df.copy())  # no-op for tags that are already encoded
+    if 'id' in df.columns:
+        df['id'] = pd.to_numeric(df['id'], errors='coerce').astype('Int64')
+    table = pa.Table.from_pandas(df.drop(columns=['tags'], errors='ignore'), preserve_index=False)
+    if 'tags' in df.columns:
+        tags = pa.array(df['tags']).cast(pa.list_(pa.string()))
+        table = table.add_column(list(df.columns).index('tags'), 'tags', tags)
+    return table
+
+def _from_arrow(table):
+    """Convert an Arrow table back to a links DataFrame with encoded tags."""
+    if 'tags' not in table.column_names:
+        return table.to_pandas()
+    df = table.drop(['tags']).to_pandas()
+    df.insert(table.column_names.index('tags'), 'tags', encode_tags(table.column('tags'), index=df.index))
+    return df  # _to_arrow already normalized the columns on write
+
+def _dump_parquet(df):
+    """Write links as a zstd-compressed Parquet file."""
+    import pyarrow.parquet as pq
+    output = BytesIO()
+    pq.write_table(_to_arrow(df), output, compression='zstd')
+    return output.getvalue()
+
+def _load_parquet(data):
+    """Read links from a Parquet file."""
+    import pyarrow.parquet as pq
+    return _from_arrow(pq.read_table(_arrow_source(data)))
+
+def _dump_feather(df):
+    """Write links as a zstd-compressed Feather (Arrow IPC) file."""
+    import pyarrow.feather as feather
+    output = BytesIO()
+    feather.write_feather(_to_arrow(df), output, compression='zstd')
+    return output.getvalue()
+
+def _load_feather(data):
+    """Read links from a Feather file."""
+    import pyarrow.feather as feather
+    return _from_arrow(feather.read_table(_arrow_source(data)))
+
+def _arrow_source(data):
+    """Memory-map a downloaded temporary file for Arrow; other inputs are returned unchanged."""
+    import pyarrow as pa
+    try:
+        mapped = mmap.mmap(data.fileno(), 0, access=mmap.ACCESS_READ)
+    except (AttributeError, UnsupportedOperation, ValueError, OSError):
+        return data  # BytesIO, or an empty file that cannot be mapped
+    return pa.BufferReader(pa.py_buffer(mapped))
+
+# Snapshot formats: file extension, Drive MIME type and dump/load functions
+SERIALIZERS = {
+    'parquet': {
+        'extension': 'parquet',
+        'mimetype': 'application/vnd.apache.parquet',
+        'dump': _dump_parquet,
+        'load': _load_parquet,
+    },
+    'feather': {
+        'extension': 'feather',
+        'mimetype': 'application/vnd.apache.arrow.file',
+        'dump': _dump_feather,
+        'load': _load_feather,
+    },
+    'xlsx': {
+        'extension': 'xlsx',
+        'mimetype': XLSX_MIMETYPE,
+        'dump': _dump_xlsx,
+        'load': _load_xlsx,
+    },
+}
+
+def record_changes(df, excel_file, changes):
+    """
+    Persist a batch of link changes for a Drive-backed library.
+    
+    Several owners may edit the same library at once, so the changes are
+    applied row by row on top of whatever revision is current in Drive
+    rather than uploading this session's copy; see _write_checked().
+    
+    With STORAGE_MODE = "changelog" in secrets, the changes are appended to a
+    small JSON-lines log next to the workbook instead of re-uploading the whole
+    library. Once the log reaches COMPACT_THRESHOLD records it is folded into
+    the snapshot. In the default "snapshot" mode the snapshot is rewritten,
+    folding in any log left over from changelog mode.
+    
+    With STORAGE_ENGINE = "sqlite" the changes go to the local database only;
+    Drive receives backup_library() snapshots from write_behind.
+    
+    Args:
+        df (DataFrame): Library after the changes were applied, used when no snapshot exists yet
+        excel_file (str): Name of the Excel file
+        changes (list): Change records from make_change()
+    
+    Returns:
+        bool: True if persisted successfully, False otherwise
+    """
+    try:
+        if sqlite_store.enabled():
+            sqlite_store.record(excel_file, changes, df)
+            logging.info(f"Saved {len(changes)} change(s) to the local database of {excel_file}")
+            return True
+        service = get_drive_service()
+        if _storage_mode() != "changelog":
+            fmt = _snapshot_format()
+            with span('save.changes', file=excel_file, changes=len(changes)):
+                # Loads replay the log, so it must not outlive a snapshot written after it
+                folded = _load_change_log(service, excel_file)
+                _write_checked(
+                    service, snapshot_name(excel_file, fmt), SERIALIZERS[fmt],
+                    lambda base: apply_changes(base, folded + list(changes)), initial=df
+                )
+            logging.info(f"Saved {len(changes)} change(s) to {excel_file}")
+            _mirror_written(excel_file)
+            _truncate_change_log(service, excel_file, folded)
+            return True
         
-        # Upload to Google Drive
+        log_name = _change_log_name(excel_file)
+        with span('save.changes', file=log_name, changes=len(changes)):
+            log = _write_checked(
+                service, log_name, CHANGE_LOG_CODEC,
+                lambda records: records + list(changes), initial=[]
+            )
+        logging.info(f"Appended {len(changes)} change(s) to {log_name}")
+        _mirror_written(excel_file)
+    except Exception as e:
+        st.error(f"Error saving changes: {str(e)}")
+        logging.error(f"Saving changes failed: {str(e)}")
+        return False
+    if len(log) >= COMPACT_THRESHOLD:
+        return compact_changes(df, excel_file)
+    return True
+
+def compact_changes(df, excel_file):
+    """
+    Fold the change log into the snapshot and drop the folded records from the log.
+    
+    Replaying a log over a snapshot that already contains it is idempotent,
+    so a failure between the two uploads never loses or duplicates links.
+    Records appended by other writers in the meantime stay in the log.
+    
+    Args:
+        df (DataFrame): Current library, used when no snapshot exists yet
+        excel_file (str): Name of the Excel file
+    
+    Returns:
+        bool: True if the snapshot was saved, False otherwise
+    """
+    try:
         service = get_drive_service()
-        file_id = find_file_in_drive(service, excel_file)
+        folded = _load_change_log(service, excel_file)
+        fmt = _snapshot_format()
+        _write_checked(
+            service, snapshot_name(excel_file, fmt), SERIALIZERS[fmt],
+            lambda base: apply_changes(base, folded), initial=df
+        )
+    except Exception as e:
+        st.error(f"Error saving data to Google Drive: {str(e)}")
+        logging.error(f"Compaction failed: {str(e)}")
+        return False
+    _truncate_change_log(service, excel_file, folded)
+    return True
+
+def _truncate_change_log(service, excel_file, folded):
+    """Drop change records that were folded into the snapshot from the log, keeping newer ones."""
+    if not folded:
+        return
+    log_name = _change_log_name(excel_file)
+    done = {_change_key(change) for change in folded}
+    try:
+        _write_checked(
+            service, log_name, CHANGE_LOG_CODEC,
+            lambda records: [change for change in records if _change_key(change) not in done],
+            initial=[]
+        )
+        logging.info(f"Compacted {len(folded)} change(s) from {log_name} into {excel_file}")
+    except Exception as e:
+        logging.error(f"Change log truncation failed: {str(e)}")
+
+def make_change(op, url, row=None):
+    """
+    Build a change record for record_changes().
+    
+    Args:
+        op (str): 'add', 'update' or 'delete'
+        url (str): URL of the link
+        row (dict, optional): Full link row for 'add' and 'update'
+    
+    Returns:
+        dict: Change record
+    """
+    change = {'op': op, 'url': url, 'ts': time.time()}
+    if op != 'delete':
+        change['row'] = {k: _to_json_value(v) for k, v in (row or {}).items()}
+    return change
+
+def apply_changes(df, changes):
+    """
+    Replay change records onto a DataFrame.
+    
+    Only the last change per URL matters. Updated links keep their position,
+    deleted links are dropped and new links are appended in log order.
+    
+    Args:
+        df (DataFrame): Snapshot to replay onto
+        changes (list): Change records, oldest first
+    
+    Returns:
+        DataFrame: Updated DataFrame
+    """
+    final = {}
+    for change in changes:
+        final[change['url']] = None if change['op'] == 'delete' else change.get('row', {})
+    
+    df = df.reset_index(drop=True)
+    positions = dict(zip(df['url'], df.index)) if 'url' in df.columns else {}
+    dropped = []
+    appended = []
+    tags = {}  # re-encoding the column once for all rows is far cheaper than per row
+    for url, row in final.items():
+        pos = positions.get(url)
+        if row is None:
+            if pos is not None:
+                dropped.append(pos)
+        elif pos is not None:
+            for col, value in row.items():
+                if col == 'tags':
+                    tags[pos] = value
+                elif col in df.columns:
+                    df.at[pos, col] = value
+        else:
+            appended.append(row)
+    
+    replace_tags(df, tags)
+    if dropped:
+        df = df.drop(index=dropped)
+    if appended:
+        new_rows = _renumber_ids(ensure_encoded(pd.DataFrame(appended)), df)
+        df = pd.concat([df, new_rows], ignore_index=True)
+    return ensure_encoded(df.reset_index(drop=True))
+
+def _renumber_ids(new_rows, df):
+    """Give appended links fresh IDs where two writers picked the same next ID."""
+    if 'id' not in new_rows.columns:
+        return new_rows
+    taken = pd.to_numeric(df['id'], errors='coerce').dropna() if 'id' in df.columns else pd.Series(dtype=float)
+    ids = pd.to_numeric(new_rows['id'], errors='coerce')
+    clash = (ids.isin(taken) | ids.duplicated()).to_numpy()
+    if clash.any():
+        start = int(max(taken.max() if len(taken) else 0, ids.max() if ids.notna().any() else 0)) + 1
+        new_rows.loc[clash, 'id'] = range(start, start + int(clash.sum()))
+    return new_rows
+
+def _storage_mode():
+    """Return the configured storage mode: 'snapshot' (default) or 'changelog'."""
+    try:
+        return st.secrets.get("STORAGE_MODE", "snapshot")
+    except FileNotFoundError:
+        return "snapshot"
+
+def _change_log_name(excel_file):
+    """Return the Drive file name of the change log that belongs to excel_file."""
+    return f"{excel_file.rsplit('.', 1)[0]}.changes.jsonl"
+
+def _to_json_value(value):
+    """Convert numpy scalars and other non-JSON values for the change log."""
+    if isinstance(value, list):
+        return [str(v) for v in value]
+    if hasattr(value, 'item'):
+        return value.item()
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return value
+    return str(value)
+
+def _encode_changes(changes):
+    """Serialize change records as JSON lines."""
+    return ''.join(json.dumps(change) + '\n' for change in changes).encode('utf-8')
+
+def _decode_changes(data):
+    """Parse a JSON-lines change log."""
+    return [json.loads(line) for line in data.read().decode('utf-8').splitlines() if line.strip()]
+
+def _change_key(change):
+    """Identify a change record across downloads of the log."""
+    return change['ts'], change['op'], change['url']
+
+CHANGE_LOG_CODEC = {
+    'mimetype': CHANGE_LOG_MIMETYPE,
+    'dump': _encode_changes,
+    'load': _decode_changes,
+}
+
+def _load_change_log(service, excel_file):
+    """Return the change records logged for excel_file."""
+    log_name = _change_log_name(excel_file)
+    changes = _download_by_name(service, log_name, _codec_loader(CHANGE_LOG_CODEC))
+    return changes or []
+
+def _download_by_name(service, file_name, loader):
+    """
+    Resolve file_name in Drive and load it, retrying once if the cached ID is stale.
+    
+    Parsed files are shared through the process-wide library cache, so the
+    file is only downloaded when its Drive revision changed.
+    
+    Args:
+        service: Google Drive API service
+        file_name (str): Name of the file in the configured folder
+        loader (callable): loader(service, file_id) returning the parsed file
+    
+    Returns:
+        Result of loader, or None if the file does not exist
+    """
+    file_id = find_file_in_drive(service, file_name)
+    if not file_id:
+        return None
+    try:
+        return _load_cached(service, file_id, loader)
+    except Exception as e:
+        if not _is_not_found(e):
+            raise
+        invalidate_file_id(file_name)
+        file_id = find_file_in_drive(service, file_name)
+        return _load_cached(service, file_id, loader) if file_id else None
+
+def _load_cached(service, file_id, loader):
+    """
+    Load a Drive file through the library cache.
+    
+    A metadata-only files().get() decides whether the cached copy is still
+    the current revision; only on a miss is the file downloaded and parsed.
+    
+    Args:
+        service: Google Drive API service
+        file_id (str): ID of the file
+        loader (callable): loader(service, file_id) returning the parsed file
+    
+    Returns:
+        Parsed file, shared with other sessions until written to
+    """
+    return _load_head(service, file_id, loader)[1]
+
+def _load_head(service, file_id, loader):
+    """Return (head revision, parsed contents) of a Drive file; see _load_cached()."""
+    with span('drive.metadata', file_id=file_id):
+        meta = service.files().get(fileId=file_id, fields='headRevisionId,modifiedTime').execute()
+    revision = _revision_of(meta)
+    with _library_cache_lock:
+        cached = _library_cache.get(file_id)
+        if cached is not None and revision and cached[0] == revision:
+            _library_cache.move_to_end(file_id)
+            _library_cache_stats['hits'] += 1
+            logging.debug(f"Library cache hit for {file_id} at revision {revision}")
+            return revision, _share(cached[1])
+        _library_cache_stats['misses'] += 1
+    
+    value = loader(service, file_id)
+    if value is not None:
+        _remember_revision(file_id, revision, value)
+    return revision, _share(value)
+
+def _remember_revision(file_id, revision, value):
+    """Store the parsed contents of a file revision in the library cache."""
+    if not revision:
+        return
+    with _library_cache_lock:
+        _library_cache[file_id] = (revision, value)
+        _library_cache.move_to_end(file_id)
+        while len(_library_cache) > LIBRARY_CACHE_SIZE:
+            _library_cache.popitem(last=False)
+
+def _revision_of(meta):
+    """Return the revision identifier from files() metadata."""
+    return meta.get('headRevisionId') or meta.get('modifiedTime')
+
+def _codec_loader(codec):
+    """Return a loader(service, file_id) that downloads a file and parses it with codec."""
+    return lambda service, file_id: _load_file(service, file_id, codec['load'])
+
+def _write_checked(service, file_name, codec, merge, initial):
+    """
+    Write merge(current contents) to a Drive file without losing concurrent writes.
+    
+    Writers of the same file take turns through _write_lock(). Drive v3 has
+    no conditional update, so the write is also checked afterwards, for
+    writers that bypassed the lock: if the revision just before ours is not
+    the one we merged onto, another writer got in between and was
+    overwritten. Their revision is downloaded, our changes are merged onto
+    it and the file is written again after a random wait.
+    
+    If the file does not exist yet, two writers may each create one; see
+    _create_file(). The writer whose file lost merges into the other one.
+    
+    Args:
+        service: Google Drive API service
+        file_name (str): Name of the file in the configured folder
+        codec (dict): mimetype, dump(value) -> bytes and load(file) -> value,
+            e.g. an entry of SERIALIZERS or CHANGE_LOG_CODEC
+        merge (callable): Returns the new contents given the current ones
+        initial: Current contents to assume when the file does not exist yet
+    
+    Returns:
+        The contents that were written
+    """
+    with _write_lock(service, file_name):
+        return _merge_and_write(service, file_name, codec, merge, initial)
+
+def _merge_and_write(service, file_name, codec, merge, initial):
+    """Write merge(current contents) to file_name, re-merging after conflicts; see _write_checked()."""
+    file_id = find_file_in_drive(service, file_name)
+    if not file_id:
+        value = merge(initial)
+        meta, file_id = _create_file(service, file_name, BytesIO(codec['dump'](value)), codec['mimetype'])
+        if file_id == meta['id']:
+            _remember_revision(file_id, _revision_of(meta), value)
+            return value
+        with _library_cache_lock:
+            _write_stats['conflicts'] += 1
+        logging.warning(f"{file_name} was also created by another writer; merging into theirs")
+    
+    base_revision, base = _load_head(service, file_id, _codec_loader(codec))
+    for attempt in range(1, MAX_WRITE_ATTEMPTS + 1):
+        if attempt > 1:
+            time.sleep(_write_backoff(attempt - 1))
+        value = merge(base)
+        meta = _upload_to_drive(service, file_name, BytesIO(codec['dump'](value)), codec['mimetype'], file_id)
+        revision = _revision_of(meta)
+        with _library_cache_lock:
+            _write_stats['writes'] += 1
+        other = _revision_before(service, file_id, meta.get('headRevisionId'))
+        if other is None or other == base_revision:
+            _remember_revision(file_id, revision, value)
+            return value
         
-        folder_id = st.secrets["GOOGLE_DRIVE_FOLDER_ID"]
+        with _library_cache_lock:
+            _write_stats['conflicts'] += 1
+        logging.warning(f"{file_name} was changed by another writer (revision {other}); merging, attempt {attempt}")
+        base_revision, base = revision, _load_file(service, file_id, codec['load'], other)
+    raise RuntimeError(f"{file_name} kept changing; gave up after {MAX_WRITE_ATTEMPTS} attempts")
+
+@contextmanager
+def _write_lock(service, file_name):
+    """
+    Hold the Drive write lock of file_name for the duration of a checked write.
+    
+    The check in _write_checked() alone does not converge once three or more
+    writers collide: each one re-merges onto a revision another one has just
+    overwritten. Writers therefore take turns. A lock is a file named
+    "<file_name>.lock"; like in _create_file(), every writer creates one and
+    the oldest lock younger than LOCK_TTL wins. The others delete theirs and
+    try again after a random, exponentially growing wait. Locks are deleted
+    rather than trashed so they do not pile up in the Drive trash.
+    
+    Args:
+        service: Google Drive API service
+        file_name (str): Name of the file in the configured folder
+    
+    Raises:
+        RuntimeError: If the lock could not be taken in LOCK_ATTEMPTS tries
+    """
+    lock_name = f"{file_name}.lock"
+    for attempt in range(1, LOCK_ATTEMPTS + 1):
+        with span('drive.lock', file=file_name):
+            lock_id = service.files().create(
+                body={'name': lock_name, 'parents': [st.secrets["GOOGLE_DRIVE_FOLDER_ID"]], 'mimeType': 'text/plain'},
+                fields='id'
+            ).execute()['id']
+            locks = _list_files(service, lock_name)
+        created = next((_parse_time(item) for item in locks if item['id'] == lock_id), None)
+        expired = [item for item in locks if created and (created - _parse_time(item)).total_seconds() > LOCK_TTL]
+        live = [item for item in locks if item not in expired]
+        if not live or live[0]['id'] == lock_id:
+            for item in expired:
+                logging.warning(f"Removing the stale write lock {item['id']} of {file_name}")
+                _delete_file(service, lock_name, item['id'])
+            try:
+                yield
+            finally:
+                _delete_file(service, lock_name, lock_id)
+            return
         
-        if file_id:
-            # Update existing file
-            media = MediaIoBaseUpload(output, mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet')
-            service.files().update(
+        _delete_file(service, lock_name, lock_id)
+        delay = _write_backoff(attempt)
+        logging.debug(f"{file_name} is locked by another writer; retrying in {delay:.1f} s")
+        time.sleep(delay)
+    raise RuntimeError(f"{file_name} stayed locked by another writer; gave up after {LOCK_ATTEMPTS} attempts")
+
+def _write_backoff(attempt):
+    """Return a random wait before retry number attempt, with an exponentially growing upper bound."""
+    return random.uniform(0, min(MAX_WRITE_BACKOFF, WRITE_BACKOFF * 2 ** (attempt - 1)))
+
+def _parse_time(item):
+    """Return the createdTime of a files().list() item as a datetime."""
+    return datetime.fromisoformat(item['createdTime'].replace('Z', '+00:00'))
+
+def _delete_file(service, file_name, file_id):
+    """Delete a Drive file for good, skipping the trash, logging instead of raising on failure."""
+    try:
+        with span('drive.delete', file=file_name):
+            service.files().delete(fileId=file_id).execute()
+    except Exception as e:
+        logging.warning(f"Could not delete {file_name} {file_id}: {str(e)}")
+
+def _revision_before(service, file_id, revision):
+    """Return the ID of the revision preceding revision, or None if it is unknown."""
+    if not revision:
+        return None
+    revisions = []
+    page_token = None
+    while True:
+        with span('drive.revisions', file_id=file_id):
+            response = service.revisions().list(
                 fileId=file_id,
-                media_body=media
+                fields='nextPageToken,revisions(id)',
+                pageSize=1000,
+                pageToken=page_token
             ).execute()
-            logging.info(f"Updated {excel_file} in Google Drive")
-        else:
-            # Create new file
-            file_metadata = {
-                'name': excel_file,
-                'parents': [folder_id],
-                'mimeType': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
-            }
-            media = MediaIoBaseUpload(output, mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet')
-            service.files().create(
-                body=file_metadata,
-                media_body=media
-            ).execute()
-            logging.info(f"Created {excel_file} in Google Drive")
-        
-        return True
-    except Exception as e:
-        st.error(f"Error saving data to Google Drive: {str(e)}")
-        logging.error(f"Data save failed: {str(e)}")
-        return False
+        revisions.extend(item['id'] for item in response.get('revisions', []))
+        page_token = response.get('nextPageToken')
+        if not page_token:
+            break
+    if revision not in revisions:
+        logging.warning(f"Revision {revision} of {file_id} not listed; skipping conflict check")
+        return None
+    position = revisions.index(revision)
+    return revisions[position - 1] if position else None
+
+def get_write_stats():
+    """
+    Return counters for revision-checked writes.
+    
+    Returns:
+        dict: writes (uploads) and conflicts (concurrent writes that were merged)
+    """
+    with _library_cache_lock:
+        return dict(_write_stats)
+
+def _share(value):
+    """Return a session's view of a cached value; writers copy a shared frame before editing it in place, see LinkStore."""
+    if isinstance(value, pd.DataFrame):
+        return value.copy(deep=False)
+    return value
+
+def get_library_cache_stats():
+    """
+    Return counters for the cross-session library cache.
+    
+    Returns:
+        dict: hits (served without download), misses (downloaded) and entries
+    """
+    with _library_cache_lock:
+        return dict(_library_cache_stats, entries=len(_library_cache))
+
+def _upload_by_name(service, file_name, output, mimetype):
+    """
+    Upload output as file_name, creating the file if needed and retrying once if the cached ID is stale.
+    
+    Args:
+        service: Google Drive API service
+        file_name (str): Name of the file in the configured folder
+        output (BytesIO): File contents positioned at the start
+        mimetype (str): MIME type of the contents
+    
+    Returns:
+        dict: id, headRevisionId and modifiedTime of the uploaded file
+    """
+    file_id = find_file_in_drive(service, file_name)
+    if file_id:
+        try:
+            return _upload_to_drive(service, file_name, output, mimetype, file_id)
+        except Exception as e:
+            if not _is_not_found(e):
+                raise
+            invalidate_file_id(file_name)
+            file_id = find_file_in_drive(service, file_name)
+            output.seek(0)
+            if file_id:
+                return _upload_to_drive(service, file_name, output, mimetype, file_id)
+    meta, file_id = _create_file(service, file_name, output, mimetype)
+    if file_id == meta['id']:
+        return meta
+    output.seek(0)
+    return _upload_to_drive(service, file_name, output, mimetype, file_id)
+
+def _create_file(service, file_name, output, mimetype):
+    """
+    Create file_name in Drive and settle races with writers creating it at the same time.
+    
+    Drive allows several files with the same name in a folder, so the folder is
+    listed again after the upload. Every writer and reader treats the oldest
+    file as the real one; a writer whose new file is not the oldest deletes it.
+    
+    Args:
+        service: Google Drive API service
+        file_name (str): Name of the file in the configured folder
+        output (BytesIO): File contents positioned at the start
+        mimetype (str): MIME type of the contents
+    
+    Returns:
+        tuple: (metadata of the created file, ID of the file to use); the ID
+        differs from the created file's if another writer created one first
+    """
+    meta = _upload_to_drive(service, file_name, output, mimetype)
+    files = _list_files(service, file_name)
+    file_id = files[0]['id'] if files else meta['id']
+    if file_id != meta['id']:
+        _delete_file(service, file_name, meta['id'])
+        logging.info(f"Deleted duplicate {file_name} {meta['id']}; {file_id} was created first")
+    _cache_file_id(file_name, file_id)
+    return meta, file_id
+
+def _upload_to_drive(service, file_name, output, mimetype, file_id=None):
+    """
+    Upload file contents to Google Drive, updating file_id or creating a new file.
+    
+    Args:
+        service: Google Drive API service
+        file_name (str): Name of the file in Drive
+        output (BytesIO): File contents positioned at the start
+        mimetype (str): MIME type of the contents
+        file_id (str, optional): ID of the existing file to update
+    
+    Returns:
+        dict: id, headRevisionId and modifiedTime of the uploaded file
+    """
+    output.seek(0, 2)
+    size = output.tell()
+    output.seek(0)
+    chunk_size = _chunk_size("UPLOAD_CHUNK_MB", UPLOAD_CHUNK_MB)
+    resumable = size > chunk_size
+    from googleapiclient.http import MediaIoBaseUpload
+    media = MediaIoBaseUpload(output, mimetype=mimetype, chunksize=chunk_size, resumable=resumable)
+    started = time.perf_counter()
+    if file_id:
+        request = service.files().update(
+            fileId=file_id,
+            media_body=media,
+            fields=UPLOAD_FIELDS
+        )
+        with span('drive.upload', file=file_name, bytes=size):
+            meta = _execute_upload(request, resumable)
+        logging.info(f"Updated {file_name} in Google Drive")
+    else:
+        file_metadata = {
+            'name': file_name,
+            'parents': [st.secrets["GOOGLE_DRIVE_FOLDER_ID"]],
+            'mimeType': mimetype
+        }
+        request = service.files().create(
+            body=file_metadata,
+            media_body=media,
+            fields=UPLOAD_FIELDS
+        )
+        with span('drive.upload', file=file_name, bytes=size):
+            meta = _execute_upload(request, resumable)
+        _cache_file_id(file_name, meta['id'])
+        logging.info(f"Created {file_name} in Google Drive")
+    _record_transfer('upload', size, time.perf_counter() - started)
+    return meta
+
+def _execute_upload(request, resumable):
+    """
+    Run an upload request, retrying failed requests with exponential backoff.
+    
+    Files larger than one chunk use a resumable session, so a failure only
+    resends the chunk that was in flight instead of the whole file.
+    
+    Args:
+        request (HttpRequest): files().update() or files().create() request
+        resumable (bool): Whether the media was set up as resumable
+    
+    Returns:
+        dict: Response of the upload
+    """
+    if not resumable:
+        return request.execute(num_retries=TRANSFER_RETRIES)
+    response = None
+    with _borrow_drive_http() as http:
+        while response is None:
+            status, response = request.next_chunk(http=http, num_retries=TRANSFER_RETRIES)
+            if status:
+                logging.debug(f"Uploaded {status.resumable_progress} of {status.total_size} bytes")
+    return response
 
 def get_drive_service():
     """
-    Create Google Drive API service using service account credentials.
+    Return the process-wide Google Drive API service.
+    
+    The service is built once per process from the service account credentials
+    and shared by all sessions. Requests borrow a keep-alive transport from a
+    small pool, so concurrent sessions never share an httplib2 connection.
     
     Returns:
         Google Drive API service object
     """
+    global _drive_credentials, _drive_service
     try:
-        from google.oauth2 import service_account
-        credentials = service_account.Credentials.from_service_account_info(
-            json.loads(st.secrets["GOOGLE_DRIVE_CREDENTIALS"]),
-            scopes=['https://www.googleapis.com/auth/drive']
-        )
-        return build('drive', 'v3', credentials=credentials)
+        with _drive_lock:
+            if _drive_service is None:
+                from google.oauth2 import service_account
+                from googleapiclient.discovery import build
+                _drive_credentials = service_account.Credentials.from_service_account_info(
+                    json.loads(st.secrets["GOOGLE_DRIVE_CREDENTIALS"]),
+                    scopes=DRIVE_SCOPES
+                )
+                _refresh_drive_token()
+                _drive_service = build(
+                    'drive', 'v3',
+                    http=_new_drive_http(),
+                    requestBuilder=_pooled_request_class(),
+                    cache_discovery=False
+                )
+                _drive_stats['client_builds'] += 1
+                logging.info("Built shared Google Drive service")
+            else:
+                _refresh_drive_token()
+                _drive_stats['reused_calls'] += 1
+            return _drive_service
     except Exception as e:
         st.error(f"Failed to initialize Google Drive service: {str(e)}")
         logging.error(f"Drive service initialization failed: {str(e)}")
         raise
 
+def get_drive_stats():
+    """
+    Return counters for the shared Drive client.
+    
+    Returns:
+        dict: client_builds, token_refreshes, reused_calls and pooled_transports
+    """
+    with _drive_lock:
+        stats = dict(_drive_stats)
+    stats['pooled_transports'] = _drive_http_pool.qsize()
+    return stats
+
+def _refresh_drive_token():
+    """Refresh the shared access token if it is missing or about to expire. Caller holds _drive_lock."""
+    if _drive_credentials is not None and not _drive_credentials.valid:
+        from google.auth.transport.requests import Request
+        _drive_credentials.refresh(Request())
+        _drive_stats['token_refreshes'] += 1
+
+def _new_drive_http():
+    """Create an authorized keep-alive transport bound to the shared credentials."""
+    import httplib2
+    import google_auth_httplib2
+    return google_auth_httplib2.AuthorizedHttp(
+        _drive_credentials, http=httplib2.Http(timeout=DRIVE_HTTP_TIMEOUT)
+    )
+
+@contextmanager
+def _borrow_drive_http():
+    """Check a transport out of the pool for the duration of one request."""
+    try:
+        http = _drive_http_pool.get_nowait()
+    except queue.Empty:
+        http = _new_drive_http()
+    try:
+        yield http
+    finally:
+        try:
+            _drive_http_pool.put_nowait(http)
+        except queue.Full:
+            pass
+
+def _pooled_request_class():
+    """Return the HttpRequest subclass used by the shared service, importing the client library on first use."""
+    from googleapiclient.http import HttpRequest
+    
+    class _PooledHttpRequest(HttpRequest):
+        """HttpRequest that executes on a transport borrowed from the shared pool."""
+        
+        def execute(self, http=None, num_retries=0):
+            if http is not None:
+                return super().execute(http=http, num_retries=num_retries)
+            with _borrow_drive_http() as pooled_http:
+                return super().execute(http=pooled_http, num_retries=num_retries)
+    
+    return _PooledHttpRequest
+
 def find_file_in_drive(service, file_name):
     """
     Find file in Google Drive by name.
     
+    If several files share the name (writers that created it at the same
+    time), the oldest one is returned; see _create_file().
+    
+    Resolved IDs are cached per folder for FILE_ID_TTL seconds, so repeated
+    saves and exports skip the files().list round trip. Callers that get a
+    404 for a cached ID should call invalidate_file_id() and look it up again.
+    
     Args:
         service: Google Drive API service
         file_name (str): Name of the file to find
@@ -142,40 +1146,148 @@ def find_file_in_drive(service, file_name):
     """
     try:
         folder_id = st.secrets["GOOGLE_DRIVE_FOLDER_ID"]
-        query = f"name='{file_name}' and '{folder_id}' in parents and trashed=false"
-        results = service.files().list(
-            q=query,
-            spaces='drive',
-            fields='files(id)'
-        ).execute()
-        files = results.get('files', [])
-        return files[0]['id'] if files else None
+        key = (folder_id, file_name)
+        with _file_id_lock:
+            cached = _file_id_cache.get(key)
+        if cached and cached[1] > time.monotonic():
+            return cached[0]
+        
+        files = _list_files(service, file_name)
+        if not files:
+            invalidate_file_id(file_name)
+            return None
+        _cache_file_id(file_name, files[0]['id'])
+        return files[0]['id']
     except Exception as e:
         st.error(f"Error finding file in Google Drive: {str(e)}")
         logging.error(f"Find file failed: {str(e)}")
         return None
 
-def download_file_from_drive(service, file_id):
+def _list_files(service, file_name):
+    """Return id and createdTime of the files named file_name in the configured folder, oldest first."""
+    folder_id = st.secrets["GOOGLE_DRIVE_FOLDER_ID"]
+    query = f"name='{file_name}' and '{folder_id}' in parents and trashed=false"
+    with span('drive.list', file=file_name):
+        results = service.files().list(
+            q=query,
+            spaces='drive',
+            fields='files(id,createdTime)'
+        ).execute()
+    return sorted(results.get('files', []), key=lambda item: (_parse_time(item), item['id']))
+
+def invalidate_file_id(file_name):
+    """
+    Drop the cached Drive file ID for file_name.
+    
+    Args:
+        file_name (str): Name of the file in the configured folder
+    """
+    key = (st.secrets["GOOGLE_DRIVE_FOLDER_ID"], file_name)
+    with _file_id_lock:
+        _file_id_cache.pop(key, None)
+
+def _cache_file_id(file_name, file_id):
+    """Remember the Drive file ID for file_name for FILE_ID_TTL seconds."""
+    key = (st.secrets["GOOGLE_DRIVE_FOLDER_ID"], file_name)
+    with _file_id_lock:
+        _file_id_cache[key] = (file_id, time.monotonic() + FILE_ID_TTL)
+
+def _is_not_found(error):
+    """Return True if error is a Drive 404 (file deleted or moved)."""
+    from googleapiclient.errors import HttpError
+    return isinstance(error, HttpError) and getattr(error.resp, 'status', None) == 404
+
+def download_file_from_drive(service, file_id, fmt='xlsx'):
     """
     Download file from Google Drive and load as DataFrame.
     
     Args:
         service: Google Drive API service
         file_id (str): ID of the file to download
+        fmt (str): Serializer the file was written with
     
     Returns:
         DataFrame: Loaded DataFrame
     """
     try:
-        request = service.files().get_media(fileId=file_id)
-        output = BytesIO()
-        downloader = MediaIoBaseDownload(output, request)
-        done = False
-        while not done:
-            status, done = downloader.next_chunk()
-        output.seek(0)
-        return pd.read_excel(output, engine='openpyxl')
+        return _load_file(service, file_id, lambda data: deserialize_links(data, fmt))
     except Exception as e:
-        st.error(f"Error downloading file from Google Drive: {str(e)}")
+        if not _is_not_found(e):
+            st.error(f"Error downloading file from Google Drive: {str(e)}")
         logging.error(f"Download file failed: {str(e)}")
         raise
+
+def _download_file(service, file_id, revision_id=None):
+    """
+    Stream a Drive file, or one revision of it, into a temporary file.
+    
+    The file is fetched in DOWNLOAD_CHUNK_MB chunks; a failed chunk is retried
+    with backoff and resumes where it stopped. Parsing reads from the file
+    (memory-mapped for Arrow formats), so the download is never held in
+    memory next to the parsed library.
+    
+    Args:
+        service: Google Drive API service
+        file_id (str): ID of the file
+        revision_id (str, optional): Revision to download instead of the head
+    
+    Returns:
+        file: Temporary file positioned at the start, deleted when closed
+    """
+    if revision_id:
+        request = service.revisions().get_media(fileId=file_id, revisionId=revision_id)
+    else:
+        request = service.files().get_media(fileId=file_id)
+    output = tempfile.TemporaryFile()
+    started = time.perf_counter()
+    try:
+        with span('drive.download', file_id=file_id), _borrow_drive_http() as http:
+            request.http = http
+            from googleapiclient.http import MediaIoBaseDownload
+            downloader = MediaIoBaseDownload(output, request, chunksize=_chunk_size("DOWNLOAD_CHUNK_MB", DOWNLOAD_CHUNK_MB))
+            done = False
+            while not done:
+                status, done = downloader.next_chunk(num_retries=TRANSFER_RETRIES)
+    except Exception:
+        output.close()
+        raise
+    _record_transfer('download', output.tell(), time.perf_counter() - started)
+    output.seek(0)
+    return output
+
+def _load_file(service, file_id, load, revision_id=None):
+    """Download a Drive file with _download_file() and parse it with load(file)."""
+    with _download_file(service, file_id, revision_id) as data:
+        return load(data)
+
+def _chunk_size(key, default_mb):
+    """Return a transfer chunk size in bytes from secrets, rounded to a multiple of 256 KiB."""
+    try:
+        megabytes = float(st.secrets.get(key, default_mb))
+    except FileNotFoundError:
+        megabytes = default_mb
+    quantum = 256 * 1024
+    return max(1, round(megabytes * 1024 * 1024 / quantum)) * quantum
+
+def _record_transfer(direction, size, seconds):
+    """Add one finished upload or download to the transfer counters."""
+    with _transfer_lock:
+        stats = _transfer_stats[direction]
+        stats['transfers'] += 1
+        stats['bytes'] += size
+        stats['seconds'] += seconds
+    logging.debug(f"{direction.capitalize()}ed {size} bytes in {seconds:.2f}s")
+
+def get_transfer_stats():
+    """
+    Return Drive transfer counters.
+    
+    Returns:
+        dict: For 'upload' and 'download': transfers, bytes, seconds and
+        mb_per_s (average throughput)
+    """
+    with _transfer_lock:
+        stats = {direction: dict(values) for direction, values in _transfer_stats.items()}
+    for values in stats.values():
+        values['mb_per_s'] = values['bytes'] / 1e6 / values['seconds'] if values['seconds'] else 0.0
+    return stats
@@ -0,0 +1,141 @@
+import hashlib
+import threading
+from collections import OrderedDict
+from io import BytesIO
+import pandas as pd
+from utils.metrics import span
+from utils.tag_codes import decode_tags, tag_codes
+
+CSV_CHUNK_ROWS = 10000  # rows converted to CSV text at a time
+MAX_CACHED_BYTES = 256 * 1024 * 1024  # total size of memoized export files
+
+EXPORT_FORMATS = {
+    'xlsx': {
+        'label': "Excel",
+        'mime': "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    },
+    'csv': {
+        'label': "CSV",
+        'mime': "text/csv",
+    },
+    'json': {
+        'label': "JSON",
+        'mime': "application/json",
+    },
+}
+
+# (content hash, format) -> file bytes, least recently used first
+_artifacts = OrderedDict()
+_artifacts_size = 0
+_artifacts_lock = threading.Lock()
+_stats = {'hits': 0, 'builds': 0}
+
+def content_hash(df):
+    """
+    Hash the contents of a links DataFrame.
+    
+    Args:
+        df (DataFrame): Links with an encoded tags column
+    
+    Returns:
+        str: Hex digest that changes whenever any cell changes
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update('\x1f'.join(df.columns).encode('utf-8'))
+    other = df.drop(columns=['tags'], errors='ignore')
+    digest.update(pd.util.hash_pandas_object(other, index=False).to_numpy().tobytes())
+    if 'tags' in df.columns:
+        codes, offsets, vocabulary = tag_codes(df['tags'])
+        digest.update(codes.tobytes())
+        digest.update(offsets.tobytes())
+        digest.update('\x1f'.join(vocabulary).encode('utf-8'))
+    return digest.hexdigest()
+
+def build_export(df, fmt):
+    """
+    Return the export file for a library.
+    
+    Files are memoized by content_hash(), so the same contents are only
+    serialized once per format.
+    
+    Args:
+        df (DataFrame): Links to export
+        fmt (str): Key of EXPORT_FORMATS
+    
+    Returns:
+        bytes: File contents
+    """
+    global _artifacts_size
+    key = (content_hash(df), fmt)
+    with _artifacts_lock:
+        data = _artifacts.get(key)
+        if data is not None:
+            _artifacts.move_to_end(key)
+            _stats['hits'] += 1
+            return data
+    
+    with span(f'export.{fmt}', rows=len(df)):
+        data = _BUILDERS[fmt](df)
+    with _artifacts_lock:
+        _stats['builds'] += 1
+        if key not in _artifacts:
+            _artifacts[key] = data
+            _artifacts_size += len(data)
+        while _artifacts_size > MAX_CACHED_BYTES and len(_artifacts) > 1:
+            _, evicted = _artifacts.popitem(last=False)
+            _artifacts_size -= len(evicted)
+    return data
+
+def iter_csv(df, chunk_rows=CSV_CHUNK_ROWS):
+    """
+    Yield a library as UTF-8 CSV a chunk of rows at a time.
+    
+    Only chunk_rows rows are ever held as text, so very large libraries can be
+    written to a file or response without a second full-size copy.
+    
+    Args:
+        df (DataFrame): Links to export
+        chunk_rows (int): Rows per chunk
+    
+    Yields:
+        bytes: CSV text, starting with the header row
+    """
+    for start in range(0, max(len(df), 1), chunk_rows):
+        chunk = df.iloc[start:start + chunk_rows]
+        if 'tags' in chunk.columns:
+            chunk = chunk.assign(tags=[', '.join(tags) for tags in decode_tags(chunk['tags'])])
+        yield chunk.to_csv(index=False, header=start == 0).encode('utf-8')
+
+def get_stats():
+    """
+    Return export cache counters.
+    
+    Returns:
+        dict: hits, builds, cached (number of files) and cached_bytes
+    """
+    with _artifacts_lock:
+        return dict(_stats, cached=len(_artifacts), cached_bytes=_artifacts_size)
+
+def _build_xlsx(df):
+    """Build the Excel export with the same layout as the Drive workbook."""
+    from utils.data_manager import serialize_links
+    return serialize_links(df, 'xlsx')
+
+def _build_csv(df):
+    """Build the CSV export through iter_csv()."""
+    output = BytesIO()
+    for chunk in iter_csv(df):
+        output.write(chunk)
+    return output.getvalue()
+
+def _build_json(df):
+    """Build the JSON export as a list of link objects with tags as arrays."""
+    if 'tags' in df.columns:
+        df = df.assign(tags=decode_tags(df['tags']))
+    return df.to_json(orient='records', force_ascii=False, indent=1).encode('utf-8')
+
+_BUILDERS = {
+    'xlsx': _build_xlsx,
+    'csv': _build_csv,
+    'json': _build_json,
+}
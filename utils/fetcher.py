@@ -0,0 +1,246 @@
+import logging
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlsplit
+from utils.metrics import span
+
+USER_AGENT = 'Mozilla/5.0 (compatible; WebContentManager/1.0)'
+ROBOTS_AGENT = 'WebContentManager'  # product token matched against User-agent lines in robots.txt
+POOL_HOSTS = 32  # hosts whose keep-alive connections are kept open
+POOL_PER_HOST = 8  # idle connections kept per host, matches BULK_MAX_WORKERS
+HOST_RATE = 2.0  # requests per second per host once the burst is used up
+HOST_BURST = 4  # requests per host that may go out back to back
+MAX_RETRIES = 3  # retries after a 429, a 5xx or a connection error
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+BACKOFF_BASE = 0.5  # seconds before the first retry, doubled for each further one
+MAX_RETRY_AFTER = 30.0  # longest Retry-After or Crawl-delay honoured, in seconds
+ROBOTS_TTL = 24 * 3600  # seconds a host's robots.txt is trusted
+ROBOTS_RETRY_TTL = 3600  # seconds before retrying a robots.txt that could not be read
+ROBOTS_BYTE_CAP = 512 * 1024  # rules past this size are ignored
+
+_session = None
+_session_lock = threading.Lock()
+
+# host -> token bucket, see _new_bucket()
+_buckets = {}
+_lock = threading.Lock()
+
+# scheme://host -> (RobotFileParser or None to allow everything, expiry on the monotonic clock)
+_robots = {}
+_robots_locks = {}
+_stats = {'requests': 0, 'retries': 0, 'throttled': 0, 'throttled_seconds': 0.0, 'robots_fetched': 0, 'robots_blocked': 0}
+
+def get(url, headers=None, timeout=10, stream=True):
+    """
+    GET url through the shared session, politely.
+    
+    The host's robots.txt is checked first, each request waits for a token from
+    the host's bucket, and 429/5xx answers and connection errors are retried
+    with exponential backoff (or after the server's Retry-After). A 429 or 503
+    also holds back every other request to that host for the same time.
+    
+    Use the response as a context manager so a streamed body returns its
+    connection to the pool.
+    
+    Args:
+        url (str): URL to fetch
+        headers (dict, optional): Extra request headers
+        timeout (float): Connect and read timeout per attempt, in seconds
+        stream (bool): Leave the body unread until it is iterated
+    
+    Returns:
+        requests.Response: The last response, possibly still a 429 or 5xx
+    
+    Raises:
+        PermissionError: If robots.txt disallows the URL
+        requests.RequestException: If the last attempt failed to connect
+    """
+    if not allowed(url):
+        with _lock:
+            _stats['robots_blocked'] += 1
+        raise PermissionError(f"robots.txt of {urlsplit(url).netloc} disallows fetching this page")
+    return _request(url, headers, timeout, stream)
+
+def allowed(url):
+    """
+    Return whether robots.txt lets this app fetch url.
+    
+    The rules are fetched once per host and cached for ROBOTS_TTL. A missing
+    robots.txt (any 4xx) or one that cannot be read allows everything.
+    
+    Args:
+        url (str): URL to check
+    
+    Returns:
+        bool: False if a Disallow rule matches
+    """
+    parts = urlsplit(url)
+    origin = f"{parts.scheme.lower()}://{parts.netloc.lower()}"
+    with _lock:
+        lock = _robots_locks.setdefault(origin, threading.Lock())
+    with lock:  # one robots.txt download per host, however many workers ask
+        rules, expires = _robots.get(origin, (None, 0.0))
+        if expires <= time.monotonic():
+            rules, ttl = _read_robots(origin)
+            _robots[origin] = (rules, time.monotonic() + ttl)
+            if rules is not None:
+                _apply_crawl_delay(parts.netloc.lower(), rules.crawl_delay(ROBOTS_AGENT))
+    return rules is None or rules.can_fetch(ROBOTS_AGENT, url)
+
+def get_stats():
+    """
+    Return counters for the metadata fetcher.
+    
+    Returns:
+        dict: requests, retries, throttled (requests that waited for a token),
+        throttled_seconds, robots_fetched, robots_blocked and hosts (with a bucket)
+    """
+    with _lock:
+        return dict(_stats, hosts=len(_buckets))
+
+def _get_session():
+    """Return the process-wide session, creating it on first use."""
+    global _session
+    with _session_lock:
+        if _session is None:
+            import requests  # deferred: only needed once a page is actually fetched
+            from requests.adapters import HTTPAdapter
+            
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=POOL_HOSTS, pool_maxsize=POOL_PER_HOST)
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+            session.headers['User-Agent'] = USER_AGENT
+            _session = session
+        return _session
+
+def _request(url, headers, timeout, stream):
+    """Send a GET with rate limiting and retries, see get()."""
+    import requests
+    
+    session = _get_session()
+    host = urlsplit(url).netloc.lower()
+    for attempt in range(MAX_RETRIES + 1):
+        _wait_for_token(host)
+        with _lock:
+            _stats['requests'] += 1
+            if attempt:
+                _stats['retries'] += 1
+        try:
+            response = session.get(url, headers=headers, timeout=timeout, stream=stream)
+        except (requests.ConnectionError, requests.Timeout) as e:
+            if attempt == MAX_RETRIES:
+                raise
+            delay = _backoff(attempt)
+            logging.debug(f"Retrying {url} in {delay:.1f} s after {type(e).__name__}")
+            time.sleep(delay)
+            continue
+        
+        if response.status_code not in RETRY_STATUSES or attempt == MAX_RETRIES:
+            return response
+        delay = _retry_after(response) or _backoff(attempt)
+        response.close()
+        if response.status_code in (429, 503):
+            _hold_back(host, delay)  # the whole host is overloaded, not just this page
+        logging.debug(f"Retrying {url} in {delay:.1f} s after HTTP {response.status_code}")
+        time.sleep(delay)
+
+def _new_bucket():
+    return {
+        'tokens': float(HOST_BURST),
+        'rate': HOST_RATE,
+        'updated': time.monotonic(),
+        'paused_until': 0.0,
+    }
+
+def _wait_for_token(host):
+    """
+    Take a token from host's bucket, sleeping until one is available.
+    
+    Tokens may go negative: each caller reserves its slot under the lock and
+    sleeps outside it, so concurrent workers queue up at the host's rate.
+    """
+    with _lock:
+        now = time.monotonic()
+        bucket = _buckets.setdefault(host, _new_bucket())
+        bucket['tokens'] = min(HOST_BURST, bucket['tokens'] + (now - bucket['updated']) * bucket['rate'])
+        bucket['updated'] = now
+        bucket['tokens'] -= 1
+        wait = max(-bucket['tokens'] / bucket['rate'], bucket['paused_until'] - now, 0.0)
+        if wait:
+            _stats['throttled'] += 1
+            _stats['throttled_seconds'] += wait
+    if wait:
+        time.sleep(wait)
+
+def _hold_back(host, seconds):
+    """Keep every request to host waiting for at least seconds."""
+    with _lock:
+        bucket = _buckets.setdefault(host, _new_bucket())
+        bucket['paused_until'] = max(bucket['paused_until'], time.monotonic() + seconds)
+
+def _apply_crawl_delay(host, delay):
+    """Slow host's bucket down to one request per Crawl-delay seconds."""
+    if not delay:
+        return
+    try:
+        delay = min(float(delay), MAX_RETRY_AFTER)
+    except ValueError:
+        return
+    if delay <= 0:
+        return
+    with _lock:
+        bucket = _buckets.setdefault(host, _new_bucket())
+        bucket['rate'] = min(HOST_RATE, 1 / delay)
+
+def _backoff(attempt):
+    """Return the delay before retry number attempt + 1, with jitter."""
+    return BACKOFF_BASE * 2 ** attempt * random.uniform(0.5, 1.0)
+
+def _retry_after(response):
+    """Return the Retry-After of a response in seconds, capped at MAX_RETRY_AFTER, or None."""
+    value = response.headers.get('Retry-After')
+    if not value:
+        return None
+    try:
+        seconds = float(value)
+    except ValueError:
+        try:
+            seconds = parsedate_to_datetime(value).timestamp() - time.time()
+        except (TypeError, ValueError):
+            return None
+    return min(max(seconds, 0.0), MAX_RETRY_AFTER)
+
+def _read_robots(origin):
+    """
+    Download and parse origin's robots.txt.
+    
+    Returns:
+        tuple: (RobotFileParser or None to allow everything, seconds to cache the result)
+    """
+    from urllib.robotparser import RobotFileParser
+    
+    try:
+        with span('robots.fetch', origin=origin):
+            with _request(f"{origin}/robots.txt", None, 10, True) as response:
+                if response.status_code >= 500:
+                    logging.warning(f"robots.txt of {origin} answered HTTP {response.status_code}; allowing for now")
+                    return None, ROBOTS_RETRY_TTL
+                if not response.ok:
+                    return None, ROBOTS_TTL
+                body = b''
+                for chunk in response.iter_content(chunk_size=64 * 1024):
+                    body += chunk
+                    if len(body) >= ROBOTS_BYTE_CAP:
+                        break
+    except Exception as e:
+        logging.warning(f"Could not read robots.txt of {origin}: {str(e)}")
+        return None, ROBOTS_RETRY_TTL
+    
+    with _lock:
+        _stats['robots_fetched'] += 1
+    rules = RobotFileParser(f"{origin}/robots.txt")
+    rules.parse(body[:ROBOTS_BYTE_CAP].decode('utf-8', errors='replace').splitlines())
+    return rules, ROBOTS_TTL
@@ -0,0 +1,41 @@
+import itertools
+import threading
+
+VERSION_ATTR = 'library_version'
+
+_counter = itertools.count(1)
+_counter_lock = threading.Lock()
+
+def bump_version(df):
+    """
+    Give a library DataFrame a new version.
+    
+    Versions are unique within the process, so views cached against one
+    (see st.cache_data in ui_components) can be shared by every session and
+    are never served for different contents. Call this whenever a library is
+    loaded or changed.
+    
+    Args:
+        df (DataFrame): Library that was just loaded or changed
+    
+    Returns:
+        DataFrame: df, with the version stored in df.attrs
+    """
+    with _counter_lock:
+        df.attrs[VERSION_ATTR] = next(_counter)
+    return df
+
+def library_version(df):
+    """
+    Return the version of a library DataFrame, assigning one if it has none.
+    
+    Args:
+        df (DataFrame): Library in session state
+    
+    Returns:
+        int: Version that changes with every change to the library
+    """
+    version = df.attrs.get(VERSION_ATTR)
+    if version is None:
+        version = bump_version(df).attrs[VERSION_ATTR]
+    return version
@@ -1,10 +1,26 @@
-import pandas as pd
-import requests
-from bs4 import BeautifulSoup
-from datetime import datetime
 import streamlit as st
 import logging
-import time
+import re
+import codecs
+import threading
+import pandas as pd
+from html.parser import HTMLParser
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from urllib.parse import urlsplit
+from utils import fetcher, metadata_cache
+from utils.library_version import bump_version
+from utils.metrics import timed, clip
+from utils.link_store import LinkStore
+from utils.search_index import UrlIndex
+from utils.tag_codes import decode_tags, ensure_encoded
+
+BULK_MAX_WORKERS = 8
+BULK_PER_HOST = 2
+URL_PATTERN = re.compile(r"https?://[^\s,;\"'<>]+")
+HEAD_BYTE_CAP = 256 * 1024  # stop reading a page after this many bytes even without </head>
+HEAD_CHUNK_SIZE = 16 * 1024
+HTML_CONTENT_TYPES = ('text/html', 'application/xhtml+xml')
+UNDO_DEPTH = 10  # delete batches kept in memory for undo
 
 def fetch_metadata(url):
     """
@@ -17,23 +33,170 @@ def fetch_metadata(url):
         tuple: (title, description, keywords)
     """
     try:
-        headers = {'User-Agent': 'Mozilla/5.0'}
-        response = requests.get(url, headers=headers, timeout=10)
-        soup = BeautifulSoup(response.text, 'html.parser')
-        
-        title = soup.title.string if soup.title else url
-        description = soup.find('meta', attrs={'name': 'description'})
-        description = description['content'] if description else ""
-        
-        keywords = soup.find('meta', attrs={'name': 'keywords'})
-        keywords = keywords['content'].split(',')[:5] if keywords else []
-        
-        return title, description, [k.strip() for k in keywords if k.strip()]
+        return _fetch_metadata(url)
     except Exception as e:
         st.warning(f"Couldn't fetch metadata: {str(e)}")
         return url, "", []
 
-def save_link(df, url, title, description, tags):
+@timed('metadata.fetch')
+def _fetch_metadata(url):
+    """
+    Fetch and parse metadata for url, raising on failure. Safe to call from worker threads.
+    
+    Results are kept in the persistent metadata cache. Fresh entries are served
+    without network access; stale ones are revalidated with a conditional GET.
+    Pages are requested through utils.fetcher, which pools connections, rate
+    limits each host and honours robots.txt.
+    """
+    cached = metadata_cache.get(url)
+    if cached and cached['fresh']:
+        return cached['title'], cached['description'], cached['keywords']
+    
+    headers = {}
+    if cached and cached['etag']:
+        headers['If-None-Match'] = cached['etag']
+    if cached and cached['last_modified']:
+        headers['If-Modified-Since'] = cached['last_modified']
+    with fetcher.get(url, headers=headers, timeout=10, stream=True) as response:
+        if response.status_code == 304 and cached:
+            metadata_cache.mark_revalidated(url)
+            return cached['title'], cached['description'], cached['keywords']
+        
+        content_type = response.headers.get('Content-Type', '')
+        if content_type and not content_type.lower().startswith(HTML_CONTENT_TYPES):
+            # PDFs, images and other downloads have no <head> to read
+            title, description, keywords = url, "", []
+        else:
+            title, description, keywords = _parse_head(response, url)
+    
+    if response.ok:
+        metadata_cache.put(
+            url, title, description, keywords,
+            etag=response.headers.get('ETag'),
+            last_modified=response.headers.get('Last-Modified')
+        )
+    return title, description, keywords
+
+class _HeadParser(HTMLParser):
+    """Incremental parser that collects <title> and meta description/keywords and stops at </head>."""
+    
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.title = None
+        self.meta = {}
+        self.done = False
+        self._in_title = False
+    
+    def handle_starttag(self, tag, attrs):
+        if tag == 'title':
+            self._in_title = True
+            self.title = self.title or ''
+        elif tag == 'meta':
+            attrs = dict(attrs)
+            name = (attrs.get('name') or '').lower()
+            if name in ('description', 'keywords') and name not in self.meta:
+                self.meta[name] = attrs.get('content') or ''
+        elif tag == 'body':
+            self.done = True
+    
+    def handle_endtag(self, tag):
+        if tag == 'title':
+            self._in_title = False
+        elif tag == 'head':
+            self.done = True
+    
+    def handle_data(self, data):
+        if self._in_title:
+            self.title += data
+
+def _parse_head(response, url):
+    """
+    Stream the response and parse only the document head.
+    
+    Reading stops at </head> (or <body>) or after HEAD_BYTE_CAP bytes, so the
+    page body is never downloaded or parsed.
+    
+    Args:
+        response (Response): Streaming response for an HTML page
+        url (str): Requested URL, used as the fallback title
+    
+    Returns:
+        tuple: (title, description, keywords)
+    """
+    charset = response.encoding if 'charset' in response.headers.get('Content-Type', '').lower() else 'utf-8'
+    try:
+        decoder = codecs.getincrementaldecoder(charset)(errors='replace')
+    except LookupError:
+        decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+    parser = _HeadParser()
+    received = 0
+    for chunk in response.iter_content(chunk_size=HEAD_CHUNK_SIZE):
+        received += len(chunk)
+        parser.feed(decoder.decode(chunk))
+        if parser.done or received >= HEAD_BYTE_CAP:
+            break
+    
+    title = (parser.title or '').strip() or url
+    description = parser.meta.get('description', "")
+    keywords = parser.meta.get('keywords', "")
+    keywords = keywords.split(',')[:5] if keywords else []
+    return title, description, [k.strip() for k in keywords if k.strip()]
+
+def parse_url_list(text):
+    """
+    Extract unique http(s) URLs from pasted text or an uploaded file.
+    
+    Args:
+        text (str): Text containing URLs separated by newlines, commas or spaces
+    
+    Returns:
+        list: URLs in order of first appearance
+    """
+    return list(dict.fromkeys(URL_PATTERN.findall(text or '')))
+
+def fetch_metadata_batch(urls, max_workers=BULK_MAX_WORKERS, per_host=BULK_PER_HOST, on_progress=None):
+    """
+    Fetch metadata for many URLs concurrently.
+    
+    At most max_workers requests run at once and at most per_host of them
+    target the same host; utils.fetcher additionally spaces out requests to
+    each host and retries the ones it rejects. on_progress is called from the calling thread,
+    so it may update Streamlit elements.
+    
+    Args:
+        urls (list): URLs to fetch
+        max_workers (int): Size of the worker pool
+        per_host (int): Concurrent requests allowed per host
+        on_progress (callable, optional): on_progress(done, total, url)
+    
+    Returns:
+        dict: url -> (title, description, keywords, error or None)
+    """
+    host_limits = {}
+    host_lock = threading.Lock()
+    
+    def fetch(url):
+        host = urlsplit(url).netloc.lower()
+        with host_lock:
+            limit = host_limits.setdefault(host, threading.Semaphore(per_host))
+        with limit:
+            try:
+                return (*_fetch_metadata(url), None)
+            except Exception as e:
+                logging.warning(f"Bulk metadata fetch failed for {url}: {str(e)}")
+                return url, "", [], str(e)
+    
+    results = {}
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {executor.submit(fetch, url): url for url in urls}
+        for done, future in enumerate(as_completed(futures), start=1):
+            url = futures[future]
+            results[url] = future.result()
+            if on_progress:
+                on_progress(done, len(futures), url)
+    return results
+
+def save_link(df, url, title, description, tags, index=None):
     """
     Save or update a link in the DataFrame.
     
@@ -43,80 +206,161 @@ def save_link(df, url, title, description, tags):
         title (str): Title of the link
         description (str): Description of the link
         tags (list): List of tags
+        index (LibraryIndex, optional): Search, tag and URL indexes to update with the link
     
     Returns:
         tuple: (updated DataFrame, action)
     """
     try:
-        logging.debug(f"Saving link: URL={url}, Title={title}, Description={description}, Tags={tags}")
-        now = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-        
-        existing_index = df[df['url'] == url].index
-        
-        if not existing_index.empty:
-            idx = existing_index[0]
-            df.at[idx, 'title'] = title
-            df.at[idx, 'description'] = description if description else ""
-            df.at[idx, 'tags'] = [str(tag).strip() for tag in tags if str(tag).strip()]
-            df.at[idx, 'updated_at'] = now
-            action = "updated"
-        else:
-            new_id = df['id'].max() + 1 if not df.empty else 1
-            new_entry = {
-                'id': new_id,
-                'url': url,
-                'title': title,
-                'description': description if description else "",
-                'tags': [str(tag).strip() for tag in tags if str(tag).strip()],
-                'created_at': now,
-                'updated_at': now
-            }
-            df = pd.concat([df, pd.DataFrame([new_entry])], ignore_index=True)
-            action = "saved"
-        
+        logging.debug(f"Saving link: URL={clip(url)}, Title={clip(title)}, Description={clip(description)}, Tags={clip(tags)}")
+        store = LinkStore(df, index)
+        action = store.upsert(url, title, description, tags)
         logging.info(f"Link {action} successfully")
-        return df, action
+        return bump_version(store.df), action
     except Exception as e:
         st.error(f"Error saving link: {str(e)}")
         logging.error(f"Link save failed: {str(e)}")
         return df, None
 
-def delete_selected_links(df, excel_file, selected_urls, mode):
+def save_links(df, entries, index=None):
+    """
+    Save or update several links in the DataFrame without persisting.
+    
+    New rows are buffered by a LinkStore and appended in batches, so adding
+    N links costs close to linear time.
+    
+    Args:
+        df (DataFrame): DataFrame to save links to
+        entries (list): Dicts with url, title, description and tags
+        index (LibraryIndex, optional): Search, tag and URL indexes to update with the links
+    
+    Returns:
+        tuple: (updated DataFrame, list of (url, action) for links that were saved)
+    """
+    store = LinkStore(df, index)
+    results = []
+    for entry in entries:
+        try:
+            action = store.upsert(entry['url'], entry['title'], entry.get('description', ''), entry.get('tags', []))
+            results.append((entry['url'], action))
+        except Exception as e:
+            logging.error(f"Link save failed for {entry['url']}: {str(e)}")
+    logging.info(f"Saved {len(results)} of {len(entries)} link(s)")
+    return (bump_version(store.df) if results else store.df), results
+
+def delete_selected_links(df, excel_file, selected_urls, mode, index=None):
     """
-    Delete selected links from the DataFrame and update Google Drive.
+    Delete selected links as one batch and queue a single update to Google Drive.
+    
+    The DataFrame in session state is only replaced once the whole batch has
+    been applied, and the deleted rows are kept in memory so undo_delete() can
+    restore them without downloading anything.
     
     Args:
         df (DataFrame): DataFrame containing links
         excel_file (str): Name of the Excel file
         selected_urls (list): List of URLs to delete
         mode (str): 'owner', 'guest', or 'public'
+        index (LibraryIndex, optional): Search and tag indexes to remove the links from
     
     Returns:
-        DataFrame: Updated DataFrame
+        tuple: (updated DataFrame, number of links deleted)
     """
-    from utils.data_manager import save_data
+    from utils.data_manager import make_change
     
     try:
-        logging.debug(f"Deleting URLs: {selected_urls}")
+        logging.debug(f"Deleting {len(selected_urls)} URL(s)")
         if not selected_urls:
             st.warning("No links selected for deletion")
-            return df
-        df = df[~df['url'].isin(selected_urls)]
-        if mode in ["owner", "guest"]:
-            if save_data(df, excel_file):
-                st.session_state['df'] = df
-                st.success(f"✅ {len(selected_urls)} link(s) deleted successfully!")
-                st.balloons()
-                time.sleep(0.5)
-            else:
-                st.error("Failed to save changes after deletion")
-        else:
-            st.session_state['user_df'] = df
-            st.success(f"✅ {len(selected_urls)} link(s) deleted successfully!")
-            st.balloons()
-            time.sleep(0.5)
-        return df
+            return df, 0
+        keep = ~df['url'].isin(selected_urls).to_numpy()
+        removed = df[~keep]
+        if removed.empty:
+            return df, 0
+        deleted_urls = removed['url'].tolist()
+        df = bump_version(df[keep])
+        if index is not None:
+            index.remove(deleted_urls, keep)
+        _commit(df, excel_file, mode, [make_change('delete', url) for url in deleted_urls])
+        
+        tombstones = st.session_state.setdefault(_tombstone_key(mode), [])
+        tombstones.append(removed)
+        del tombstones[:-UNDO_DEPTH]
+        st.session_state['flash_message'] = f"✅ {len(removed)} link(s) deleted successfully!"
+        return df, len(removed)
     except Exception as e:
         st.error(f"Error deleting links: {str(e)}")
         logging.error(f"Delete links failed: {str(e)}")
-        return df
\ No newline at end of file
+        return df, 0
+
+def undo_delete(df, excel_file, mode, index=None):
+    """
+    Restore the most recently deleted batch of links from memory.
+    
+    Links keep their original ID and dates. A link that was added again since
+    the delete is left as it is.
+    
+    Args:
+        df (DataFrame): DataFrame containing links
+        excel_file (str): Name of the Excel file
+        mode (str): 'owner', 'guest', or 'public'
+        index (LibraryIndex, optional): Search and tag indexes to add the links to
+    
+    Returns:
+        tuple: (updated DataFrame, number of links restored)
+    """
+    from utils.data_manager import make_change
+    
+    tombstones = st.session_state.get(_tombstone_key(mode))
+    if not tombstones:
+        return df, 0
+    try:
+        removed = tombstones[-1]
+        urls = index.urls if index is not None else UrlIndex.from_frame(df)
+        restored = removed[[urls.lookup(url) is None for url in removed['url']]]
+        start = len(df)
+        if not restored.empty:
+            frames = [df, restored] if len(df) else [restored]
+            df = bump_version(ensure_encoded(pd.concat(frames, ignore_index=True)))
+        
+        rows = restored.to_dict('records')
+        for row, tags in zip(rows, decode_tags(restored['tags'])):
+            row['tags'] = tags
+        if index is not None:
+            for pos, row in enumerate(rows, start):
+                index.upsert(pos, row['url'], row['title'], row['description'], row['tags'])
+        _commit(df, excel_file, mode, [make_change('add', row['url'], row) for row in rows])
+        
+        tombstones.pop()
+        st.session_state['flash_message'] = f"↩️ Restored {len(rows)} link(s)"
+        return df, len(rows)
+    except Exception as e:
+        st.error(f"Error restoring links: {str(e)}")
+        logging.error(f"Undo delete failed: {str(e)}")
+        return df, 0
+
+def undo_depth(mode):
+    """
+    Return how many delete batches can be undone in this session.
+    
+    Args:
+        mode (str): 'owner', 'guest', or 'public'
+    
+    Returns:
+        int: Number of batches in the tombstone list
+    """
+    return len(st.session_state.get(_tombstone_key(mode), []))
+
+def _tombstone_key(mode):
+    """Return the session state key holding deleted batches for mode."""
+    return 'user_deleted_links' if mode == "public" else 'deleted_links'
+
+def _commit(df, excel_file, mode, changes):
+    """Publish df to session state and queue its changes for Google Drive."""
+    from utils.write_behind import queue_changes
+    
+    if mode in ["owner", "guest"]:
+        queue_changes(df, excel_file, changes)
+        st.session_state['df'] = df
+    else:
+        st.session_state['user_df'] = df
\ No newline at end of file
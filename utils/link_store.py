@@ -0,0 +1,111 @@
+import pandas as pd
+from datetime import datetime
+from utils.search_index import UrlIndex
+from utils.tag_codes import replace_tags, ensure_encoded
+
+FLUSH_BATCH = 500  # buffered new rows before they are concatenated into the DataFrame
+
+class LinkStore:
+    """
+    Write path for a links DataFrame with constant-time upserts.
+    
+    Existing links are found through a URL hash index instead of scanning the
+    url column, IDs come from a counter instead of id.max(), and new rows are
+    buffered and appended with one concat per FLUSH_BATCH rows instead of
+    copying the frame for every insert. Tag changes to existing rows are
+    buffered too and written with one rebuild of the tags column.
+    
+    The frame passed in may be shared with the library cache or other
+    sessions, so it is copied once before the first existing row is edited
+    in place.
+    """
+    
+    def __init__(self, df, index=None):
+        """
+        Args:
+            df (DataFrame): Links DataFrame to write to
+            index (LibraryIndex, optional): Session indexes to keep in step; when
+                omitted a URL index is built for this store only
+        """
+        self._df = df
+        self._index = index
+        self._urls = index.urls if index is not None else UrlIndex.from_frame(df)
+        self._pending = []
+        self._tag_updates = {}  # row position in _df -> new tags
+        self._owned = False  # whether _df is a private copy that may be edited in place
+    
+    @property
+    def df(self):
+        """The DataFrame with all buffered rows appended."""
+        self.flush()
+        return self._df
+    
+    def upsert(self, url, title, description, tags):
+        """
+        Save a new link or update the existing link with the same URL.
+        
+        Args:
+            url (str): URL to save
+            title (str): Title of the link
+            description (str): Description of the link
+            tags (list): List of tags
+        
+        Returns:
+            str: "saved" for a new link, "updated" for an existing one
+        """
+        now = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        description = description if description else ""
+        tags = [str(tag).strip() for tag in tags if str(tag).strip()]
+        pos = self._urls.lookup(url)
+        
+        if pos is None:
+            pos = len(self._df) + len(self._pending)
+            self._pending.append({
+                'id': self._urls.allocate_id(),
+                'url': url,
+                'title': title,
+                'description': description,
+                'tags': tags,
+                'created_at': now,
+                'updated_at': now
+            })
+            self._urls.add(url, pos)
+            action = "saved"
+        elif pos >= len(self._df):
+            row = self._pending[pos - len(self._df)]
+            row.update(title=title, description=description, tags=tags, updated_at=now)
+            url = row['url']
+            action = "updated"
+        else:
+            self._own()
+            label = self._df.index[pos]
+            self._df.at[label, 'title'] = title
+            self._df.at[label, 'description'] = description
+            self._tag_updates[pos] = tags
+            self._df.at[label, 'updated_at'] = now
+            url = self._df.at[label, 'url']
+            action = "updated"
+        
+        if self._index is not None:
+            self._index.upsert(pos, url, title, description, tags)
+        if len(self._pending) >= FLUSH_BATCH:
+            self.flush()
+        return action
+    
+    def _own(self):
+        """Copy _df before its first in-place edit so frames shared with it stay unchanged."""
+        if not self._owned:
+            self._df = self._df.copy()
+            self._owned = True
+    
+    def flush(self):
+        """Write buffered tag changes and append buffered rows with a single concat."""
+        replace_tags(self._df, self._tag_updates)
+        self._tag_updates = {}
+        if not self._pending:
+            return
+        new_rows = ensure_encoded(pd.DataFrame(self._pending))
+        frames = [self._df, new_rows] if len(self._df) else [new_rows]
+        self._df = ensure_encoded(pd.concat(frames, ignore_index=True))
+        self._owned = True
+        self._pending = []
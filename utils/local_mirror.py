@@ -0,0 +1,254 @@
+import json
+import logging
+import os
+import re
+import tempfile
+import threading
+import time
+import streamlit as st
+from utils.metadata_cache import CACHE_DIR
+from utils.metrics import span
+
+MIRROR_DIR = os.path.join(CACHE_DIR, 'mirror')
+SYNC_INTERVAL = 60.0  # seconds between background reconciliations of a library with Drive
+RETRY_DELAY = 15.0  # seconds before retrying a failed reconciliation
+
+# excel_file -> sync schedule of a mirrored library, shared by every session in the process
+_entries = {}
+_lock = threading.Lock()
+_wakeup = threading.Condition(_lock)
+_worker = None
+
+def enabled():
+    """Return False if LOCAL_MIRROR = false is set in secrets."""
+    try:
+        return str(st.secrets.get("LOCAL_MIRROR", True)).lower() not in ("false", "0", "no", "off")
+    except FileNotFoundError:
+        return True
+
+def load(excel_file):
+    """
+    Read the mirrored copy of a library from local disk.
+    
+    The mirror is an uncompressed Arrow IPC file that is memory-mapped, so
+    loading it costs about as much as building the DataFrame.
+    
+    Args:
+        excel_file (str): Name of the Excel file
+    
+    Returns:
+        DataFrame or None: The library, or None if there is no usable mirror
+    """
+    import pyarrow.feather as feather
+    from utils.data_manager import _from_arrow
+    
+    path = _path(excel_file, '.arrow')
+    if not os.path.exists(path) or stamp(excel_file) is None:
+        return None
+    try:
+        with span('mirror.read', file=excel_file):
+            return _from_arrow(feather.read_table(path, memory_map=True))
+    except Exception as e:
+        logging.warning(f"Ignoring unreadable mirror of {excel_file}: {str(e)}")
+        return None
+
+def save(excel_file, df, drive_stamp):
+    """
+    Replace the mirrored copy of a library.
+    
+    The data file is written before its stamp, both through atomic renames,
+    so a reader never pairs a stamp with older data than it describes.
+    
+    Args:
+        excel_file (str): Name of the Excel file
+        df (DataFrame): Library as loaded from or written to Drive
+        drive_stamp (dict): Drive file name -> modifiedTime the library reflects
+    
+    Returns:
+        bool: True if the mirror was written
+    """
+    import pyarrow.feather as feather
+    from utils.data_manager import _to_arrow
+    
+    try:
+        with span('mirror.write', file=excel_file):
+            table = _to_arrow(df)
+            _replace(_path(excel_file, '.arrow'), lambda path: feather.write_feather(table, path, compression='uncompressed'))
+            meta = json.dumps({'stamp': drive_stamp, 'mirrored_at': time.time()})
+            _replace(_path(excel_file, '.json'), lambda path: _write_text(path, meta))
+        return True
+    except Exception as e:
+        logging.warning(f"Could not write the local mirror of {excel_file}: {str(e)}")
+        return False
+
+def stamp(excel_file):
+    """
+    Return the Drive modified times the mirrored library reflects.
+    
+    Args:
+        excel_file (str): Name of the Excel file
+    
+    Returns:
+        dict or None: Drive file name -> modifiedTime, None without a mirror
+    """
+    try:
+        with open(_path(excel_file, '.json'), encoding='utf-8') as f:
+            return json.load(f)['stamp']
+    except (OSError, ValueError, KeyError):
+        return None
+
+def discard(excel_file):
+    """
+    Delete the mirrored copy of a library, e.g. to force the next load from Drive.
+    
+    Args:
+        excel_file (str): Name of the Excel file
+    """
+    for suffix in ('.json', '.arrow'):
+        try:
+            os.remove(_path(excel_file, suffix))
+        except FileNotFoundError:
+            pass
+
+def watch(excel_file, synced=False):
+    """
+    Keep a library's mirror reconciled with Drive in the background.
+    
+    Args:
+        excel_file (str): Name of the Excel file
+        synced (bool): True if the mirror was just written from Drive; otherwise
+            a reconciliation is scheduled now unless one ran within SYNC_INTERVAL
+    """
+    now = time.monotonic()
+    with _lock:
+        entry = _entries.setdefault(excel_file, _new_entry())
+        if synced:
+            entry['synced_at'] = now
+            entry['due'] = now + SYNC_INTERVAL
+        elif now - entry['synced_at'] > SYNC_INTERVAL:
+            entry['due'] = now
+        _ensure_worker()
+        _wakeup.notify_all()
+
+def request_sync(excel_file, adopt=True):
+    """
+    Reconcile a library's mirror with Drive as soon as possible.
+    
+    Args:
+        excel_file (str): Name of the Excel file
+        adopt (bool): False after this process wrote the library itself, so the
+            refreshed mirror is not announced to sessions through generation()
+    """
+    with _lock:
+        entry = _entries.setdefault(excel_file, _new_entry())
+        entry['due'] = 0.0
+        entry['adopt'] = entry['adopt'] and adopt
+        _ensure_worker()
+        _wakeup.notify_all()
+
+def generation(excel_file):
+    """
+    Return a counter that increases whenever a reconciliation brought in changes made elsewhere.
+    
+    Sessions remember the value they loaded at and reload from the mirror once
+    it moves on.
+    
+    Args:
+        excel_file (str): Name of the Excel file
+    
+    Returns:
+        int: Generation of the mirrored library
+    """
+    with _lock:
+        entry = _entries.get(excel_file)
+        return entry['generation'] if entry else 0
+
+def _new_entry():
+    return {
+        'due': float('inf'),
+        'synced_at': float('-inf'),
+        'adopt': True,
+        'syncing': False,
+        'generation': 0,
+    }
+
+def _path(excel_file, suffix):
+    """Return the mirror file of excel_file in the configured Drive folder."""
+    try:
+        folder = st.secrets.get("GOOGLE_DRIVE_FOLDER_ID", "default")
+    except FileNotFoundError:
+        folder = "default"
+    directory = os.path.join(MIRROR_DIR, re.sub(r'[^\w.-]', '_', str(folder)))
+    return os.path.join(directory, re.sub(r'[^\w.-]', '_', excel_file) + suffix)
+
+def _replace(path, write):
+    """Call write(temporary path) and atomically move the result to path."""
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    fd, temporary = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    os.close(fd)
+    try:
+        write(temporary)
+        os.replace(temporary, path)
+    finally:
+        if os.path.exists(temporary):
+            os.remove(temporary)
+
+def _write_text(path, text):
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(text)
+
+def _ensure_worker():
+    """Start the background sync thread if it is not running. Caller holds _lock."""
+    global _worker
+    if _worker is None or not _worker.is_alive():
+        _worker = threading.Thread(target=_run, name="local-mirror", daemon=True)
+        _worker.start()
+
+def _run():
+    """Reconcile due libraries one at a time, forever."""
+    from utils.data_manager import sync_mirror
+    
+    while True:
+        with _lock:
+            excel_file, entry = _next_due()
+            while excel_file is None:
+                _wakeup.wait(_seconds_until_due())
+                excel_file, entry = _next_due()
+            adopt = entry['adopt']
+            entry['adopt'] = True
+            entry['due'] = float('inf')
+            entry['syncing'] = True
+        
+        try:
+            changed = sync_mirror(excel_file)
+            failed = False
+        except Exception as e:
+            logging.warning(f"Reconciling the local mirror of {excel_file} failed: {str(e)}")
+            changed, failed = False, True
+        
+        with _lock:
+            entry['syncing'] = False
+            if failed:
+                entry['due'] = min(entry['due'], time.monotonic() + RETRY_DELAY)
+            else:
+                entry['synced_at'] = time.monotonic()
+                if entry['due'] == float('inf'):  # unless another sync was requested meanwhile
+                    entry['due'] = entry['synced_at'] + SYNC_INTERVAL
+                if changed and adopt:
+                    entry['generation'] += 1
+                    logging.info(f"Local mirror of {excel_file} picked up changes from Google Drive")
+            _wakeup.notify_all()
+
+def _next_due():
+    """Return (excel_file, entry) for the first library whose sync is due. Caller holds _lock."""
+    now = time.monotonic()
+    for excel_file, entry in _entries.items():
+        if not entry['syncing'] and entry['due'] <= now:
+            return excel_file, entry
+    return None, None
+
+def _seconds_until_due():
+    """Return how long the worker may sleep before the next sync is due. Caller holds _lock."""
+    dues = [entry['due'] for entry in _entries.values() if not entry['syncing'] and entry['due'] != float('inf')]
+    return max(0.0, min(dues) - time.monotonic()) if dues else None
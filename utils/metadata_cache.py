@@ -0,0 +1,161 @@
+import sqlite3
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import closing, contextmanager
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+CACHE_DIR = os.environ.get(
+    'WCM_CACHE_DIR',
+    os.path.join(os.path.expanduser('~'), '.cache', 'web_content_manager')
+)
+CACHE_PATH = os.path.join(CACHE_DIR, 'metadata_cache.sqlite3')
+FRESH_TTL = 24 * 3600  # seconds an entry is served without revalidation
+EXPIRE_TTL = 30 * 24 * 3600  # seconds without access before an entry is evicted
+MAX_ENTRIES = 5000
+TRACKING_PARAMS = ('utm_', 'fbclid', 'gclid')
+
+_init_lock = threading.Lock()
+_initialized = False
+_stats = {'hits': 0, 'revalidated': 0, 'misses': 0}
+
+def normalize_url(url):
+    """
+    Normalize a URL for use as a cache key.
+    
+    Lowercases scheme and host, drops default ports, fragments and tracking
+    parameters, and sorts the query string.
+    
+    Args:
+        url (str): URL as entered by the user
+    
+    Returns:
+        str: Normalized URL
+    """
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or '').lower()
+    if parts.port and not ((scheme == 'http' and parts.port == 80) or (scheme == 'https' and parts.port == 443)):
+        host = f"{host}:{parts.port}"
+    query = sorted(
+        (k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+        if not k.lower().startswith(TRACKING_PARAMS)
+    )
+    return urlunsplit((scheme, host, parts.path or '/', urlencode(query), ''))
+
+def get(url):
+    """
+    Look up cached metadata for a URL.
+    
+    Args:
+        url (str): URL to look up
+    
+    Returns:
+        dict or None: title, description, keywords, etag, last_modified and
+        fresh (False once FRESH_TTL has passed and the entry needs revalidation)
+    """
+    key = normalize_url(url)
+    now = time.time()
+    try:
+        with _connect() as conn:
+            row = conn.execute(
+                "SELECT title, description, keywords, etag, last_modified, fetched_at "
+                "FROM metadata WHERE url = ? AND accessed_at > ?",
+                (key, now - EXPIRE_TTL)
+            ).fetchone()
+            if row is None:
+                _stats['misses'] += 1
+                return None
+            conn.execute("UPDATE metadata SET accessed_at = ? WHERE url = ?", (now, key))
+    except (sqlite3.Error, OSError) as e:
+        logging.warning(f"Metadata cache read failed: {str(e)}")
+        return None
+    
+    fresh = now - row[5] < FRESH_TTL
+    if fresh:
+        _stats['hits'] += 1
+    return {
+        'title': row[0],
+        'description': row[1],
+        'keywords': json.loads(row[2]),
+        'etag': row[3],
+        'last_modified': row[4],
+        'fresh': fresh,
+    }
+
+def put(url, title, description, keywords, etag=None, last_modified=None):
+    """
+    Store metadata for a URL and evict the least recently used entries over MAX_ENTRIES.
+    
+    Args:
+        url (str): URL the metadata belongs to
+        title (str): Page title
+        description (str): Meta description
+        keywords (list): Meta keywords
+        etag (str, optional): ETag response header
+        last_modified (str, optional): Last-Modified response header
+    """
+    now = time.time()
+    try:
+        with _connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO metadata "
+                "(url, title, description, keywords, etag, last_modified, fetched_at, accessed_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (normalize_url(url), title, description, json.dumps(keywords), etag, last_modified, now, now)
+            )
+            conn.execute("DELETE FROM metadata WHERE accessed_at <= ?", (now - EXPIRE_TTL,))
+            conn.execute(
+                "DELETE FROM metadata WHERE url IN ("
+                "SELECT url FROM metadata ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+                (MAX_ENTRIES,)
+            )
+    except (sqlite3.Error, OSError) as e:
+        logging.warning(f"Metadata cache write failed: {str(e)}")
+
+def mark_revalidated(url):
+    """
+    Record that the origin answered 304 Not Modified, making the entry fresh again.
+    
+    Args:
+        url (str): URL that was revalidated
+    """
+    _stats['revalidated'] += 1
+    try:
+        with _connect() as conn:
+            conn.execute("UPDATE metadata SET fetched_at = ? WHERE url = ?", (time.time(), normalize_url(url)))
+    except (sqlite3.Error, OSError) as e:
+        logging.warning(f"Metadata cache update failed: {str(e)}")
+
+def get_stats():
+    """
+    Return cache counters.
+    
+    Returns:
+        dict: hits (served without network), revalidated (304s) and misses
+    """
+    return dict(_stats)
+
+@contextmanager
+def _connect():
+    """Open a connection to the cache database in a transaction, creating the database on first use."""
+    global _initialized
+    if not _initialized:
+        with _init_lock:
+            if not _initialized:
+                os.makedirs(CACHE_DIR, exist_ok=True)
+                with closing(sqlite3.connect(CACHE_PATH, timeout=5)) as conn:
+                    conn.execute("PRAGMA journal_mode=WAL")
+                    conn.execute(
+                        "CREATE TABLE IF NOT EXISTS metadata ("
+                        "url TEXT PRIMARY KEY, title TEXT, description TEXT, keywords TEXT, "
+                        "etag TEXT, last_modified TEXT, fetched_at REAL, accessed_at REAL)"
+                    )
+                    conn.execute("CREATE INDEX IF NOT EXISTS metadata_accessed ON metadata (accessed_at)")
+                    conn.commit()
+                _initialized = True
+    with closing(sqlite3.connect(CACHE_PATH, timeout=5)) as conn:
+        with conn:
+            yield conn
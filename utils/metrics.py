@@ -0,0 +1,167 @@
+import json
+import logging
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from functools import wraps
+
+# Upper bounds of the histogram buckets in milliseconds; the last bucket is open-ended
+BUCKETS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000, 30000)
+SLOW_SPAN_SECONDS = 2.0  # spans slower than this are logged as warnings
+LOG_PREVIEW_CHARS = 200  # longest value written to a log line by clip()
+
+# operation name -> histogram, see _new_histogram()
+_histograms = {}
+_lock = threading.Lock()
+_started = datetime.now(timezone.utc)
+
+@contextmanager
+def span(name, **fields):
+    """
+    Time a block of code and add it to the histogram of operation name.
+    
+    Spans are process-wide, so work done by background threads (saves) and
+    by every session ends up in the same histograms. Failed blocks are
+    counted as errors and re-raised.
+    
+    Args:
+        name (str): Operation name, e.g. 'drive.upload'
+        **fields: Context written to the debug log line, e.g. the file name
+    """
+    started = time.perf_counter()
+    failed = False
+    try:
+        yield
+    except BaseException:
+        failed = True
+        raise
+    finally:
+        seconds = time.perf_counter() - started
+        _record(name, seconds, failed)
+        slow = seconds >= SLOW_SPAN_SECONDS
+        if slow or logging.getLogger().isEnabledFor(logging.DEBUG):
+            details = ''.join(f" {key}={clip(value)}" for key, value in fields.items())
+            if slow:
+                logging.warning(f"Slow {name}: {seconds * 1000:.0f} ms{details}")
+            else:
+                logging.debug(f"{name}: {seconds * 1000:.1f} ms{details}")
+
+def timed(name):
+    """
+    Decorate a function so every call is recorded as a span.
+    
+    Args:
+        name (str): Operation name
+    
+    Returns:
+        callable: Decorator
+    """
+    def decorator(function):
+        @wraps(function)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorator
+
+def get_metrics():
+    """
+    Return a summary of every operation recorded so far.
+    
+    Returns:
+        dict: Operation name -> count, errors, total_ms, mean_ms, max_ms,
+        p50_ms and p95_ms (upper bound of the bucket holding that percentile)
+        and buckets (count per BUCKETS_MS bound, '+Inf' for the rest)
+    """
+    with _lock:
+        histograms = {name: dict(values, counts=list(values['counts'])) for name, values in _histograms.items()}
+    summary = {}
+    for name, values in sorted(histograms.items()):
+        count = values['count']
+        summary[name] = {
+            'count': count,
+            'errors': values['errors'],
+            'total_ms': values['total'] * 1000,
+            'mean_ms': values['total'] * 1000 / count if count else 0.0,
+            'max_ms': values['max'] * 1000,
+            'p50_ms': _percentile(values['counts'], count, 0.50, values['max']),
+            'p95_ms': _percentile(values['counts'], count, 0.95, values['max']),
+            'buckets': dict(zip([str(bound) for bound in BUCKETS_MS] + ['+Inf'], values['counts'])),
+        }
+    return summary
+
+def dump_metrics(**extra):
+    """
+    Serialize the span histograms and any other counters as JSON.
+    
+    Args:
+        **extra: Additional sections, e.g. transfers=get_transfer_stats()
+    
+    Returns:
+        str: JSON document with the collection window, spans and extra sections
+    """
+    return json.dumps({
+        'since': _started.isoformat(timespec='seconds'),
+        'dumped': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'spans': get_metrics(),
+        **extra
+    }, indent=1, default=str)
+
+def reset_metrics():
+    """Drop all recorded spans and start a new collection window."""
+    global _started
+    with _lock:
+        _histograms.clear()
+        _started = datetime.now(timezone.utc)
+
+def clip(value, limit=LOG_PREVIEW_CHARS):
+    """
+    Shorten a value for a log line.
+    
+    DataFrames are described by their shape instead of their contents, and
+    other values are cut to limit characters.
+    
+    Args:
+        value: Anything to log
+        limit (int): Longest text to keep
+    
+    Returns:
+        str: Text safe to put in a log line
+    """
+    if hasattr(value, 'shape') and hasattr(value, 'columns'):
+        return f"<DataFrame {value.shape[0]} rows x {value.shape[1]} columns>"
+    text = str(value)
+    if len(text) > limit:
+        return f"{text[:limit]}... ({len(text)} chars)"
+    return text
+
+def _new_histogram():
+    """Return empty counters for one operation."""
+    return {'count': 0, 'errors': 0, 'total': 0.0, 'max': 0.0, 'counts': [0] * (len(BUCKETS_MS) + 1)}
+
+def _record(name, seconds, failed):
+    """Add one finished span to its histogram."""
+    bucket = bisect_left(BUCKETS_MS, seconds * 1000)
+    with _lock:
+        values = _histograms.get(name)
+        if values is None:
+            values = _histograms[name] = _new_histogram()
+        values['count'] += 1
+        values['errors'] += failed
+        values['total'] += seconds
+        values['max'] = max(values['max'], seconds)
+        values['counts'][bucket] += 1
+
+def _percentile(counts, total, fraction, largest):
+    """Estimate a percentile in milliseconds from bucket counts."""
+    if not total:
+        return 0.0
+    needed = fraction * total
+    seen = 0
+    for bound, count in zip(BUCKETS_MS, counts):
+        seen += count
+        if seen >= needed:
+            return float(min(bound, largest * 1000))
+    return largest * 1000
@@ -0,0 +1,416 @@
+import re
+import numpy as np
+import pandas as pd
+from bisect import bisect_left, insort
+from utils.tag_codes import tag_codes, decode_tags
+
+TOKEN_PATTERN = re.compile(r"\w+")
+INDEXED_FIELDS = ('title', 'url', 'description')
+
+def tokenize(text):
+    """
+    Split text into lowercase word tokens.
+    
+    Args:
+        text (str): Text to tokenize
+    
+    Returns:
+        list: Tokens in order of appearance
+    """
+    return TOKEN_PATTERN.findall(str(text).lower()) if text else []
+
+class SearchIndex:
+    """
+    In-memory inverted index from tokens to link URLs.
+    
+    Title, URL, description and tags are tokenized into one posting list per
+    token. A sorted vocabulary supports prefix matches, and queries with
+    several terms return links that match all of them.
+    """
+    
+    def __init__(self):
+        self._postings = {}  # token -> set of URLs
+        self._doc_tokens = {}  # URL -> set of tokens, used to undo an add
+        self._vocab = []  # sorted tokens for prefix lookups
+    
+    @classmethod
+    def from_frame(cls, df):
+        """
+        Build an index for every row of a links DataFrame.
+        
+        Args:
+            df (DataFrame): Links with url, title, description and tags columns
+        
+        Returns:
+            SearchIndex: Populated index
+        """
+        index = cls()
+        if df is None or df.empty:
+            return index
+        columns = [df[field] if field in df.columns else [''] * len(df) for field in INDEXED_FIELDS]
+        tags = decode_tags(df['tags']) if 'tags' in df.columns else [[]] * len(df)
+        for title, url, description, link_tags in zip(*columns, tags):
+            index._add(url, title, description, link_tags)
+        index._vocab = sorted(index._postings)
+        return index
+    
+    def __len__(self):
+        return len(self._doc_tokens)
+    
+    def add(self, url, title, description, tags):
+        """
+        Index a link, replacing any previous entry for the same URL.
+        
+        Args:
+            url (str): URL of the link
+            title (str): Title of the link
+            description (str): Description of the link
+            tags (list): Tags of the link
+        """
+        self.remove(url)
+        for token in self._add(url, title, description, tags):
+            if len(self._postings[token]) == 1:
+                insort(self._vocab, token)
+    
+    def remove(self, url):
+        """
+        Remove a link from the index. Unknown URLs are ignored.
+        
+        Args:
+            url (str): URL of the link
+        """
+        for token in self._doc_tokens.pop(url, ()):
+            urls = self._postings[token]
+            urls.discard(url)
+            if not urls:
+                del self._postings[token]
+                pos = bisect_left(self._vocab, token)
+                if pos < len(self._vocab) and self._vocab[pos] == token:
+                    del self._vocab[pos]
+    
+    def search(self, query):
+        """
+        Find links matching every term of a query by token prefix.
+        
+        Args:
+            query (str): Free-text query, e.g. "pyth tutor"
+        
+        Returns:
+            set or None: Matching URLs, or None if the query has no terms
+        """
+        terms = sorted(set(tokenize(query)), key=len, reverse=True)
+        if not terms:
+            return None
+        result = None
+        for term in terms:
+            matches = self._match_prefix(term)
+            result = matches if result is None else result & matches
+            if not result:
+                return set()
+        return result
+    
+    def _add(self, url, title, description, tags):
+        """Add posting entries for a link and return its tokens."""
+        tag_text = ' '.join(map(str, tags)) if isinstance(tags, list) else ''
+        tokens = set(TOKEN_PATTERN.findall(f"{title} {url} {description} {tag_text}".lower()))
+        postings = self._postings
+        for token in tokens:
+            urls = postings.get(token)
+            if urls is None:
+                postings[token] = {url}
+            else:
+                urls.add(url)
+        self._doc_tokens[url] = tokens
+        return tokens
+    
+    def _match_prefix(self, term):
+        """Return the URLs of every token that starts with term."""
+        matches = set()
+        pos = bisect_left(self._vocab, term)
+        while pos < len(self._vocab) and self._vocab[pos].startswith(term):
+            matches |= self._postings[self._vocab[pos]]
+            pos += 1
+        return matches
+
+class TagIndex:
+    """
+    Tag vocabulary with one packed membership bitmap per tag.
+    
+    Bit i of a tag's bitmap is set when row position i of the links DataFrame
+    carries that tag, so tag filters are vectorized OR/AND operations over
+    bitmaps instead of a Python lambda per row.
+    """
+    
+    def __init__(self):
+        self._tag_ids = {}  # tag -> column in _bitmaps
+        self._tags = []  # tag id -> tag
+        self._counts = []  # tag id -> rows carrying the tag
+        self._bitmaps = []  # tag id -> np.uint8 array of packed row bits
+        self._row_tags = []  # row position -> tuple of tag ids
+        self._capacity = 0  # bytes allocated per bitmap
+        self._vocabulary = None
+    
+    @classmethod
+    def from_frame(cls, df):
+        """
+        Build bitmaps for every row of a links DataFrame.
+        
+        Args:
+            df (DataFrame): Links with a tags column
+        
+        Returns:
+            TagIndex: Populated index
+        """
+        index = cls()
+        n = 0 if df is None else len(df)
+        index._capacity = _bitmap_bytes(n)
+        if not n or 'tags' not in df.columns:
+            index._row_tags = [()] * n
+            return index
+        
+        # Work on the flat tag codes: rows[k] is the row of the k-th code
+        codes, offsets, vocabulary = tag_codes(df['tags'])
+        code_list = codes.tolist()
+        index._row_tags = [tuple(code_list[offsets[i]:offsets[i + 1]]) for i in range(n)]
+        rows = np.repeat(np.arange(n), np.diff(offsets))
+        order = np.argsort(codes, kind='stable')
+        bounds = np.searchsorted(codes[order], np.arange(len(vocabulary) + 1))
+        for tag_id, tag in enumerate(vocabulary):
+            index._tag_id(tag)
+            bits = np.zeros(index._capacity * 8, dtype=bool)
+            bits[rows[order[bounds[tag_id]:bounds[tag_id + 1]]]] = True
+            index._bitmaps[tag_id] = np.packbits(bits)
+            index._counts[tag_id] = int(bounds[tag_id + 1] - bounds[tag_id])
+        return index
+    
+    def __len__(self):
+        return len(self._row_tags)
+    
+    @property
+    def vocabulary(self):
+        """Sorted list of tags used by at least one link."""
+        if self._vocabulary is None:
+            self._vocabulary = sorted(tag for tag, count in zip(self._tags, self._counts) if count)
+        return self._vocabulary
+    
+    def set_row(self, pos, tags):
+        """
+        Set the tags of a row, appending it when pos equals the current row count.
+        
+        Args:
+            pos (int): Row position in the DataFrame
+            tags (list): Tags of the row
+        """
+        if pos == len(self._row_tags):
+            self._row_tags.append(())
+            if _bitmap_bytes(pos + 1) > self._capacity:
+                self._grow(_bitmap_bytes(max(2 * len(self._row_tags), 64)))
+        for tag_id in self._row_tags[pos]:
+            self._set_bit(tag_id, pos, False)
+        ids = tuple(self._tag_id(tag) for tag in _clean_tags(tags))
+        for tag_id in ids:
+            self._set_bit(tag_id, pos, True)
+        self._row_tags[pos] = ids
+        self._vocabulary = None
+    
+    def delete_rows(self, keep):
+        """
+        Drop rows and shift the remaining rows up, as boolean indexing does on the DataFrame.
+        
+        Args:
+            keep (array-like): Boolean mask over current rows, True for rows to keep
+        """
+        keep = np.asarray(keep, dtype=bool)
+        n = len(self._row_tags)
+        kept = int(keep.sum())
+        self._row_tags = [ids for ids, k in zip(self._row_tags, keep) if k]
+        capacity = _bitmap_bytes(kept)
+        for tag_id, bitmap in enumerate(self._bitmaps):
+            bits = np.unpackbits(bitmap, count=n).astype(bool)[keep]
+            self._counts[tag_id] = int(bits.sum())
+            self._bitmaps[tag_id] = _pad(np.packbits(bits), capacity)
+        self._capacity = capacity
+        self._vocabulary = None
+    
+    def mask(self, tags, match='any'):
+        """
+        Return a boolean row mask for links carrying the given tags.
+        
+        Args:
+            tags (list): Tags to filter by
+            match (str): 'any' for links with at least one tag, 'all' for links with every tag
+        
+        Returns:
+            np.ndarray: Boolean mask aligned with the DataFrame rows
+        """
+        n = len(self._row_tags)
+        bitmaps = [self._bitmaps[self._tag_ids[tag]] for tag in tags if tag in self._tag_ids]
+        if match == 'all' and len(bitmaps) < len(set(tags)):
+            return np.zeros(n, dtype=bool)
+        if not bitmaps:
+            return np.zeros(n, dtype=bool)
+        combine = np.bitwise_and if match == 'all' else np.bitwise_or
+        return np.unpackbits(combine.reduce(bitmaps), count=n).astype(bool)
+    
+    def _tag_id(self, tag):
+        """Return the id of a tag, adding an empty bitmap for new tags."""
+        tag_id = self._tag_ids.get(tag)
+        if tag_id is None:
+            tag_id = len(self._tags)
+            self._tag_ids[tag] = tag_id
+            self._tags.append(tag)
+            self._counts.append(0)
+            self._bitmaps.append(np.zeros(self._capacity, dtype=np.uint8))
+        return tag_id
+    
+    def _set_bit(self, tag_id, pos, value):
+        """Set or clear the bit for row pos in a tag's bitmap."""
+        bit = np.uint8(0x80 >> (pos & 7))
+        bitmap = self._bitmaps[tag_id]
+        if value:
+            bitmap[pos >> 3] |= bit
+            self._counts[tag_id] += 1
+        else:
+            bitmap[pos >> 3] &= ~bit
+            self._counts[tag_id] -= 1
+    
+    def _grow(self, capacity):
+        """Reallocate every bitmap to capacity bytes."""
+        self._bitmaps = [_pad(bitmap, capacity) for bitmap in self._bitmaps]
+        self._capacity = capacity
+
+class UrlIndex:
+    """
+    Hash index from URL to row position, with a monotonic link ID counter.
+    
+    URLs are matched exactly as saved, like change records are applied, so
+    https://x/doc and https://x/doc#section-2 are separate links.
+    """
+    
+    def __init__(self, positions=None, next_id=1):
+        self._positions = positions or {}
+        self._next_id = next_id
+    
+    @classmethod
+    def from_frame(cls, df):
+        """
+        Index the URLs of a links DataFrame. The first row wins for duplicate URLs.
+        
+        Args:
+            df (DataFrame): Links with url and id columns
+        
+        Returns:
+            UrlIndex: Populated index
+        """
+        if df is None or df.empty or 'url' not in df.columns:
+            return cls()
+        positions = {}
+        for pos, url in enumerate(df['url']):
+            positions.setdefault(str(url), pos)
+        max_id = pd.to_numeric(df['id'], errors='coerce').max() if 'id' in df.columns else None
+        return cls(positions, int(max_id) + 1 if pd.notna(max_id) else 1)
+    
+    def lookup(self, url):
+        """
+        Return the row position of a URL, or None if it is not in the library.
+        
+        Args:
+            url (str): URL as entered by the user
+        
+        Returns:
+            int or None: Row position
+        """
+        return self._positions.get(url)
+    
+    def add(self, url, pos):
+        """Record the row position of a URL."""
+        self._positions[url] = pos
+    
+    def allocate_id(self):
+        """Return the next unused link ID."""
+        link_id = self._next_id
+        self._next_id += 1
+        return link_id
+    
+    def delete_rows(self, keep):
+        """
+        Drop deleted rows and renumber the remaining positions.
+        
+        Args:
+            keep (array-like): Boolean mask over current rows, True for rows to keep
+        """
+        keep = np.asarray(keep, dtype=bool)
+        new_positions = np.cumsum(keep) - 1
+        self._positions = {
+            key: int(new_positions[pos]) for key, pos in self._positions.items()
+            if pos < len(keep) and keep[pos]
+        }
+
+class LibraryIndex:
+    """
+    Search, tag and URL indexes for one library, kept in step with its DataFrame.
+    
+    Attributes:
+        text (SearchIndex): Full-text index keyed by URL
+        tags (TagIndex): Tag bitmaps keyed by row position
+        urls (UrlIndex): Row position and ID allocation keyed by URL
+    """
+    
+    def __init__(self, text, tags, urls):
+        self.text = text
+        self.tags = tags
+        self.urls = urls
+    
+    @classmethod
+    def from_frame(cls, df):
+        """Build all indexes for a links DataFrame."""
+        return cls(SearchIndex.from_frame(df), TagIndex.from_frame(df), UrlIndex.from_frame(df))
+    
+    def __len__(self):
+        return len(self.tags)
+    
+    def upsert(self, pos, url, title, description, tags):
+        """
+        Index a link saved at row position pos.
+        
+        Args:
+            pos (int): Row position of the link in the DataFrame
+            url (str): URL of the link
+            title (str): Title of the link
+            description (str): Description of the link
+            tags (list): Tags of the link
+        """
+        self.text.add(url, title, description, tags)
+        self.tags.set_row(pos, tags)
+        self.urls.add(url, pos)
+    
+    def remove(self, urls, keep):
+        """
+        Remove deleted links.
+        
+        Args:
+            urls (list): URLs of the deleted links
+            keep (array-like): Boolean mask over the rows before deletion, True for rows kept
+        """
+        for url in urls:
+            self.text.remove(url)
+        self.tags.delete_rows(keep)
+        self.urls.delete_rows(keep)
+
+def _clean_tags(tags):
+    """Return the non-empty, stripped tags of a row, without duplicates."""
+    if not isinstance(tags, list):
+        return []
+    return list(dict.fromkeys(str(tag).strip() for tag in tags if str(tag).strip()))
+
+def _bitmap_bytes(rows):
+    """Return the bytes needed for a bitmap covering rows bits."""
+    return (rows + 7) // 8
+
+def _pad(bitmap, capacity):
+    """Resize a packed bitmap to capacity bytes, zero-filling new bytes."""
+    if len(bitmap) >= capacity:
+        return bitmap[:capacity].copy()
+    padded = np.zeros(capacity, dtype=np.uint8)
+    padded[:len(bitmap)] = bitmap
+    return padded
@@ -0,0 +1,487 @@
+import json
+import os
+import re
+import sqlite3
+import threading
+from collections import defaultdict
+from contextlib import closing, contextmanager
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import streamlit as st
+from utils.library_version import library_version
+from utils.metadata_cache import CACHE_DIR
+from utils.metrics import span
+from utils.search_index import tokenize
+from utils.tag_codes import decode_tags, encode_tags
+
+DATABASE_DIR = os.path.join(CACHE_DIR, 'libraries')
+BACKUP_INTERVAL = 300.0  # seconds between Google Drive backups of a changed database
+LINK_FIELDS = ('id', 'url', 'title', 'description', 'created_at', 'updated_at')
+# sort column -> SQL expression, each backed by an index so a page never sorts the whole library
+SORT_EXPRESSIONS = {
+    'created_at': "coalesce(created_at, '')",
+    'updated_at': "coalesce(updated_at, '')",
+    'title': "lower(coalesce(title, ''))",
+}
+
+# excel_file -> (generation, DataFrame) last loaded, shared by every session in the process
+_frames = {}
+# excel_file -> (generation, library_version) of the last write made by this process
+_last_write = {}
+_lock = threading.Lock()
+_initialized = set()
+
+def enabled():
+    """Return True if STORAGE_ENGINE = "sqlite" is set in secrets."""
+    try:
+        return str(st.secrets.get("STORAGE_ENGINE", "dataframe")).lower() == "sqlite"
+    except FileNotFoundError:
+        return False
+
+def load(excel_file):
+    """
+    Read a library from its local database.
+    
+    The frame is built once per database generation and shared by every
+    session through shallow copies, so sessions do not each hold a copy.
+    
+    Args:
+        excel_file (str): Name of the Excel file
+    
+    Returns:
+        DataFrame or None: The library, or None if there is no database yet
+    """
+    if not os.path.exists(_database_path(excel_file)):
+        return None
+    with span('database.load', file=excel_file):
+        with _connect(excel_file) as conn:
+            conn.execute("BEGIN")  # read links and tags from the same generation
+            generation = _generation(conn)
+            with _lock:
+                cached = _frames.get(excel_file)
+            if cached is None or cached[0] != generation:
+                cached = generation, _read_frame(conn)
+                with _lock:
+                    _frames[excel_file] = cached
+    # Shallow copy: LinkStore copies the frame before its first in-place edit
+    return cached[1].copy(deep=False)
+
+def replace(excel_file, df):
+    """
+    Replace the contents of a library's database with a DataFrame.
+    
+    Rows keep their order; for a URL that occurs more than once the first row wins.
+    
+    Args:
+        excel_file (str): Name of the Excel file
+        df (DataFrame): Library to store
+    
+    Returns:
+        int: Generation of the database after the write
+    """
+    with span('database.replace', file=excel_file, rows=len(df)):
+        df = df.drop_duplicates('url') if 'url' in df.columns else df
+        tags = decode_tags(df['tags']) if 'tags' in df.columns else [[]] * len(df)
+        columns = [df[field].tolist() if field in df.columns else [None] * len(df) for field in LINK_FIELDS]
+        links = [[seq] + [_sql_value(value) for value in row] for seq, row in enumerate(zip(*columns), start=1)]
+        taken = {link[1] for link in links}
+        # Links without an ID, or sharing one, get fresh IDs as _insert_link() would
+        next_id = max((link_id for link_id in taken if link_id is not None), default=0) + 1
+        seen = set()
+        for link in links:
+            if link[1] is None or link[1] in seen:
+                link[1] = next_id
+                next_id += 1
+            seen.add(link[1])
+        
+        with _connect(excel_file) as conn:
+            for table in ('links', 'tags', 'link_tags', 'links_fts'):
+                conn.execute(f"DELETE FROM {table}")
+            conn.executemany(
+                f"INSERT INTO links (seq, {', '.join(LINK_FIELDS)}) VALUES ({', '.join('?' * (len(LINK_FIELDS) + 1))})",
+                links
+            )
+            vocabulary = sorted({tag for row_tags in tags for tag in row_tags})  # decode_tags() cleaned them
+            conn.executemany("INSERT INTO tags (id, name) VALUES (?, ?)", enumerate(vocabulary, start=1))
+            tag_ids = {tag: tag_id for tag_id, tag in enumerate(vocabulary, start=1)}
+            conn.executemany(
+                "INSERT INTO link_tags (link, tag, position) VALUES (?, ?, ?)",
+                [(seq, tag_ids[tag], position) for seq, row_tags in enumerate(tags, start=1) for position, tag in enumerate(row_tags)]
+            )
+            conn.execute(
+                "INSERT INTO links_fts (rowid, title, description, url, tags) "
+                "SELECT seq, title, description, url, ("
+                "SELECT group_concat(tags.name, ' ') FROM link_tags JOIN tags ON tags.id = link_tags.tag "
+                "WHERE link_tags.link = links.seq) FROM links"
+            )
+            return _bump_generation(conn)
+
+def record(excel_file, changes, df=None):
+    """
+    Apply change records from data_manager.make_change() to a library's database.
+    
+    As in data_manager.apply_changes(), only the last change per URL counts:
+    updated links keep their place, deleted links are dropped and new links
+    are appended, with a fresh ID if theirs is already taken.
+    
+    Args:
+        excel_file (str): Name of the Excel file
+        changes (list): Change records, oldest first
+        df (DataFrame, optional): Session frame the changes were applied to;
+            a session holding it does not need to reload, see current_generation()
+    
+    Returns:
+        int: Generation of the database after the write
+    """
+    final = {}
+    for change in changes:
+        final[change['url']] = None if change['op'] == 'delete' else change.get('row', {})
+    
+    with span('database.write', file=excel_file, changes=len(changes)):
+        with _connect(excel_file) as conn:
+            for url, row in final.items():
+                found = conn.execute("SELECT seq FROM links WHERE url = ?", (url,)).fetchone()
+                if row is None:
+                    if found:
+                        _delete_link(conn, found[0])
+                elif found:
+                    _update_link(conn, found[0], row)
+                else:
+                    _insert_link(conn, dict(row, url=url), row.get('tags') or [])
+            generation = _bump_generation(conn)
+    if df is not None:
+        with _lock:
+            _last_write[excel_file] = (generation, library_version(df))
+    return generation
+
+def discard(excel_file):
+    """
+    Delete a library's database, e.g. to seed it from Google Drive again on the next load.
+    
+    Args:
+        excel_file (str): Name of the Excel file
+    """
+    path = _database_path(excel_file)
+    with _lock:
+        _frames.pop(excel_file, None)
+        _last_write.pop(excel_file, None)
+        _initialized.discard(path)
+    for suffix in ('', '-wal', '-shm'):
+        try:
+            os.remove(path + suffix)
+        except FileNotFoundError:
+            pass
+
+def generation(excel_file):
+    """
+    Return a counter that increases with every write to a library's database.
+    
+    It is kept in the database, so writes from other processes count too.
+    
+    Args:
+        excel_file (str): Name of the Excel file
+    
+    Returns:
+        int: Generation, 0 if there is no database yet
+    """
+    if not os.path.exists(_database_path(excel_file)):
+        return 0
+    with _connect(excel_file) as conn:
+        return _generation(conn)
+
+def current_generation(excel_file, df, seen):
+    """
+    Check whether a session's frame still matches the database.
+    
+    It does if nothing was written since the session loaded at generation
+    seen, or if the one write since was recorded from that frame itself.
+    
+    Args:
+        excel_file (str): Name of the Excel file
+        df (DataFrame): Library in session state
+        seen (int): Generation the session last loaded or confirmed
+    
+    Returns:
+        int or None: Generation the frame matches, None if the session must reload
+    """
+    current = generation(excel_file)
+    if current == seen:
+        return current
+    with _lock:
+        last_write = _last_write.get(excel_file)
+    if seen is not None and current == seen + 1 and last_write == (current, library_version(df)):
+        return current
+    return None
+
+def count_matches(excel_file, query='', tags=(), match='any'):
+    """
+    Count the links matching a search query and tag filter.
+    
+    Args:
+        excel_file (str): Name of the Excel file
+        query (str): Search text, may be empty
+        tags (tuple): Tags to filter by, may be empty
+        match (str): 'any' or 'all' of the tags
+    
+    Returns:
+        int: Number of matching links
+    """
+    where, params = _filter_clause(query, tags, match)
+    with span('search.database'):
+        with _connect(excel_file) as conn:
+            return conn.execute(f"SELECT COUNT(*) FROM links {where}", params).fetchone()[0]
+
+def page(excel_file, query, tags, match, column, ascending, number, size):
+    """
+    Return one page of the links matching a search query and tag filter.
+    
+    Search runs against the FTS5 index by token prefix, tag filters against
+    the link_tags join table and ordering against the sort indexes, so only
+    the rows of the page are read.
+    
+    Args:
+        excel_file (str): Name of the Excel file
+        query, tags, match: Filter, as for count_matches()
+        column (str): Key of SORT_EXPRESSIONS
+        ascending (bool): Sort direction
+        number (int): Page number, starting at 1
+        size (int): Links per page
+    
+    Returns:
+        DataFrame: id, title, url, description, tags (comma-separated) and created_at of the page
+    """
+    where, params = _filter_clause(query, tags, match)
+    direction = 'ASC' if ascending else 'DESC'
+    with span('search.database_page'):
+        with _connect(excel_file) as conn:
+            conn.execute("BEGIN")
+            rows = conn.execute(
+                f"SELECT seq, id, title, url, description, created_at FROM links {where} "
+                f"ORDER BY {SORT_EXPRESSIONS[column]} {direction}, seq {direction} LIMIT ? OFFSET ?",
+                params + [size, (number - 1) * size]
+            ).fetchall()
+            link_tags = _tags_of(conn, [row[0] for row in rows])
+    page_df = pd.DataFrame([row[1:] for row in rows], columns=['id', 'title', 'url', 'description', 'created_at'])
+    page_df.insert(4, 'tags', [', '.join(link_tags.get(row[0], [])) for row in rows])
+    return page_df
+
+def tag_vocabulary(excel_file):
+    """
+    Return the sorted tags used by at least one link.
+    
+    Args:
+        excel_file (str): Name of the Excel file
+    
+    Returns:
+        list: Tags
+    """
+    with _connect(excel_file) as conn:
+        rows = conn.execute("SELECT name FROM tags WHERE id IN (SELECT tag FROM link_tags) ORDER BY name").fetchall()
+    return [row[0] for row in rows]
+
+def count(excel_file):
+    """
+    Return the number of links in a library's database.
+    
+    Args:
+        excel_file (str): Name of the Excel file
+    
+    Returns:
+        int: Number of links
+    """
+    with _connect(excel_file) as conn:
+        return conn.execute("SELECT COUNT(*) FROM links").fetchone()[0]
+
+def urls_for_ids(excel_file, ids):
+    """
+    Return the URLs of links by ID.
+    
+    Args:
+        excel_file (str): Name of the Excel file
+        ids (iterable): Link IDs
+    
+    Returns:
+        list: URLs of the links that exist
+    """
+    with _connect(excel_file) as conn:
+        rows = conn.execute(
+            "SELECT url FROM links WHERE id IN (SELECT value FROM json_each(?)) ORDER BY seq",
+            (json.dumps([int(link_id) for link_id in ids]),)
+        ).fetchall()
+    return [row[0] for row in rows]
+
+def _read_frame(conn):
+    """Build a links DataFrame from the database in row order."""
+    rows = conn.execute(f"SELECT seq, {', '.join(LINK_FIELDS)} FROM links ORDER BY seq").fetchall()
+    tag_rows = conn.execute(
+        "SELECT link_tags.link, tags.name FROM link_tags JOIN tags ON tags.id = link_tags.tag "
+        "ORDER BY link_tags.link, link_tags.position"
+    ).fetchall()
+    df = pd.DataFrame([row[1:] for row in rows], columns=list(LINK_FIELDS))
+    df['id'] = pd.array(df['id'], dtype='Int64')
+    for field in LINK_FIELDS[1:]:
+        df[field] = df[field].fillna('')
+    
+    # Both lists are ordered by seq, so each link's tags are one slice of tag_rows
+    seqs = np.array([row[0] for row in rows], dtype=np.int64)
+    tag_links = np.array([row[0] for row in tag_rows], dtype=np.int64)
+    offsets = np.append(np.searchsorted(tag_links, seqs), len(tag_links)).astype(np.int32)
+    names = pa.array([row[1] for row in tag_rows], type=pa.string())
+    df.insert(4, 'tags', encode_tags(pa.ListArray.from_arrays(offsets, names), index=df.index))
+    return df
+
+def _tags_of(conn, seqs):
+    """Return link seq -> tags in their saved order for the links seqs."""
+    rows = conn.execute(
+        "SELECT link_tags.link, tags.name FROM link_tags JOIN tags ON tags.id = link_tags.tag "
+        "WHERE link_tags.link IN (SELECT value FROM json_each(?)) ORDER BY link_tags.link, link_tags.position",
+        (json.dumps(seqs),)
+    )
+    link_tags = defaultdict(list)
+    for link, name in rows:
+        link_tags[link].append(name)
+    return link_tags
+
+def _filter_clause(query, tags, match):
+    """Return (WHERE clause, parameters) selecting links that match a search and tag filter."""
+    clauses, params = [], []
+    terms = tokenize(query)
+    if terms:
+        clauses.append("seq IN (SELECT rowid FROM links_fts WHERE links_fts MATCH ?)")
+        params.append(' AND '.join(f'"{term}"*' for term in terms))
+    if tags:
+        tag_links = (
+            "SELECT link_tags.link FROM link_tags JOIN tags ON tags.id = link_tags.tag "
+            "WHERE tags.name IN (SELECT value FROM json_each(?))"
+        )
+        params.append(json.dumps(sorted(set(tags))))
+        if match == 'all':
+            tag_links += " GROUP BY link_tags.link HAVING COUNT(*) = ?"
+            params.append(len(set(tags)))
+        clauses.append(f"seq IN ({tag_links})")
+    return (f"WHERE {' AND '.join(clauses)}" if clauses else ""), params
+
+def _insert_link(conn, row, tags):
+    """Append a link with its tags and search entry, giving it a fresh ID if its own is taken."""
+    values = {field: _sql_value(row.get(field)) for field in LINK_FIELDS}
+    if values['id'] is None or conn.execute("SELECT 1 FROM links WHERE id = ?", (values['id'],)).fetchone():
+        values['id'] = conn.execute("SELECT coalesce(max(id), 0) + 1 FROM links").fetchone()[0]
+    seq = conn.execute(
+        f"INSERT INTO links ({', '.join(LINK_FIELDS)}) VALUES ({', '.join('?' * len(LINK_FIELDS))})",
+        [values[field] for field in LINK_FIELDS]
+    ).lastrowid
+    _set_tags(conn, seq, tags)
+    _index_link(conn, seq)
+
+def _update_link(conn, seq, row):
+    """Overwrite the fields present in row for an existing link."""
+    fields = [field for field in LINK_FIELDS if field in row and field != 'url']
+    if fields:
+        conn.execute(
+            f"UPDATE links SET {', '.join(f'{field} = ?' for field in fields)} WHERE seq = ?",
+            [_sql_value(row[field]) for field in fields] + [seq]
+        )
+    if 'tags' in row:
+        _set_tags(conn, seq, row['tags'] or [])
+    _index_link(conn, seq)
+
+def _delete_link(conn, seq):
+    """Drop a link with its tags and search entry."""
+    conn.execute("DELETE FROM link_tags WHERE link = ?", (seq,))
+    conn.execute("DELETE FROM links_fts WHERE rowid = ?", (seq,))
+    conn.execute("DELETE FROM links WHERE seq = ?", (seq,))
+
+def _set_tags(conn, seq, tags):
+    """Replace the tags of a link, keeping their order."""
+    tags = list(dict.fromkeys(str(tag).strip() for tag in tags if str(tag).strip()))
+    conn.execute("DELETE FROM link_tags WHERE link = ?", (seq,))
+    conn.executemany("INSERT OR IGNORE INTO tags (name) VALUES (?)", [(tag,) for tag in tags])
+    conn.executemany(
+        "INSERT INTO link_tags (link, tag, position) SELECT ?, id, ? FROM tags WHERE name = ?",
+        [(seq, position, tag) for position, tag in enumerate(tags)]
+    )
+
+def _index_link(conn, seq):
+    """Refresh the full-text entry of a link from its row and tags."""
+    conn.execute("DELETE FROM links_fts WHERE rowid = ?", (seq,))
+    conn.execute(
+        "INSERT INTO links_fts (rowid, title, description, url, tags) "
+        "SELECT seq, title, description, url, ("
+        "SELECT group_concat(tags.name, ' ') FROM link_tags JOIN tags ON tags.id = link_tags.tag "
+        "WHERE link_tags.link = links.seq) FROM links WHERE seq = ?",
+        (seq,)
+    )
+
+def _sql_value(value):
+    """Convert a DataFrame or change-record value for SQLite; missing values become NULL."""
+    if isinstance(value, (list, tuple)):
+        return None
+    if value is None or (isinstance(value, float) and pd.isna(value)) or value is pd.NA:
+        return None
+    if hasattr(value, 'item'):
+        return value.item()
+    return value if isinstance(value, (str, int, float)) else str(value)
+
+def _generation(conn):
+    """Return the generation stored in the database."""
+    row = conn.execute("SELECT value FROM meta WHERE key = 'generation'").fetchone()
+    return row[0] if row else 0
+
+def _bump_generation(conn):
+    """Count a write and return the new generation. Runs inside the write's transaction."""
+    conn.execute(
+        "INSERT INTO meta (key, value) VALUES ('generation', 1) "
+        "ON CONFLICT (key) DO UPDATE SET value = value + 1"
+    )
+    return _generation(conn)
+
+def _database_path(excel_file):
+    """Return the database file of excel_file in the configured Drive folder."""
+    try:
+        folder = st.secrets.get("GOOGLE_DRIVE_FOLDER_ID", "default")
+    except FileNotFoundError:
+        folder = "default"
+    directory = os.path.join(DATABASE_DIR, re.sub(r'[^\w.-]', '_', str(folder)))
+    return os.path.join(directory, re.sub(r'[^\w.-]', '_', excel_file.rsplit('.', 1)[0]) + '.sqlite3')
+
+@contextmanager
+def _connect(excel_file):
+    """Open a connection to a library's database in a transaction, creating the schema on first use."""
+    path = _database_path(excel_file)
+    if path not in _initialized:
+        with _lock:
+            if path not in _initialized:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                with closing(sqlite3.connect(path, timeout=5)) as conn:
+                    conn.execute("PRAGMA journal_mode=WAL")
+                    _create_schema(conn)
+                    conn.commit()
+                _initialized.add(path)
+    with closing(sqlite3.connect(path, timeout=5)) as conn:
+        conn.execute("PRAGMA synchronous=NORMAL")  # WAL stays consistent; only the last commits can be lost on power failure
+        with conn:
+            yield conn
+
+def _create_schema(conn):
+    """Create the links, tags, link_tags, links_fts and meta tables and their indexes."""
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS links ("
+        "seq INTEGER PRIMARY KEY, id INTEGER, url TEXT NOT NULL UNIQUE, title TEXT, "
+        "description TEXT, created_at TEXT, updated_at TEXT)"
+    )
+    conn.execute("CREATE INDEX IF NOT EXISTS links_id ON links (id)")
+    for column, expression in SORT_EXPRESSIONS.items():
+        conn.execute(f"CREATE INDEX IF NOT EXISTS links_{column} ON links ({expression}, seq)")
+    conn.execute("CREATE TABLE IF NOT EXISTS tags (id INTEGER PRIMARY KEY, name TEXT NOT NULL UNIQUE)")
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS link_tags ("
+        "link INTEGER NOT NULL, tag INTEGER NOT NULL, position INTEGER NOT NULL, "
+        "PRIMARY KEY (link, tag)) WITHOUT ROWID"
+    )
+    conn.execute("CREATE INDEX IF NOT EXISTS link_tags_tag ON link_tags (tag, link)")
+    conn.execute(
+        "CREATE VIRTUAL TABLE IF NOT EXISTS links_fts "
+        "USING fts5 (title, description, url, tags)"
+    )
+    conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value)")
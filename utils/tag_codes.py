@@ -0,0 +1,131 @@
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+# list<dictionary<int32, string>>: per-row offsets into a flat array of integer
+# codes against one shared vocabulary, instead of a Python list per row
+TAGS_DTYPE = pd.ArrowDtype(pa.list_(pa.dictionary(pa.int32(), pa.string())))
+_PLAIN_TAGS = pa.list_(pa.string())
+
+def encode_tags(values, index=None):
+    """
+    Convert tags to the dictionary-encoded column used in link DataFrames.
+    
+    Accepts Python lists, numpy arrays, comma-separated strings and missing
+    values per row. Tags are stripped and empty or repeated tags dropped.
+    
+    Args:
+        values: Series, list of per-row tags, or a pyarrow list array
+        index (Index, optional): Index for the returned Series
+    
+    Returns:
+        Series: Tags with dtype TAGS_DTYPE
+    """
+    if isinstance(values, pd.Series):
+        if values.dtype == TAGS_DTYPE:
+            return values if index is None else values.set_axis(index)
+        index = values.index if index is None else index
+        values = values.tolist()
+    if isinstance(values, (pa.Array, pa.ChunkedArray)):
+        plain = values.cast(_PLAIN_TAGS)
+    else:
+        plain = pa.array([_clean(tags) for tags in values], type=_PLAIN_TAGS)
+    if isinstance(plain, pa.ChunkedArray):
+        plain = plain.combine_chunks()
+    encoded = pa.ListArray.from_arrays(plain.offsets, pc.dictionary_encode(plain.values))
+    return pd.Series(pd.arrays.ArrowExtensionArray(encoded), index=index, name='tags')
+
+def decode_tags(series):
+    """
+    Convert an encoded tags column back to Python lists at the UI boundary.
+    
+    Args:
+        series (Series): Tags column
+    
+    Returns:
+        list: One list of tag strings per row
+    """
+    if series.dtype == TAGS_DTYPE:
+        return [tags or [] for tags in pa.array(series).to_pylist()]
+    return [_clean(tags) for tags in series]
+
+def tag_codes(series):
+    """
+    Return the flat code representation of a tags column.
+    
+    Args:
+        series (Series): Tags column
+    
+    Returns:
+        tuple: (codes, offsets, vocabulary) where row i has tags
+        vocabulary[codes[offsets[i]:offsets[i + 1]]]
+    """
+    plain = pa.array(encode_tags(series)).cast(_PLAIN_TAGS)
+    if isinstance(plain, pa.ChunkedArray):
+        plain = plain.combine_chunks()
+    offsets = plain.offsets.to_numpy()
+    values = plain.values.slice(offsets[0], offsets[-1] - offsets[0]) if len(offsets) else plain.values
+    encoded = pc.dictionary_encode(values)
+    codes = encoded.indices.to_numpy(zero_copy_only=False).astype(np.int32)
+    return codes, offsets - (offsets[0] if len(offsets) else 0), encoded.dictionary.to_pylist()
+
+def set_tags(df, label, tags):
+    """
+    Replace the tags of one row in place.
+    
+    Each call rebuilds the whole column, so callers updating several rows
+    should collect them and call replace_tags() once.
+    
+    Args:
+        df (DataFrame): Links with an encoded tags column
+        label: Index label of the row
+        tags (list): New tags
+    """
+    replace_tags(df, {df.index.get_loc(label): tags})
+
+def replace_tags(df, updates):
+    """
+    Replace the tags of several rows in place with one rebuild of the column.
+    
+    Args:
+        df (DataFrame): Links with an encoded tags column
+        updates (dict): Row position -> new tags
+    """
+    if not updates:
+        return
+    plain = pa.array(df['tags']).cast(_PLAIN_TAGS)
+    if isinstance(plain, pa.ChunkedArray):
+        plain = plain.combine_chunks()
+    positions = np.fromiter(updates.keys(), dtype=np.int64, count=len(updates))
+    replacements = pa.array([_clean(tags) for tags in updates.values()], type=_PLAIN_TAGS)
+    # Point the updated rows at the replacements appended after the column
+    order = np.arange(len(plain), dtype=np.int64)
+    order[positions] = len(plain) + np.arange(len(positions))
+    plain = pa.concat_arrays([plain, replacements]).take(pa.array(order))
+    encoded = pa.ListArray.from_arrays(plain.offsets, pc.dictionary_encode(plain.values))
+    df['tags'] = pd.Series(pd.arrays.ArrowExtensionArray(encoded), index=df.index, name='tags')
+
+def ensure_encoded(df):
+    """
+    Make sure a links DataFrame uses the encoded tags column.
+    
+    Args:
+        df (DataFrame): Links DataFrame
+    
+    Returns:
+        DataFrame: The same DataFrame, converted in place if needed
+    """
+    if 'tags' in df.columns and df['tags'].dtype != TAGS_DTYPE:
+        df['tags'] = encode_tags(df['tags'])
+    return df
+
+def _clean(tags):
+    """Return the stripped, non-empty, de-duplicated tags of one row."""
+    if isinstance(tags, str):
+        tags = tags.split(',')
+    elif isinstance(tags, np.ndarray):
+        tags = tags.tolist()
+    elif not isinstance(tags, (list, tuple)):
+        return []
+    return list(dict.fromkeys(str(tag).strip() for tag in tags if tag is not None and str(tag).strip()))
@@ -1,11 +1,29 @@
 import streamlit as st
-from utils.link_operations import fetch_metadata, save_link, delete_selected_links
+from utils.link_operations import fetch_metadata, save_link, delete_selected_links, undo_delete, undo_depth, fetch_metadata_batch, parse_url_list, save_links
+from utils.search_index import LibraryIndex, UrlIndex
+from utils.tag_codes import decode_tags
+from utils.write_behind import queue_changes, get_status
+from utils.export import EXPORT_FORMATS, build_export
+from utils.library_version import library_version
+from utils.metrics import span, clip, get_metrics, dump_metrics, reset_metrics, BUCKETS_MS
+from utils import sqlite_store
 import pandas as pd
+import numpy as np
 import logging
-import time
-from io import BytesIO
 from html import escape
 
+PAGE_SIZES = [25, 50, 100, 250]
+DEFAULT_PAGE_SIZE = 50
+# label -> (column, ascending)
+SORT_OPTIONS = {
+    "Newest first": ('created_at', False),
+    "Oldest first": ('created_at', True),
+    "Recently updated": ('updated_at', False),
+    "Title (A-Z)": ('title', True),
+    "Title (Z-A)": ('title', False),
+}
+VIEW_CACHE_ENTRIES = 64  # derived views kept per cached function, across all sessions
+
 def display_header(mode, username=None):
     """
     Display the app header with mode indicator.
@@ -34,6 +52,91 @@ def display_header(mode, username=None):
         </p>
     </div>
     """, unsafe_allow_html=True)
+    
+    # Success message left by the action that triggered the last rerun
+    flash_message = st.session_state.pop('flash_message', None)
+    if flash_message:
+        st.success(flash_message)
+        st.balloons()
+
+def sync_status(excel_file):
+    """
+    Show whether queued changes have reached Google Drive.
+    
+    Args:
+        excel_file (str): Name of the Excel file
+    """
+    status = get_status(excel_file)
+    if status['state'] == 'synced':
+        st.caption("🟢 All changes saved to Google Drive")
+    elif status['state'] == 'syncing':
+        st.caption(f"🔄 Saving {status['pending']} change(s)...")
+    elif status['state'] == 'pending' and sqlite_store.enabled():
+        st.caption(f"💾 {status['pending']} change(s) saved locally, Google Drive backup pending")
+    elif status['state'] == 'pending':
+        st.caption(f"🟡 {status['pending']} change(s) pending")
+    else:
+        st.caption(f"🔴 {status['error']} ({status['pending']} change(s) pending)")
+
+def diagnostics_panel():
+    """
+    Owner-only panel with operation timings and Google Drive counters.
+    
+    Timings are the utils.metrics spans of this server process, so they cover
+    every session and the background saves, not just the current user.
+    """
+    from utils.data_manager import get_drive_stats, get_transfer_stats, get_library_cache_stats, get_write_stats
+    from utils.export import get_stats as get_export_stats
+    from utils.fetcher import get_stats as get_fetch_stats
+    
+    with st.expander("🩺 Diagnostics", expanded=False):
+        metrics = get_metrics()
+        if not metrics:
+            st.caption("No operations recorded yet")
+        else:
+            table = pd.DataFrame.from_dict(metrics, orient='index')
+            st.dataframe(
+                table[['count', 'errors', 'p50_ms', 'p95_ms', 'max_ms', 'mean_ms']].round(1),
+                use_container_width=True
+            )
+            operation = st.selectbox("Latency histogram", list(metrics), key="diagnostics_operation")
+            labels = [f"≤ {bound} ms" for bound in BUCKETS_MS] + [f"> {BUCKETS_MS[-1]} ms"]
+            counts = pd.Series(list(metrics[operation]['buckets'].values()), index=labels, name="calls")
+            st.dataframe(counts[counts > 0], use_container_width=True)
+        
+        transfers = get_transfer_stats()
+        cache = get_library_cache_stats()
+        writes = get_write_stats()
+        fetches = get_fetch_stats()
+        st.caption(
+            f"Uploads: {transfers['upload']['transfers']} ({transfers['upload']['mb_per_s']:.1f} MB/s) | "
+            f"Downloads: {transfers['download']['transfers']} ({transfers['download']['mb_per_s']:.1f} MB/s) | "
+            f"Library cache: {cache['hits']} hits, {cache['misses']} misses | "
+            f"Write conflicts merged: {writes['conflicts']} | "
+            f"Page fetches: {fetches['requests']} ({fetches['retries']} retried, "
+            f"{fetches['throttled_seconds']:.1f} s throttled, {fetches['robots_blocked']} blocked by robots.txt)"
+        )
+        
+        dump_col, reset_col = st.columns(2)
+        with dump_col:
+            st.download_button(
+                "📥 Download Metrics (JSON)",
+                data=dump_metrics(
+                    drive=get_drive_stats(),
+                    transfers=transfers,
+                    library_cache=cache,
+                    writes=writes,
+                    exports=get_export_stats(),
+                    fetches=fetches
+                ),
+                file_name="metrics.json",
+                mime="application/json",
+                key="metrics_dump"
+            )
+        with reset_col:
+            if st.button("Reset Timings", key="reset_metrics"):
+                reset_metrics()
+                st.rerun()
 
 def login_form():
     """
@@ -167,8 +270,6 @@ def add_link_section(df, excel_file, mode):
     Returns:
         DataFrame: Updated DataFrame
     """
-    from utils.data_manager import save_data
-    
     st.markdown("### 🌐 Add New Web Content")
     
     # Initialize user DataFrame for public mode
@@ -232,10 +333,11 @@ def add_link_section(df, excel_file, mode):
             key="description_input"
         )
         
-        # Get all unique tags from DataFrame
-        all_tags = sorted({str(tag).strip() for sublist in working_df['tags'] 
-                         for tag in (sublist if isinstance(sublist, list) else []) 
-                         if str(tag).strip()})
+        # Get all unique tags from the tag index
+        if _uses_database(mode):
+            all_tags = sqlite_store.tag_vocabulary(excel_file)
+        else:
+            all_tags = _tag_vocabulary(working_df, get_library_index(working_df, mode), library_version(working_df))
         suggested_tags = st.session_state.get('suggested_tags', []) + \
                        ['research', 'tutorial', 'news', 'tool', 'inspiration']
         all_tags = sorted(list(set(all_tags + [str(tag).strip() for tag in suggested_tags if str(tag).strip()])))
@@ -260,43 +362,165 @@ def add_link_section(df, excel_file, mode):
         submitted = st.form_submit_button("💾 Save Link")
         
         if submitted:
-            logging.debug(f"Form submitted: URL={url}, Title={title}, Description={description}, Tags={tags}, Mode={mode}")
+            logging.debug(f"Form submitted: URL={clip(url)}, Title={clip(title)}, Description={clip(description)}, Tags={clip(tags)}, Mode={mode}")
             if not url:
                 st.error("Please enter a URL")
             elif not title:
                 st.error("Please enter a title")
             else:
-                working_df, action = save_link(working_df, url, title, description, tags)
+                # The SQLite engine needs no in-memory indexes; only keep them in step if they exist
+                index = get_library_index(working_df, mode, build=not _uses_database(mode))
+                working_df, action = save_link(working_df, url, title, description, tags, index)
                 if action:
                     logging.debug(f"Displaying success message and balloons for action: {action}")
                     if mode in ["owner", "guest"]:
-                        if save_data(working_df, excel_file):
-                            st.session_state['df'] = working_df
-                            st.success(f"✅ Link {action} successfully!")
-                            st.balloons()
-                            time.sleep(0.5)
-                            st.session_state['clear_url'] = True
-                            st.session_state['url_input_counter'] += 1
-                            for key in ['auto_title', 'auto_description', 'suggested_tags']:
-                                st.session_state.pop(key, None)
-                            st.rerun()
-                        else:
-                            st.error("Failed to save link to Google Drive")
+                        change = _link_change(working_df, index.urls if index is not None else None, url, action)
+                        queue_changes(working_df, excel_file, [change])
+                        st.session_state['df'] = working_df
+                        st.session_state['flash_message'] = f"✅ Link {action} successfully!"
                     else:
                         st.session_state['user_df'] = working_df
-                        st.success(f"✅ Link {action} successfully! Download your links as they are temporary.")
-                        st.balloons()
-                        time.sleep(0.5)
-                        st.session_state['clear_url'] = True
-                        st.session_state['url_input_counter'] += 1
-                        for key in ['auto_title', 'auto_description', 'suggested_tags']:
-                            st.session_state.pop(key, None)
-                        st.rerun()
+                        st.session_state['flash_message'] = f"✅ Link {action} successfully! Download your links as they are temporary."
+                    st.session_state['clear_url'] = True
+                    st.session_state['url_input_counter'] += 1
+                    for key in ['auto_title', 'auto_description', 'suggested_tags']:
+                        st.session_state.pop(key, None)
+                    st.rerun()
                 else:
                     st.error("Failed to process link")
     
+    with st.expander("📋 Bulk Import", expanded=False):
+        working_df = _bulk_import(working_df, excel_file, mode)
+    
+    return working_df
+
+def _bulk_import(working_df, excel_file, mode):
+    """
+    Import many URLs at once, fetching their metadata concurrently.
+    
+    Args:
+        working_df (DataFrame): DataFrame to add links to
+        excel_file (str): Name of the Excel file
+        mode (str): 'owner', 'guest', or 'public'
+    
+    Returns:
+        DataFrame: Updated DataFrame
+    """
+    pasted = st.text_area(
+        "URLs",
+        placeholder="Paste one URL per line",
+        height=150,
+        key="bulk_urls_input"
+    )
+    uploaded = st.file_uploader(
+        "Or upload a list of URLs",
+        type=['txt', 'csv'],
+        key="bulk_urls_file"
+    )
+    bulk_tags = st.text_input(
+        "Tags for all imported links",
+        placeholder="Comma-separated, e.g. research, news",
+        key="bulk_tags_input"
+    )
+    
+    text = pasted + "\n" + (uploaded.getvalue().decode('utf-8', errors='ignore') if uploaded else '')
+    urls = parse_url_list(text)
+    st.caption(f"{len(urls)} URL(s) detected")
+    
+    if st.button("📥 Import Links", disabled=not urls, key="bulk_import_button"):
+        progress = st.progress(0.0, text="Fetching metadata...")
+        
+        def on_progress(done, total, url):
+            progress.progress(done / total, text=f"Fetched {done}/{total}: {url}")
+        
+        results = fetch_metadata_batch(urls, on_progress=on_progress)
+        extra_tags = [tag.strip() for tag in bulk_tags.split(',') if tag.strip()]
+        entries = []
+        for url in urls:
+            title, description, keywords, error = results[url]
+            entries.append({
+                'url': url,
+                'title': title,
+                'description': description,
+                'tags': list(dict.fromkeys(keywords + extra_tags))
+            })
+        failed = sum(1 for url in urls if results[url][3])
+        
+        logging.debug(f"Bulk import: {len(urls)} URLs, {failed} metadata failures, Mode={mode}")
+        index = get_library_index(working_df, mode, build=not _uses_database(mode))
+        working_df, saved = save_links(working_df, entries, index)
+        if mode in ["owner", "guest"]:
+            urls = index.urls if index is not None else UrlIndex.from_frame(working_df)
+            changes = [_link_change(working_df, urls, url, action) for url, action in saved]
+            queue_changes(working_df, excel_file, changes)
+            st.session_state['df'] = working_df
+        else:
+            st.session_state['user_df'] = working_df
+        
+        message = f"✅ Imported {len(saved)} link(s)!"
+        if failed:
+            message += f" Metadata could not be fetched for {failed}; their URL is used as the title."
+        st.success(message)
+        st.balloons()
+    
     return working_df
 
+def get_library_index(df, mode, build=True):
+    """
+    Return the session's search and tag indexes for the working DataFrame.
+    
+    The indexes are built on first use and rebuilt if their row count no
+    longer matches the DataFrame.
+    
+    Args:
+        df (DataFrame): Links shown in this mode
+        mode (str): 'owner', 'guest', or 'public'
+        build (bool): False to return None instead of building missing indexes,
+            for callers that only need to keep existing indexes in step
+    
+    Returns:
+        LibraryIndex or None: Indexes kept in session state
+    """
+    key = 'user_search_index' if mode == "public" else 'search_index'
+    index = st.session_state.get(key)
+    if index is not None and len(index) != len(df):
+        index = st.session_state[key] = None
+    if index is None and build:
+        with span('search.index_build', rows=len(df)):
+            index = LibraryIndex.from_frame(df)
+        st.session_state[key] = index
+    return index
+
+def _uses_database(mode):
+    """Return True if the library of mode is queried in its SQLite database instead of in pandas."""
+    return mode in ["owner", "guest"] and sqlite_store.enabled()
+
+def _link_change(df, urls, url, action):
+    """
+    Build the change record for a link that save_link() just saved or updated.
+    
+    Args:
+        df (DataFrame): Library after the save
+        urls (UrlIndex or None): URL index of df; without one a new link is
+            taken to be the last row and an updated one is found through a
+            throwaway index
+        url (str): URL as entered by the user
+        action (str): "saved" or "updated"
+    
+    Returns:
+        dict: Change record from make_change()
+    """
+    from utils.data_manager import make_change
+    
+    if urls is not None:
+        pos = urls.lookup(url)
+    elif action == "saved":
+        pos = len(df) - 1  # save_link() appends new links
+    else:
+        pos = UrlIndex.from_frame(df).lookup(url)
+    row = df.iloc[pos].to_dict()
+    return make_change('add' if action == "saved" else 'update', row['url'], row)
+
 def browse_section(df, excel_file, mode):
     """
     Section for browsing and searching saved links.
@@ -306,17 +530,28 @@ def browse_section(df, excel_file, mode):
         excel_file (str): Name of the Excel file
         mode (str): 'owner', 'guest', or 'public'
     """
-    from utils.data_manager import save_data
-    
     st.markdown("### 📚 Browse Saved Links")
     
     # Use user_df for public mode
     working_df = st.session_state['user_df'] if mode == "public" else df
     
+    # With the SQLite engine search, tag filters and paging run as database
+    # queries and the session's in-memory indexes are only kept in step if a
+    # save already built them
+    database = _uses_database(mode)
+    
+    if undo_depth(mode):
+        if st.button("↩️ Undo Last Delete", key="undo_delete"):
+            undo_delete(working_df, excel_file, mode, get_library_index(working_df, mode, build=not database))
+            st.rerun()
+    
     if working_df.empty:
         st.info("✨ No links saved yet. Add your first link to get started!")
         return
     
+    index = get_library_index(working_df, mode, build=not database)
+    version = library_version(working_df)
+    
     with st.form("search_form"):
         search_col, tag_col = st.columns([3, 1])
         with search_col:
@@ -327,70 +562,68 @@ def browse_section(df, excel_file, mode):
                 help="Enter words to filter links"
             )
         with tag_col:
-            all_tags = sorted({str(tag).strip() for sublist in working_df['tags'] 
-                             for tag in (sublist if isinstance(sublist, list) else []) 
-                             if str(tag).strip()})
             selected_tags = st.multiselect(
                 "Filter by tags",
-                options=all_tags,
+                options=sqlite_store.tag_vocabulary(excel_file) if database else _tag_vocabulary(working_df, index, version),
                 key="tag_filter",
                 help="Select tags to filter links"
             )
+            tag_match = st.radio(
+                "Match",
+                options=["any", "all"],
+                format_func=lambda x: "Any of these tags" if x == "any" else "All of these tags",
+                horizontal=True,
+                key="tag_match",
+                label_visibility="collapsed"
+            )
         
         submitted = st.form_submit_button("🔍 Search")
     
-    filtered_df = working_df.copy()
-    
-    if search_query or submitted:
-        logging.debug(f"Applying search query: {search_query}")
-        search_lower = search_query.lower()
-        try:
-            mask = (
-                filtered_df['title'].str.lower().str.contains(search_lower, na=False) |
-                filtered_df['url'].str.lower().str.contains(search_lower, na=False) |
-                filtered_df['description'].str.lower().str.contains(search_lower, na=False) |
-                filtered_df['tags'].apply(
-                    lambda x: any(search_lower in str(tag).lower() for tag in (x if isinstance(x, list) else []))
-                )
-            )
-            filtered_df = filtered_df[mask]
-            logging.debug(f"Search results: {len(filtered_df)} links found")
-        except Exception as e:
-            st.error(f"Search error: {str(e)}")
-            logging.error(f"Search failed: {str(e)}")
-    
-    if selected_tags:
-        logging.debug(f"Applying tag filter: {selected_tags}")
-        try:
-            mask = filtered_df['tags'].apply(
-                lambda x: any(str(tag) in map(str, (x if isinstance(x, list) else [])) 
-                              for tag in selected_tags)
-            )
-            filtered_df = filtered_df[mask]
-            logging.debug(f"Tag filter results: {len(filtered_df)} links found")
-        except Exception as e:
-            st.error(f"Tag filter error: {str(e)}")
-            logging.error(f"Tag filter failed: {str(e)}")
+    try:
+        if database:
+            matched = sqlite_store.count_matches(excel_file, search_query, tuple(selected_tags), tag_match)
+        else:
+            matched = int(_filter_mask(working_df, index, version, search_query, tuple(selected_tags), tag_match).sum())
+    except Exception as e:
+        st.error(f"Search error: {str(e)}")
+        logging.error(f"Search failed: {str(e)}")
+        search_query, selected_tags = '', []
+        matched = len(working_df)
     
-    if filtered_df.empty:
+    if not matched:
         st.warning("No links match your search criteria")
     else:
-        st.markdown(f"<small>Found <strong>{len(filtered_df)}</strong> link(s)</small>", unsafe_allow_html=True)
+        st.markdown(f"<small>Found <strong>{matched}</strong> link(s)</small>", unsafe_allow_html=True)
+    
+    if 'selected_ids' not in st.session_state:
+        st.session_state.selected_ids = set()
+    selected_ids = st.session_state.selected_ids
     
-    if 'selected_urls' not in st.session_state:
-        st.session_state.selected_urls = []
-
     with st.expander("📊 View All Links as Data Table", expanded=True):
-        display_df = filtered_df.copy()
-        display_df['tags'] = display_df['tags'].apply(
-            lambda x: ', '.join(str(tag) for tag in (x if isinstance(x, list) else [])))
+        sort_col, size_col, page_col = st.columns([2, 1, 1])
+        with sort_col:
+            sort = st.selectbox("Sort by", list(SORT_OPTIONS), key="browse_sort")
+        with size_col:
+            page_size = st.selectbox("Links per page", PAGE_SIZES, index=PAGE_SIZES.index(DEFAULT_PAGE_SIZE), key="page_size")
+        pages = max(1, -(-matched // page_size))
+        
+        # Go back to the first page whenever the result set or its order changes
+        view = (search_query, tuple(selected_tags), tag_match, sort, page_size, version)
+        if st.session_state.get('browse_view') != view:
+            st.session_state['browse_view'] = view
+            st.session_state['browse_page'] = 1
+        st.session_state['browse_page'] = min(st.session_state.get('browse_page', 1), pages)
+        with page_col:
+            page = st.number_input(f"Page (of {pages})", min_value=1, max_value=pages, step=1, key="browse_page")
         
-        display_df['Select'] = [False] * len(display_df)
-        for i, row in display_df.iterrows():
-            display_df.at[i, 'Select'] = row['url'] in st.session_state.selected_urls
+        if database:
+            page_df = sqlite_store.page(excel_file, search_query, tuple(selected_tags), tag_match, *SORT_OPTIONS[sort], page, page_size)
+        else:
+            page_df = _page_frame(working_df, index, version, search_query, tuple(selected_tags), tag_match, sort, page, page_size)
+        page_df = page_df.assign(Select=page_df['id'].isin(selected_ids).to_numpy())
         
         edited_df = st.data_editor(
-            display_df[['Select', 'title', 'url', 'description', 'tags', 'created_at']],
+            page_df[['Select', 'title', 'url', 'description', 'tags', 'created_at']],
             use_container_width=True,
             hide_index=True,
             column_config={
@@ -405,22 +638,143 @@ def browse_section(df, excel_file, mode):
             key="data_editor"
         )
         
-        st.session_state.selected_urls = edited_df[edited_df['Select']]['url'].tolist()
+        # Selection on other pages is kept; only this page's checkboxes are read back
+        checked = edited_df['Select'].to_numpy(dtype=bool)
+        selected_ids.difference_update(page_df['id'][~checked])
+        selected_ids.update(page_df['id'][checked])
         
-        if st.session_state.selected_urls:
+        if selected_ids:
+            st.caption(f"{len(selected_ids)} link(s) selected")
             if st.button("🗑️ Delete Selected Links", key="delete_selected"):
-                working_df = delete_selected_links(working_df, excel_file, st.session_state.selected_urls, mode)
-                if mode == "public":
-                    st.session_state['user_df'] = working_df
+                if database:
+                    selected_urls = sqlite_store.urls_for_ids(excel_file, selected_ids)
                 else:
-                    st.session_state['df'] = working_df
-                    save_data(working_df, excel_file)
-                st.session_state.selected_urls = []
+                    selected_urls = working_df.loc[working_df['id'].isin(selected_ids), 'url'].tolist()
+                working_df, deleted = delete_selected_links(
+                    working_df, excel_file, selected_urls, mode,
+                    index
+                )
+                logging.debug(f"Deleted {deleted} link(s), Mode={mode}")
+                selected_ids.clear()
                 st.rerun()
 
+@st.cache_data(max_entries=VIEW_CACHE_ENTRIES, show_spinner=False)
+def _tag_vocabulary(_df, _index, version):
+    """
+    Return the sorted tag vocabulary of a library.
+    
+    This and the other cached views below skip hashing the DataFrame and its
+    indexes (underscore arguments) and are keyed on library_version()
+    instead, so reruns caused by unrelated widgets do no pandas work.
+    
+    Args:
+        _df (DataFrame): DataFrame containing links
+        _index (LibraryIndex): Indexes of _df
+        version (int): library_version() of _df
+    
+    Returns:
+        list: Tags used by at least one link
+    """
+    return list(_index.tags.vocabulary)
+
+@st.cache_data(max_entries=VIEW_CACHE_ENTRIES, show_spinner=False)
+def _filter_mask(_df, _index, version, query, tags, match):
+    """
+    Return which links match the search query and tag filter.
+    
+    Args:
+        _df (DataFrame): DataFrame containing links
+        _index (LibraryIndex): Indexes of _df
+        version (int): library_version() of _df
+        query (str): Search text, may be empty
+        tags (tuple): Tags to filter by, may be empty
+        match (str): 'any' or 'all' of the tags
+    
+    Returns:
+        ndarray: Boolean mask over the rows of _df
+    """
+    mask = np.ones(len(_df), dtype=bool)
+    if query:
+        logging.debug(f"Applying search query: {clip(query)}")
+        with span('search.text'):
+            matches = _index.text.search(query)
+            if matches is not None:
+                mask &= _df['url'].isin(matches).to_numpy()
+        logging.debug(f"Search results: {int(mask.sum())} links found")
+    if tags:
+        logging.debug(f"Applying tag filter: {list(tags)} ({match})")
+        with span('search.tags'):
+            mask &= _index.tags.mask(list(tags), match)
+        logging.debug(f"Tag filter results: {int(mask.sum())} links found")
+    return mask
+
+@st.cache_data(max_entries=VIEW_CACHE_ENTRIES, show_spinner=False)
+def _sort_order(_df, version, sort):
+    """
+    Return row positions of a library in the order chosen in the browse view.
+    
+    The permutation covers the whole library, so paging and filtering only
+    index into it and never sort again.
+    
+    Args:
+        _df (DataFrame): DataFrame containing links
+        version (int): library_version() of _df
+        sort (str): Key of SORT_OPTIONS
+    
+    Returns:
+        ndarray: Row positions
+    """
+    column, ascending = SORT_OPTIONS[sort]
+    values = _df[column].fillna('').astype(str)
+    if column == 'title':
+        values = values.str.lower()
+    order = np.argsort(values.to_numpy(), kind='stable')
+    return order if ascending else order[::-1]
+
+@st.cache_data(max_entries=VIEW_CACHE_ENTRIES, show_spinner=False)
+def _page_frame(_df, _index, version, query, tags, match, sort, page, page_size):
+    """
+    Build the rows of one browse page, with tags joined for display.
+    
+    Args:
+        _df (DataFrame): DataFrame containing links
+        _index (LibraryIndex): Indexes of _df
+        version (int): library_version() of _df
+        query, tags, match: Filter, as for _filter_mask()
+        sort (str): Key of SORT_OPTIONS
+        page (int): Page number, starting at 1
+        page_size (int): Links per page
+    
+    Returns:
+        DataFrame: id, title, url, description, tags and created_at of the page
+    """
+    order = _sort_order(_df, version, sort)
+    mask = _filter_mask(_df, _index, version, query, tags, match)
+    visible = order[mask[order]][(page - 1) * page_size:page * page_size]
+    page_df = _df.iloc[visible][['id', 'title', 'url', 'description', 'tags', 'created_at']]
+    return page_df.assign(tags=[', '.join(tags) for tags in decode_tags(page_df['tags'])])
+
+@st.cache_data(max_entries=VIEW_CACHE_ENTRIES, show_spinner=False)
+def _library_stats(_df, _index, version):
+    """
+    Return the numbers shown in the export stats line.
+    
+    Args:
+        _df (DataFrame): DataFrame containing links
+        _index (LibraryIndex): Indexes of _df
+        version (int): library_version() of _df
+    
+    Returns:
+        tuple: (number of links, number of unique tags)
+    """
+    return len(_df), len(_tag_vocabulary(_df, _index, version))
+
 def download_section(df, excel_file, mode):
     """
-    Section for downloading saved links as Excel.
+    Section for downloading saved links as Excel, CSV or JSON.
+    
+    The file is only built when the user asks for it, and identical library
+    contents are never serialized twice.
     
     Args:
         df (DataFrame): DataFrame containing links
@@ -440,43 +794,44 @@ def download_section(df, excel_file, mode):
         st.markdown("""
         <div class="card">
             <h3>Export Options</h3>
-            <p>Download your saved links in Excel format</p>
+            <p>Download your saved links in Excel, CSV or JSON format</p>
         </div>
         """, unsafe_allow_html=True)
         
-        if mode in ["owner", "guest"] and excel_file:
-            service = get_drive_service()
-            file_id = find_file_in_drive(service, excel_file)
-            if file_id:
-                output = BytesIO()
-                request = service.files().get_media(fileId=file_id)
-                downloader = MediaIoBaseDownload(output, request)
-                done = False
-                while not done:
-                    status, done = downloader.next_chunk()
-                output.seek(0)
-                st.download_button(
-                    label=f"Download {mode.capitalize()} Links (Excel)",
-                    data=output,
-                    file_name=f"{mode}_links.xlsx",
-                    mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-                    help=f"Download all {mode} links in Excel format"
-                )
-        elif mode == "public" and not working_df.empty:
-            output = BytesIO()
-            working_df.to_excel(output, index=False, engine='openpyxl')
-            output.seek(0)
+        fmt = st.radio(
+            "Format",
+            list(EXPORT_FORMATS),
+            format_func=lambda key: EXPORT_FORMATS[key]['label'],
+            horizontal=True,
+            key="export_format"
+        )
+        label = EXPORT_FORMATS[fmt]['label']
+        owner = mode.capitalize() if mode in ["owner", "guest"] and excel_file else "Public"
+        
+        fingerprint = (library_version(working_df), fmt)
+        prepared = st.session_state.get('export_artifact')
+        if prepared is None or prepared[0] != fingerprint:
+            if st.button(f"⚙️ Prepare {label} File", key="prepare_export"):
+                with st.spinner(f"Building {label} file..."):
+                    prepared = (fingerprint, build_export(working_df, fmt))
+                st.session_state['export_artifact'] = prepared
+        
+        if prepared is not None and prepared[0] == fingerprint:
             st.download_button(
-                label="Download Public Links (Excel)",
-                data=output,
-                file_name="public_links.xlsx",
-                mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-                help="Download all public links in Excel format"
+                label=f"Download {owner} Links ({label})",
+                data=prepared[1],
+                file_name=f"{owner.lower()}_links.{fmt}",
+                mime=EXPORT_FORMATS[fmt]['mime'],
+                help=f"Download all {mode} links in {label} format"
             )
         
+        if _uses_database(mode):
+            links, tags = sqlite_store.count(excel_file), len(sqlite_store.tag_vocabulary(excel_file))
+        else:
+            links, tags = _library_stats(working_df, get_library_index(working_df, mode), library_version(working_df))
         st.markdown(f"""
         <div style="margin-top: 1rem;">
-            <p><strong>Stats:</strong> {len(working_df)} links saved | {len(set(tag for sublist in working_df['tags'] for tag in (sublist if isinstance(sublist, list) else [])))} unique tags</p>
+            <p><strong>Stats:</strong> {links} links saved | {tags} unique tags</p>
         </div>
         """, unsafe_allow_html=True)
 
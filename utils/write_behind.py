@@ -0,0 +1,191 @@
+import logging
+import random
+import threading
+import time
+from utils import sqlite_store
+
+WRITE_BEHIND_DELAY = 2.0  # seconds to wait for more changes before uploading
+RETRY_DELAY = 10.0  # seconds before retrying a failed upload, +/- half of it at random
+
+# excel_file -> pending write for that library, shared by every session in the process
+_entries = {}
+_lock = threading.Lock()
+_wakeup = threading.Condition(_lock)
+_worker = None
+
+def queue_changes(df, excel_file, changes):
+    """
+    Queue a library for a background save and return immediately.
+    
+    Changes queued within WRITE_BEHIND_DELAY seconds of each other are
+    coalesced into one record_changes() call with the latest DataFrame.
+    
+    With the SQLite engine the changes are written to the local database
+    before returning, and Google Drive gets a backup_library() snapshot at
+    most BACKUP_INTERVAL seconds later instead.
+    
+    Args:
+        df (DataFrame): Library after the changes were applied
+        excel_file (str): Name of the Excel file
+        changes (list): Change records from make_change()
+    
+    Returns:
+        bool: True unless the SQLite engine could not write the changes;
+        use get_status() to follow the upload
+    """
+    if sqlite_store.enabled():
+        from utils.data_manager import record_changes
+        
+        if not record_changes(df, excel_file, changes):
+            return False
+        with _lock:
+            entry = _entries.setdefault(excel_file, _new_entry())
+            if not entry['changes']:  # keep the backup due time while edits keep coming
+                entry['due'] = time.monotonic() + sqlite_store.BACKUP_INTERVAL
+            entry['changes'].extend(changes)
+            _ensure_worker()
+            _wakeup.notify_all()
+        return True
+    
+    # Shallow: sessions replace their frame rather than editing it in place (LinkStore
+    # copies first), and record_changes() only uploads it when no snapshot exists yet
+    snapshot = df.copy(deep=False)
+    with _lock:
+        entry = _entries.setdefault(excel_file, _new_entry())
+        entry['df'] = snapshot
+        entry['changes'].extend(changes)
+        entry['due'] = time.monotonic() + WRITE_BEHIND_DELAY
+        _ensure_worker()
+        _wakeup.notify_all()
+    logging.debug(f"Queued {len(changes)} change(s) for {excel_file}")
+    return True
+
+def flush(excel_file, timeout=30.0):
+    """
+    Upload pending changes for a library now and wait for the result.
+    
+    Args:
+        excel_file (str): Name of the Excel file
+        timeout (float): Seconds to wait
+    
+    Returns:
+        bool: True if nothing is left to upload, False on failure or timeout
+    """
+    deadline = time.monotonic() + timeout
+    with _lock:
+        entry = _entries.get(excel_file)
+        if entry is None:
+            return True
+        entry['due'] = 0
+        attempts = entry['attempts']
+        _wakeup.notify_all()
+        while entry['changes'] or entry['syncing']:
+            if entry['error'] and entry['attempts'] > attempts:
+                return False
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            _wakeup.wait(remaining)
+        return True
+
+def get_status(excel_file):
+    """
+    Return the sync state of a library.
+    
+    Args:
+        excel_file (str): Name of the Excel file
+    
+    Returns:
+        dict: state ('synced', 'pending', 'syncing' or 'error'), pending (int),
+        last_synced (epoch seconds or None) and error (str or None)
+    """
+    with _lock:
+        entry = _entries.get(excel_file)
+        if entry is None:
+            return {'state': 'synced', 'pending': 0, 'last_synced': None, 'error': None}
+        if entry['syncing']:
+            state = 'syncing'
+        elif entry['error']:
+            state = 'error'
+        elif entry['changes']:
+            state = 'pending'
+        else:
+            state = 'synced'
+        return {
+            'state': state,
+            'pending': len(entry['changes']) + entry['in_flight'],
+            'last_synced': entry['last_synced'],
+            'error': entry['error'],
+        }
+
+def _new_entry():
+    return {
+        'df': None,
+        'changes': [],
+        'due': 0.0,
+        'syncing': False,
+        'in_flight': 0,
+        'attempts': 0,
+        'error': None,
+        'last_synced': None,
+    }
+
+def _ensure_worker():
+    """Start the background writer thread if it is not running. Caller holds _lock."""
+    global _worker
+    if _worker is None or not _worker.is_alive():
+        _worker = threading.Thread(target=_run, name="write-behind", daemon=True)
+        _worker.start()
+
+def _run():
+    """Upload due libraries one at a time, forever."""
+    from utils.data_manager import record_changes, backup_library
+    
+    while True:
+        with _lock:
+            excel_file, entry = _next_due()
+            while excel_file is None:
+                _wakeup.wait(_seconds_until_due())
+                excel_file, entry = _next_due()
+            df, changes = entry['df'], entry['changes']
+            entry['changes'] = []
+            entry['syncing'] = True
+            entry['in_flight'] = len(changes)
+        
+        try:
+            if sqlite_store.enabled():
+                ok = backup_library(excel_file)
+            else:
+                ok = record_changes(df, excel_file, changes)
+        except Exception as e:
+            logging.error(f"Write-behind save failed for {excel_file}: {str(e)}")
+            ok = False
+        
+        with _lock:
+            entry['syncing'] = False
+            entry['in_flight'] = 0
+            entry['attempts'] += 1
+            if ok:
+                entry['error'] = None
+                entry['last_synced'] = time.time()
+                logging.info(f"Synced {len(changes)} change(s) to {excel_file}")
+            else:
+                # Put the batch back in front of anything queued meanwhile and retry later
+                entry['changes'] = changes + entry['changes']
+                entry['error'] = "Saving to Google Drive failed; retrying"
+                # Jittered, so processes whose saves collided do not retry in lockstep
+                entry['due'] = time.monotonic() + RETRY_DELAY * random.uniform(0.5, 1.5)
+            _wakeup.notify_all()
+
+def _next_due():
+    """Return (excel_file, entry) for the first library whose delay has passed. Caller holds _lock."""
+    now = time.monotonic()
+    for excel_file, entry in _entries.items():
+        if entry['changes'] and not entry['syncing'] and entry['due'] <= now:
+            return excel_file, entry
+    return None, None
+
+def _seconds_until_due():
+    """Return how long the worker may sleep before the next library is due. Caller holds _lock."""
+    dues = [entry['due'] for entry in _entries.values() if entry['changes'] and not entry['syncing']]
+    return max(0.0, min(dues) - time.monotonic()) if dues else None